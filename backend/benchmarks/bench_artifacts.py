@@ -0,0 +1,104 @@
+"""Bytes on the wire and response time for generated artifacts, plain vs compressed vs conditional.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_artifacts
+    python -m benchmarks.bench_artifacts --questions 20 --cvs 40 --repeats 200
+
+A JD, a quiz set and a batch screening report are generated once in-process
+against the fake Gemini backend (benchmarks.fake_gemini). Each artifact is
+then fetched from GET /api/artifacts/{id} the way a client without
+compression or caching would (``Accept-Encoding: identity``, what every
+re-fetch cost before), with gzip and, when the Brotli package is installed,
+brotli, and as a conditional GET revalidating the ETag it was served with.
+Bytes are counted as received: the status line and headers plus the body as
+encoded. Times are per request through the ASGI stack, without a network.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from benchmarks.load_test import configure_environment
+
+ROLE = "Backend Engineer"
+SKILLS = ["Python", "FastAPI", "PostgreSQL", "AWS", "Docker", "Kubernetes"]
+
+
+def wire_bytes(response) -> int:
+    head = len(f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n") + 2
+    head += sum(len(name) + len(value) + 4 for name, value in response.headers.raw)
+    return head + response.num_bytes_downloaded
+
+
+async def fetch(client, artifact_id: str, repeats: int, headers: dict) -> dict:
+    timings, response = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = await client.get(f"/api/artifacts/{artifact_id}", headers=headers)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code in (200, 304), response.text
+    return {"status": response.status_code, "bytes": wire_bytes(response),
+            "encoding": response.headers.get("content-encoding", "-"), "ms": statistics.median(timings) * 1000}
+
+
+async def generate(client, questions: int, cvs: int) -> dict:
+    """Artifact id per kind"""
+    from benchmarks.fixtures import make_cvs, JOB_DESCRIPTION
+    jd = await client.post("/api/jd/generate", json={"role": ROLE, "skills": SKILLS, "experience_level": "senior"})
+    quiz = await client.post("/api/quiz/generate", json={"role": ROLE, "skill_level": "advanced",
+                                                         "num_questions": questions})
+    files = [("cv_files", (filename, data, "application/octet-stream")) for filename, data in make_cvs(cvs)]
+    batch = await client.post("/api/cv/screen/batch", data={"jd_text": JOB_DESCRIPTION}, files=files)
+    summary = next(event for event in map(json.loads, batch.text.splitlines()) if event["event"] == "summary")
+    return {"jd": jd.json()["artifact_id"], "quiz": quiz.json()["artifact_id"],
+            "cv_batch_report": summary["artifact_id"]}
+
+
+async def run(args):
+    from httpx import AsyncClient, ASGITransport
+    from main import app
+    from benchmarks.fake_gemini import FakeGeminiModel, LatencyModel, install_fake_backend
+    from services.compression import BROTLI_AVAILABLE
+
+    variants = [("identity", {"Accept-Encoding": "identity"}), ("gzip", {"Accept-Encoding": "gzip"})]
+    if BROTLI_AVAILABLE:
+        variants.append(("br", {"Accept-Encoding": "br, gzip"}))
+    rows = []
+    async with install_fake_backend(FakeGeminiModel(LatencyModel(0), seed=args.seed)):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+            for kind, artifact_id in (await generate(client, args.questions, args.cvs)).items():
+                results = {name: await fetch(client, artifact_id, args.repeats, headers) for name, headers in variants}
+                # Revalidate the tag of the best encoding, as a browser holding that copy would
+                best = variants[-1][1]
+                etag = (await client.get(f"/api/artifacts/{artifact_id}", headers=best)).headers["etag"]
+                results["304"] = await fetch(client, artifact_id, args.repeats, {**best, "If-None-Match": etag})
+                rows.append((kind, results))
+
+    if not BROTLI_AVAILABLE:
+        print("Brotli is not installed; only gzip is measured", file=sys.stderr)
+    print(f"{'artifact':<17}{'request':<10}{'status':>7}{'encoding':>10}{'bytes':>9}{'saved':>8}{'p50 ms':>9}")
+    for kind, results in rows:
+        plain = results["identity"]["bytes"]
+        for name, result in results.items():
+            saved = f"{1 - result['bytes'] / plain:.0%}"
+            print(f"{kind:<17}{name:<10}{result['status']:>7}{result['encoding']:>10}{result['bytes']:>9}"
+                  f"{saved:>8}{result['ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=10, help="questions in the quiz set")
+    parser.add_argument("--cvs", type=int, default=20, help="CVs in the batch report")
+    parser.add_argument("--repeats", type=int, default=100, help="GETs per artifact and variant")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix="hr-helper-artifacts-") as data_dir:
+        configure_environment(data_dir)
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
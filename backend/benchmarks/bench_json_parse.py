@@ -0,0 +1,67 @@
+"""Microbenchmark: structured-output parsing of multi-KB model responses.
+
+Compares the regex extraction the client used to copy into every method
+(fenced lazy match, then greedy match, then json.loads) with the shared
+bracket-balancing scanner; both validate into CVScreenResponse. "fails"
+means the approach found no usable JSON. Run from backend/:
+
+    python -m benchmarks.bench_json_parse
+"""
+import json
+import re
+import timeit
+from models.schemas import CVScreenResponse
+from services.structured_output import parse_structured
+
+
+def legacy_parse(response: str) -> CVScreenResponse:
+    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
+    if json_match:
+        json_str = json_match.group(1)
+    else:
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        json_str = json_match.group(0) if json_match else response
+    return CVScreenResponse(**json.loads(json_str))
+
+
+def screen_response(kb: int, fenced: bool = True) -> str:
+    """A screening response padded to roughly ``kb`` KB with long list items and prose"""
+    strengths = []
+    while len(json.dumps(strengths)) < kb * 1024 // 2:
+        strengths.append("Shipped {service} APIs in Python with [async] workers and thorough tests")
+    body = json.dumps({
+        "match_score": 81,
+        "strengths": strengths,
+        "gaps": strengths[: len(strengths) // 2],
+        "confidence_level": "High",
+        "confidence_analysis": "Clear, specific writing",
+        "recommendation": "interview",
+    }, indent=2)
+    prose = "Here is my analysis of the candidate {as requested}.\n"
+    return prose + ("```json\n" + body + "\n```" if fenced else body) + "\nLet me know if you need more {detail}."
+
+
+def time_per_call(func, text: str, repeat: int) -> str:
+    try:
+        func(text)
+    except Exception:
+        return "fails"
+    seconds = min(timeit.repeat(lambda: func(text), number=repeat, repeat=3)) / repeat
+    return f"{seconds * 1e6:.0f} us"
+
+
+def main():
+    print(f"{'response':<34} {'size':>9} {'legacy regex':>14} {'scanner':>10}")
+    cases = []
+    for kb in (2, 16, 64):
+        cases.append((f"fenced JSON, {kb} KB", screen_response(kb)))
+        cases.append((f"bare JSON after prose, {kb} KB", screen_response(kb, fenced=False)))
+
+    for label, text in cases:
+        legacy = time_per_call(legacy_parse, text, 50)
+        scanner = time_per_call(lambda t: parse_structured(t, CVScreenResponse), text, 50)
+        print(f"{label:<34} {len(text) / 1024:>6.1f} KB {legacy:>14} {scanner:>10}")
+
+
+if __name__ == "__main__":
+    main()
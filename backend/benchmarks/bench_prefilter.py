@@ -0,0 +1,82 @@
+"""Cost and latency saved by the local pre-filter on a synthetic CV corpus.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_prefilter --cvs 1000 --top-k 100
+
+No network access is needed: LLM latency and price are modelled from the
+command-line assumptions, the pre-filter itself is measured for real.
+"""
+import argparse
+import random
+import time
+from services.prefilter import pre_score, select_for_screening
+
+SKILLS = [
+    "python", "django", "flask", "fastapi", "postgresql", "mysql", "redis", "kafka", "aws", "gcp", "azure",
+    "docker", "kubernetes", "terraform", "java", "spring", "kotlin", "go", "rust", "c++", "c#", "react",
+    "typescript", "node.js", "graphql", "spark", "airflow", "pandas", "pytorch", "tensorflow", "linux",
+    "jenkins", "ansible", "elasticsearch", "mongodb", "rabbitmq", "celery", "grpc", "swift", "figma",
+]
+FILLER = (
+    "Worked closely with product and design to deliver features on schedule. Mentored junior engineers, "
+    "ran code reviews and improved onboarding documentation. Participated in on-call rotations and "
+    "incident reviews. Led sprint planning and stakeholder demos."
+).split(". ")
+REQUIRED = ["python", "django", "postgresql", "aws", "docker", "kubernetes"]
+
+
+def make_corpus(count: int, seed: int) -> tuple:
+    """Synthetic CVs and, for each, whether it truly matches (>= 4 required skills)"""
+    rng = random.Random(seed)
+    cvs, relevant = [], []
+    for i in range(count):
+        skills = rng.sample(SKILLS, rng.randint(5, 12))
+        lines = [f"Candidate {i}", "Skills: " + ", ".join(skills)]
+        for skill in skills[:4]:
+            lines.append(f"Built production services with {skill}. " + rng.choice(FILLER) + ".")
+        lines.extend(rng.sample(FILLER, 2))
+        cvs.append("\n".join(lines))
+        relevant.append(len(set(skills) & set(REQUIRED)) >= 4)
+    return cvs, relevant
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cvs", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=100)
+    parser.add_argument("--min-score", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=6.0, help="seconds per screen call")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent screen calls")
+    parser.add_argument("--tokens-per-call", type=int, default=2500)
+    parser.add_argument("--usd-per-million-tokens", type=float, default=0.10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    cvs, relevant = make_corpus(args.cvs, args.seed)
+    jd = "Senior backend engineer: " + ", ".join(REQUIRED) + ". Experience with CI pipelines and code review."
+
+    start = time.perf_counter()
+    scores = pre_score(jd, cvs)
+    selected = select_for_screening(scores, args.top_k, args.min_score)
+    prefilter_seconds = time.perf_counter() - start
+
+    total_relevant = sum(relevant)
+    kept_relevant = sum(1 for i in selected if relevant[i])
+
+    def llm_wall(calls):
+        return -(-calls // args.concurrency) * args.llm_latency
+
+    def llm_cost(calls):
+        return calls * args.tokens_per_call * args.usd_per_million_tokens / 1_000_000
+
+    print(f"corpus                 {args.cvs} CVs, {total_relevant} truly relevant")
+    print(f"pre-filter time        {prefilter_seconds * 1000:.1f} ms ({prefilter_seconds / args.cvs * 1e6:.0f} us/CV)")
+    print(f"sent to LLM            {len(selected)} of {args.cvs} (top_k={args.top_k}, min_score={args.min_score})")
+    print(f"relevant CVs kept      {kept_relevant} of {total_relevant}")
+    print(f"LLM wall time          {llm_wall(args.cvs):.0f} s -> {llm_wall(len(selected)) + prefilter_seconds:.0f} s")
+    print(f"LLM cost               ${llm_cost(args.cvs):.4f} -> ${llm_cost(len(selected)):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Prompt tokens saved by prompt compaction on a synthetic CV corpus.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_prompt_compaction --cvs 200
+    python -m benchmarks.bench_prompt_compaction --long-every 4 --cv-budget 1500
+
+Every CV is a PDF built from the load-test fixtures with a running header,
+a "Page n of m" footer and, for every ``--long-every``-th candidate, a long
+career history padded with generic filler that takes it over the token
+budget. Each one is parsed the way uploads are, then the screening prompt is
+built twice: from the pages joined as extracted (what was sent before
+compaction) and from the compacted CV and JD. Token counts use the same local
+estimator as batching and the budgets; no model is called.
+"""
+import argparse
+import random
+import time
+from benchmarks.fixtures import JOB_DESCRIPTION, cv_lines, make_pdf
+from services.batching import estimate_tokens
+from services.extraction import _extract
+from services.gemini_client import gemini_client
+from services.prompt_prep import prepare_cv, prepare_jd
+
+FILLER = [
+    "Participated in weekly planning meetings and quarterly reviews with stakeholders",
+    "Coordinated with cross-functional partners to gather requirements and align priorities",
+    "Maintained internal documentation and answered support questions from other departments",
+    "Attended industry conferences and shared notes with the wider organisation",
+]
+PERSONAL = ["Interests", "Chess, trail running, amateur photography and volunteering at the local food bank",
+            "References", "Available on request"]
+
+
+def make_corpus(count: int, long_every: int, lines_per_page: int, seed: int) -> list:
+    """(pdf bytes, page count) per candidate"""
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(count):
+        lines = cv_lines(index, rng)
+        if long_every and index % long_every == 0:
+            history = lines.index("Education")
+            padding = [f"Engineer, Company {rng.randint(1, 500)} ({1960 + job} - {1961 + job})" if n % 5 == 0
+                       else f"- {rng.choice(FILLER)} ({job}.{n})." for job in range(40) for n in range(5)]
+            lines = lines[:history] + padding + lines[history:]
+        lines += PERSONAL
+        chunks = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)]
+        pages = [[f"Candidate {index} - Curriculum Vitae - candidate{index}@example.com", *chunk,
+                  f"Page {number} of {len(chunks)}"] for number, chunk in enumerate(chunks, start=1)]
+        corpus.append((make_pdf(pages), len(pages)))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cvs", type=int, default=200)
+    parser.add_argument("--long-every", type=int, default=5, help="every Nth CV gets a long padded history (0 = none)")
+    parser.add_argument("--lines-per-page", type=int, default=30)
+    parser.add_argument("--cv-budget", type=int, default=3000, help="PROMPT_CV_TOKEN_BUDGET to apply")
+    parser.add_argument("--jd-budget", type=int, default=1500, help="PROMPT_JD_TOKEN_BUDGET to apply")
+    parser.add_argument("--usd-per-million-tokens", type=float, default=0.10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.cvs, args.long_every, args.lines_per_page, args.seed)
+    before = after = over_budget = pages = largest_before = largest_after = 0
+    compaction_seconds = 0.0
+    for pdf, page_count in corpus:
+        document = _extract("pdf", pdf, max_pages=50, time_budget=30)
+        pages += page_count
+        raw = estimate_tokens(gemini_client._screen_prompt("\n".join(document.pages).strip(), JOB_DESCRIPTION))
+
+        start = time.perf_counter()
+        jd = prepare_jd(JOB_DESCRIPTION, args.jd_budget)
+        cv = prepare_cv(document.text, jd.text, args.cv_budget)
+        compaction_seconds += time.perf_counter() - start
+        over_budget += bool(cv.omitted or cv.truncated)
+        compacted = estimate_tokens(gemini_client._screen_prompt(cv.text, jd.text))
+        before, after = before + raw, after + compacted
+        largest_before, largest_after = max(largest_before, raw), max(largest_after, compacted)
+
+    def cost(tokens):
+        return tokens * args.usd_per_million_tokens / 1_000_000
+
+    print(f"corpus                 {args.cvs} CVs, {pages} pages, {over_budget} over the {args.cv_budget}-token budget")
+    print(f"prompt tokens          {before} -> {after} ({1 - after / before:.1%} saved)")
+    print(f"mean per prompt        {before / args.cvs:.0f} -> {after / args.cvs:.0f}")
+    print(f"largest prompt         {largest_before} -> {largest_after}")
+    print(f"compaction time        {compaction_seconds * 1000:.1f} ms ({compaction_seconds / args.cvs * 1e6:.0f} us/CV)")
+    print(f"input cost             ${cost(before):.4f} -> ${cost(after):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Deterministic stand-in for the Gemini backend, for load tests without network access or an API key.
+
+``FakeGeminiModel`` answers every prompt the client builds (JDs, screens,
+batched screens, quizzes, evaluations, audio analyses) with well-formed
+output after a latency drawn from a seeded log-normal distribution, and
+fails a configurable share of calls the way the real API does.
+``install_fake_backend`` swaps it into the ``gemini_client`` singleton.
+"""
+import asyncio
+import contextlib
+import hashlib
+import json
+import math
+import random
+import re
+from types import SimpleNamespace
+from google.api_core import exceptions as google_exceptions
+from services import gemini_client as gemini_module
+from services.cache import ResponseCache, MemoryCacheBackend, SQLiteCacheBackend
+from services.executor import GeminiExecutor
+from services.rate_limit import GeminiLimiter
+
+# z-score of the 95th percentile of a standard normal distribution
+_Z95 = 1.6449
+
+
+class LatencyModel:
+    """Log-normal latency with the given median and 95th percentile, in seconds"""
+
+    def __init__(self, median: float, p95: float = None, rng: random.Random = None):
+        self.median = median
+        self.p95 = p95 if p95 is not None else median
+        self.sigma = math.log(self.p95 / median) / _Z95 if median > 0 and self.p95 > median else 0.0
+        self.rng = rng or random.Random(0)
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(self.sigma * self.rng.gauss(0, 1))
+
+
+class FakeResponse:
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        response_tokens = len(text) // 4 + 1
+        self.usage_metadata = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=response_tokens,
+                                              total_token_count=prompt_tokens + response_tokens)
+
+
+class FakeStreamResponse:
+    """Yields the text in chunks spread over the latency, like a streamed generation"""
+
+    def __init__(self, text: str, latency: float, chunk_size: int = 64):
+        self.chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or [""]
+        self.delay = latency / len(self.chunks)
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(text=chunk)
+
+
+def _stable_int(text: str, low: int, high: int) -> int:
+    """Deterministic number in [low, high] derived from the text"""
+    return low + int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) % (high - low + 1)
+
+
+def _screen(cv_text: str) -> dict:
+    score = _stable_int(cv_text, 20, 95)
+    return {
+        "match_score": score,
+        "strengths": ["Production Python services", "Owns delivery end to end", "Clear written communication"],
+        "gaps": ["Limited Kubernetes exposure", "No formal on-call leadership"],
+        "confidence_level": "High" if score >= 70 else "Medium",
+        "confidence_analysis": "Specific, quantified achievements with consistent tense and structure.",
+        "recommendation": "interview" if score >= 60 else "reject",
+    }
+
+
+def _questions(count: int, offset: int) -> list:
+    topics = ("Python", "Databases", "HTTP", "System design", "Testing")
+    return [{
+        "question": f"Question {offset + i}: how would you approach {topics[(offset + i) % len(topics)].lower()} "
+                    f"trade-offs in a production service?",
+        "answer": "Discuss constraints, measure, pick the simplest design that meets them, and monitor it.",
+        "difficulty": ("easy", "medium", "hard")[(offset + i) % 3],
+        "topic": topics[(offset + i) % len(topics)],
+    } for i in range(count)]
+
+
+AUDIO_ANALYSIS = {
+    "confidence_score": 74, "confidence_level": "Medium", "tone": "Calm",
+    "summary": "Walked through the design of a rate limiter and its failure modes.",
+    "transcription": "I would start with a token bucket per client and then look at how it behaves under bursts.",
+}
+
+JD_TEXT = "**Senior Backend Engineer**\n\n" + "\n".join(
+    f"- Responsibility {i}: design, build and operate reliable services used by recruiting teams."
+    for i in range(1, 25)
+)
+
+
+class FakeGeminiModel:
+    """Answers each kind of prompt the client sends, with seeded latency and error injection"""
+
+    def __init__(self, latency: LatencyModel = None, error_rate: float = 0.0, quota_rate: float = 0.0,
+                 seed: int = 7):
+        self.rng = random.Random(seed)
+        self.latency = latency or LatencyModel(0.0)
+        self.latency.rng = self.rng
+        self.error_rate = error_rate
+        self.quota_rate = quota_rate
+        self.calls = 0
+        self.errors = 0
+        self.questions_generated = 0
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        self.calls += 1
+        delay = self.latency.sample()
+        draw = self.rng.random()
+        if draw < self.quota_rate:
+            self.errors += 1
+            await asyncio.sleep(delay / 10)
+            raise google_exceptions.ResourceExhausted("fake quota exhausted")
+        if draw < self.quota_rate + self.error_rate:
+            self.errors += 1
+            await asyncio.sleep(delay / 10)
+            raise google_exceptions.ServiceUnavailable("fake outage")
+
+        text = self.respond(contents)
+        prompt_tokens = len(contents if isinstance(contents, str) else contents[0]) // 4 + 1
+        if stream:
+            return FakeStreamResponse(text, delay)
+        await asyncio.sleep(delay)
+        return FakeResponse(text, prompt_tokens)
+
+    def respond(self, contents) -> str:
+        if not isinstance(contents, str):
+            return json.dumps(AUDIO_ANALYSIS)
+        if "Candidate CV #" in contents:
+            cvs = re.split(r"Candidate CV #\d+:\n", contents)[1:]
+            return json.dumps([{"index": index, **_screen(cv)} for index, cv in enumerate(cvs)])
+        if "Candidate CV:" in contents:
+            return json.dumps(_screen(contents.split("Candidate CV:", 1)[1]))
+        if "Request #" in contents:
+            counts = [int(count) for count in re.findall(r"Request #\d+: (\d+) questions", contents)]
+            return json.dumps([{"index": index, "questions": self._next_questions(count)}
+                               for index, count in enumerate(counts)])
+        match = re.search(r"Generate (\d+) technical", contents)
+        if match:
+            return json.dumps(self._next_questions(int(match.group(1))))
+        if "Evaluate the following candidate answers" in contents:
+            return json.dumps({"score": 68, "confidence_level": "Medium",
+                               "feedback": "Solid fundamentals; answers could go deeper on trade-offs."})
+        return JD_TEXT
+
+    def _next_questions(self, count: int) -> list:
+        questions = _questions(count, self.questions_generated)
+        self.questions_generated += count
+        return questions
+
+
+class FakeFileStorage:
+    """Stands in for genai.upload_file/delete_file; uploads are read in full, as the real client streams them"""
+
+    def __init__(self):
+        self.uploaded_bytes = 0
+        self.uploads = 0
+        self.deleted = 0
+
+    def upload_file(self, path, mime_type=None):
+        if isinstance(path, str):
+            with open(path, "rb") as f:
+                size = len(f.read())
+        else:
+            size = len(path.read())
+        self.uploads += 1
+        self.uploaded_bytes += size
+        return SimpleNamespace(name=f"files/fake-{self.uploads}")
+
+    def delete_file(self, name):
+        self.deleted += 1
+
+
+@contextlib.asynccontextmanager
+async def install_fake_backend(model: FakeGeminiModel, max_concurrency: int = 64, rpm: int = 1_000_000,
+                         tpm: int = 1_000_000_000, shared=None):
+    """Swap the fake model, fresh executor/limiter/cache and fake file storage into ``gemini_client``.
+
+    With ``shared`` (a SharedState) the limiter and a SQLite response cache are
+    shared with other processes, as under serve.py.
+    """
+    client = gemini_module.gemini_client
+    storage = FakeFileStorage()
+    original = (client._model, client.executor, client.limiter, client.cache, gemini_module.genai.upload_file,
+                gemini_module.genai.delete_file, client.remote_files.delete)
+    client.model = model
+    client.executor = GeminiExecutor(max_workers=max_concurrency)
+    client.limiter = GeminiLimiter(rpm=rpm, tpm=tpm, max_concurrency=max_concurrency, queue_size=max_concurrency * 64,
+                                   backoff_base=0.01, backoff_max=0.1, shared=shared)
+    client.cache = (ResponseCache(SQLiteCacheBackend(), leases=shared) if shared is not None
+                    else ResponseCache(MemoryCacheBackend()))
+    gemini_module.genai.upload_file = storage.upload_file
+    gemini_module.genai.delete_file = storage.delete_file
+    client.remote_files.delete = storage.delete_file
+    try:
+        yield storage
+    finally:
+        await client.remote_files.drain()
+        client.executor.shutdown()
+        (client._model, client.executor, client.limiter, client.cache, gemini_module.genai.upload_file,
+         gemini_module.genai.delete_file, client.remote_files.delete) = original
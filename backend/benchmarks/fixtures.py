@@ -0,0 +1,103 @@
+"""Realistic upload fixtures for load tests: multi-page CV PDFs and DOCX files, and WAV interview answers.
+
+Everything is generated from a seed, so runs are repeatable and the repo
+carries no binary test data.
+"""
+import io
+import math
+import random
+import struct
+import wave
+from docx import Document
+
+SKILLS = ["Python", "FastAPI", "Django", "PostgreSQL", "Redis", "Kafka", "AWS", "GCP", "Docker", "Kubernetes",
+          "Terraform", "React", "TypeScript", "Go", "Java", "Airflow", "Spark", "gRPC", "Celery", "Linux"]
+ACHIEVEMENTS = [
+    "Cut p95 latency of the checkout API from 900 ms to 180 ms by batching database reads",
+    "Migrated 40 services from VMs to Kubernetes with zero customer-facing downtime",
+    "Designed the event pipeline that ingests 2 billion events per day",
+    "Led a team of five engineers delivering the new onboarding flow two weeks early",
+    "Introduced contract tests that halved integration incidents over two quarters",
+    "Built the internal feature-flag service adopted by every product team",
+]
+JOB_DESCRIPTION = (
+    "Senior Backend Engineer. We are looking for an engineer with strong Python, FastAPI and PostgreSQL "
+    "experience who has operated services on AWS with Docker and Kubernetes. You will design APIs, own "
+    "reliability of the screening pipeline and mentor other engineers. Nice to have: Kafka, Redis, Terraform."
+)
+
+
+def cv_lines(index: int, rng: random.Random) -> list:
+    """About 60 lines of CV text for candidate ``index``"""
+    skills = rng.sample(SKILLS, rng.randint(6, 12))
+    lines = [f"Candidate {index}", f"candidate{index}@example.com", "Summary",
+             f"Backend engineer with {rng.randint(2, 15)} years of experience in {', '.join(skills[:3])}.",
+             "Skills: " + ", ".join(skills), "Experience"]
+    for job in range(rng.randint(3, 5)):
+        lines.append(f"Senior Engineer, Company {rng.randint(1, 500)} ({2010 + job * 3} - {2013 + job * 3})")
+        lines.extend(f"- {achievement} using {rng.choice(skills)}." for achievement in rng.sample(ACHIEVEMENTS, 4))
+    lines += ["Education", "BSc Computer Science", "Certifications", "AWS Solutions Architect Associate"]
+    return lines
+
+
+def make_pdf(pages: list) -> bytes:
+    """A valid PDF with one Helvetica text block per page; ``pages`` is a list of line lists"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        text = " T* ".join("(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj"
+                           for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 760 Td {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def make_docx(lines: list) -> bytes:
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_cvs(count: int, seed: int = 7) -> list:
+    """(filename, bytes) pairs, alternating two-page PDFs and DOCX files"""
+    rng = random.Random(seed)
+    cvs = []
+    for index in range(count):
+        lines = cv_lines(index, rng)
+        if index % 2 == 0:
+            half = len(lines) // 2
+            cvs.append((f"candidate-{index}.pdf", make_pdf([lines[:half], lines[half:]])))
+        else:
+            cvs.append((f"candidate-{index}.docx", make_docx(lines)))
+    return cvs
+
+
+def make_wav(seconds: float, sample_rate: int = 16000) -> bytes:
+    """Mono 16-bit speech-band tone of the given length, the size a real recording would be"""
+    frames = int(seconds * sample_rate)
+    samples = (int(8000 * math.sin(2 * math.pi * (180 + 40 * math.sin(i / 4000)) * i / sample_rate))
+               for i in range(frames))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(struct.pack(f"<{frames}h", *samples))
+    return buffer.getvalue()
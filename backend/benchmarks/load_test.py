@@ -0,0 +1,270 @@
+"""Load test of the HTTP endpoints against a deterministic fake Gemini backend.
+
+Run from the backend directory:
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --scenarios cv_screen,audio_analyze --concurrency 32 --latency-p95 2.5
+    python -m benchmarks.load_test --save-baseline benchmarks/baselines/load_test.json
+    python -m benchmarks.load_test --baseline benchmarks/baselines/load_test.json
+
+The app runs in-process behind httpx's ASGI transport with the
+``gemini_client`` singleton swapped for benchmarks.fake_gemini, so no
+network access or API key is needed. Each scenario is driven closed-loop
+at ``--concurrency`` with PDF/DOCX/WAV fixtures, and reports p50/p95/p99
+latency, requests per second, status codes, fake Gemini calls and memory.
+With ``--baseline`` the exit status is 1 when any scenario's p95 rose, or
+its throughput fell, by more than ``--tolerance``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+SCENARIOS = ("jd_generate", "jd_stream", "cv_screen", "cv_batch", "quiz_generate", "quiz_evaluate", "audio_analyze")
+ROLES = ["Backend Engineer", "Frontend Engineer", "Data Engineer", "SRE", "Mobile Engineer"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: object  # index -> (method, url, httpx request kwargs)
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Linearly interpolated percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def build_scenarios(args) -> dict:
+    from benchmarks.fixtures import make_cvs, make_wav, JOB_DESCRIPTION
+
+    cvs = make_cvs(args.cv_fixtures, seed=args.seed)
+    wav = make_wav(args.audio_seconds)
+    headers = {} if args.use_cache else {"Cache-Control": "no-cache"}
+
+    def jd(i, path):
+        return "POST", path, {"headers": headers, "json": {
+            "role": ROLES[i % len(ROLES)], "skills": ["Python", "PostgreSQL", "AWS"], "experience_level": "senior"}}
+
+    def cv_screen(i):
+        filename, data = cvs[i % len(cvs)]
+        return "POST", "/api/cv/screen", {"headers": headers, "data": {"jd_text": JOB_DESCRIPTION},
+                                          "files": {"cv_file": (filename, data, "application/octet-stream")}}
+
+    def cv_batch(i):
+        batch = [cvs[(i * args.batch_size + k) % len(cvs)] for k in range(args.batch_size)]
+        return "POST", "/api/cv/screen/batch", {"headers": headers, "data": {"jd_text": JOB_DESCRIPTION}, "files": [
+            ("cv_files", (filename, data, "application/octet-stream")) for filename, data in batch]}
+
+    def quiz_generate(i):
+        return "POST", "/api/quiz/generate", {"headers": headers, "json": {
+            "role": ROLES[i % len(ROLES)], "skill_level": LEVELS[i % len(LEVELS)], "num_questions": 5}}
+
+    def quiz_evaluate(i):
+        answers = [{"question": f"Question {k}: explain connection pooling", "answer": "Reuse connections " * 20}
+                   for k in range(5)]
+        return "POST", "/api/quiz/evaluate", {"headers": headers, "json": {"answers": answers}}
+
+    def audio_analyze(i):
+        return "POST", "/api/interview/analyze-audio", {"headers": headers,
+                                                        "files": {"file": ("answer.wav", wav, "audio/wav")}}
+
+    builders = {
+        "jd_generate": lambda i: jd(i, "/api/jd/generate"),
+        "jd_stream": lambda i: jd(i, "/api/jd/generate/stream"),
+        "cv_screen": cv_screen,
+        "cv_batch": cv_batch,
+        "quiz_generate": quiz_generate,
+        "quiz_evaluate": quiz_evaluate,
+        "audio_analyze": audio_analyze,
+    }
+    return {name: Scenario(name, builders[name]) for name in args.scenarios}
+
+
+async def drive(client, scenario: Scenario, requests: int, concurrency: int) -> tuple:
+    """Send ``requests`` requests from ``concurrency`` closed-loop workers; returns (latencies, statuses, wall)"""
+    latencies, statuses = [], Counter()
+    indices = iter(range(requests))
+
+    async def worker():
+        # Workers share one iterator, so each index is sent exactly once
+        for index in indices:
+            method, url, kwargs = scenario.build(index)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                statuses[str(response.status_code)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(min(concurrency, requests))])
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def run_load_test(args) -> dict:
+    """Run every selected scenario and return the report as a dict"""
+    from httpx import AsyncClient, ASGITransport
+    from main import app
+    from benchmarks.fake_gemini import FakeGeminiModel, LatencyModel, install_fake_backend
+
+    scenarios = build_scenarios(args)
+    report = {"settings": {key: value for key, value in vars(args).items()
+                           if key in ("requests", "concurrency", "latency_median", "latency_p95", "error_rate",
+                                      "quota_rate", "batch_size", "audio_seconds", "use_cache", "seed")},
+              "scenarios": {}}
+    model = FakeGeminiModel(LatencyModel(args.latency_median, args.latency_p95), error_rate=args.error_rate,
+                            quota_rate=args.quota_rate, seed=args.seed)
+    async with install_fake_backend(model, max_concurrency=args.gemini_concurrency):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+            for scenario in scenarios.values():
+                if args.warmup:
+                    await drive(client, scenario, args.warmup, args.concurrency)
+                calls, rss_before = model.calls, rss_mb()
+                latencies, statuses, wall = await drive(client, scenario, args.requests, args.concurrency)
+                ordered = sorted(latencies)
+                report["scenarios"][scenario.name] = {
+                    "requests": len(latencies),
+                    "ok": sum(count for status, count in statuses.items() if status.startswith("2")),
+                    "statuses": dict(statuses),
+                    "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+                    "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+                    "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+                    "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+                    "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+                    "max_ms": round(ordered[-1] * 1000, 2),
+                    "gemini_calls": model.calls - calls,
+                    "rss_mb": round(rss_mb(), 1),
+                    "rss_growth_mb": round(rss_mb() - rss_before, 1),
+                }
+    report["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Scenarios whose p95 rose or whose throughput fell by more than ``tolerance``, as messages"""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['rps']} -> {current['rps']} req/s")
+    return regressions
+
+
+def print_report(report: dict, baseline: dict = None):
+    header = f"{'scenario':<15} {'ok':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls':>7} {'rss MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in report["scenarios"].items():
+        print(f"{name:<15} {row['ok']:>4}/{row['requests']:<4} {row['rps']:>8.1f} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['gemini_calls']:>7} {row['rss_mb']:>8.1f}")
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            print(f"{'  vs baseline':<15} {'':>9} {_change(previous['rps'], row['rps']):>8} {'':>9} "
+                  f"{_change(previous['p95_ms'], row['p95_ms']):>9}")
+    print(f"peak RSS {report['peak_rss_mb']} MB")
+
+
+def _change(before: float, after: float) -> str:
+    return f"{(after - before) / before * 100:+.0f}%" if before else "n/a"
+
+
+def configure_environment(data_dir: str):
+    """Point every on-disk store at a scratch directory and satisfy the client's API key check"""
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ["DOCUMENT_STORE_DIR"] = os.path.join(data_dir, "documents")
+    os.environ["JOB_STORE_DIR"] = os.path.join(data_dir, "jobs")
+    os.environ["QUIZ_BANK_PATH"] = os.path.join(data_dir, "question_bank.sqlite3")
+    os.environ["RESPONSE_CACHE_SQLITE_PATH"] = os.path.join(data_dir, "response_cache.sqlite3")
+    os.environ["ARTIFACT_STORE_PATH"] = os.path.join(data_dir, "artifacts.sqlite3")
+
+
+def parse_args(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--gemini-concurrency", type=int, default=64, help="limiter cap on concurrent model calls")
+    parser.add_argument("--latency-median", type=float, default=0.05, help="fake model median latency, seconds")
+    parser.add_argument("--latency-p95", type=float, default=0.15, help="fake model 95th percentile latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls failing with 503")
+    parser.add_argument("--quota-rate", type=float, default=0.0, help="share of calls failing with 429")
+    parser.add_argument("--batch-size", type=int, default=10, help="CVs per /screen/batch request")
+    parser.add_argument("--cv-fixtures", type=int, default=40, help="distinct CV files to cycle through")
+    parser.add_argument("--audio-seconds", type=float, default=30, help="length of the WAV fixture")
+    parser.add_argument("--use-cache", action="store_true", help="allow response cache hits (default: no-cache)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="compare against a report saved with --save-baseline")
+    parser.add_argument("--save-baseline", help="write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="hr-helper-bench-") as data_dir:
+        configure_environment(data_dir)
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        report = asyncio.run(run_load_test(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != report["settings"]:
+            print("warning: baseline was recorded with different settings", file=sys.stderr)
+    print_report(report, baseline)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Throughput of the CV screening path with 1..N worker processes sharing one SharedState.
+
+Run from the backend directory:
+
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --workers 1,2,4,8 --requests 100
+
+Each worker process runs the app in-process behind the fake Gemini backend
+(zero model latency by default), with its rate limiter, SQLite response
+cache and in-flight leases shared through one file, as under serve.py.
+Documents are parsed inline (EXTRACTION_WORKERS=0), so a worker uses one
+core, and every request carries a distinct CV, so each one is parsed and
+screened rather than served from the cache or document store. All workers
+start together behind a barrier; the report gives aggregate requests per
+second for each worker count and the scaling efficiency against one worker
+(1.0 is perfectly linear). Efficiency is only meaningful up to the number of
+cores the host actually has.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker_environment(data_dir: str, workers: int) -> dict:
+    return {
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY") or "offline-benchmark",
+        "WEB_CONCURRENCY": str(workers),
+        "SHARED_STATE_PATH": os.path.join(data_dir, "shared_state.sqlite3"),
+        "RESPONSE_CACHE_BACKEND": "sqlite",
+        "RESPONSE_CACHE_SQLITE_PATH": os.path.join(data_dir, "response_cache.sqlite3"),
+        "DOCUMENT_STORE_DIR": os.path.join(data_dir, "documents"),
+        "JOB_STORE_DIR": os.path.join(data_dir, "jobs"),
+        "QUIZ_BANK_PATH": os.path.join(data_dir, "question_bank.sqlite3"),
+        "ARTIFACT_STORE_PATH": os.path.join(data_dir, "artifacts.sqlite3"),
+        "QUIZ_BANK_ENABLED": "false",
+        "EXTRACTION_WORKERS": "0",
+    }
+
+
+async def _serve(index: int, args, barrier, results):
+    from httpx import AsyncClient, ASGITransport
+    from main import app
+    from benchmarks.fake_gemini import FakeGeminiModel, LatencyModel, install_fake_backend
+    from benchmarks.fixtures import make_cvs, JOB_DESCRIPTION
+    from benchmarks.load_test import drive, Scenario
+    from services.shared_state import shared_state
+
+    # Seeded per worker, so no two requests anywhere in the run carry the same CV
+    cvs = make_cvs(args.requests + args.warmup, seed=args.seed * 1000 + index)
+
+    def cv_screen(i):
+        filename, data = cvs[i]
+        return "POST", "/api/cv/screen", {"data": {"jd_text": JOB_DESCRIPTION},
+                                          "files": {"cv_file": (filename, data, "application/octet-stream")}}
+
+    model = FakeGeminiModel(LatencyModel(args.latency_median, args.latency_p95), seed=args.seed + index)
+    async with install_fake_backend(model, max_concurrency=args.concurrency, shared=shared_state):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+            # Imports, parser warm-up and SQLite schema creation stay outside the measured window
+            await drive(client, Scenario("warmup", lambda i: cv_screen(args.requests + i)), args.warmup,
+                        args.concurrency)
+            await asyncio.to_thread(barrier.wait)
+            started = time.time()
+            latencies, statuses, _ = await drive(client, Scenario("cv_screen", cv_screen), args.requests,
+                                                 args.concurrency)
+            finished = time.time()
+    results.put({"started": started, "finished": finished, "requests": len(latencies),
+                 "ok": sum(count for status, count in statuses.items() if status.startswith("2")),
+                 "statuses": dict(statuses)})
+
+
+def _worker(index: int, args, environment: dict, barrier, results):
+    os.environ.update(environment)
+    sys.path.insert(0, BACKEND_DIR)
+    try:
+        asyncio.run(_serve(index, args, barrier, results))
+    except BaseException as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        raise
+
+
+def measure(workers: int, args) -> dict:
+    """Run ``workers`` processes at once and return their aggregate throughput"""
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="hr-helper-scaling-") as data_dir:
+        environment = worker_environment(data_dir, workers)
+        barrier, results = context.Barrier(workers), context.Queue()
+        processes = [context.Process(target=_worker, args=(index, args, environment, barrier, results))
+                     for index in range(workers)]
+        for process in processes:
+            process.start()
+        outcomes = [results.get(timeout=args.timeout) for _ in processes]
+        for process in processes:
+            process.join()
+
+    errors = [outcome["error"] for outcome in outcomes if "error" in outcome]
+    if errors:
+        raise RuntimeError(f"worker failed: {errors[0]}")
+    wall = max(outcome["finished"] for outcome in outcomes) - min(outcome["started"] for outcome in outcomes)
+    requests = sum(outcome["requests"] for outcome in outcomes)
+    return {
+        "workers": workers,
+        "requests": requests,
+        "ok": sum(outcome["ok"] for outcome in outcomes),
+        "wall_seconds": round(wall, 3),
+        "rps": round(requests / wall, 2) if wall else 0.0,
+    }
+
+
+def run_scaling(args) -> dict:
+    rows = [measure(workers, args) for workers in args.workers]
+    single = next((row["rps"] for row in rows if row["workers"] == 1), None)
+    for row in rows:
+        row["speedup"] = round(row["rps"] / single, 2) if single else None
+        row["efficiency"] = round(row["speedup"] / row["workers"], 2) if single else None
+    return {"cores": os.cpu_count(), "settings": {"requests": args.requests, "concurrency": args.concurrency,
+                                                  "latency_median": args.latency_median}, "runs": rows}
+
+
+def print_report(report: dict):
+    header = f"{'workers':>7} {'ok':>11} {'req/s':>9} {'speedup':>8} {'efficiency':>10}"
+    print(f"{report['cores']} core(s) available")
+    print(header)
+    print("-" * len(header))
+    for row in report["runs"]:
+        print(f"{row['workers']:>7} {row['ok']:>5}/{row['requests']:<5} {row['rps']:>9.1f} "
+              f"{row['speedup'] or 0:>8.2f} {row['efficiency'] or 0:>10.2f}")
+
+
+def parse_args(argv: list = None):
+    default_workers = sorted({1, 2, 4, os.cpu_count() or 1})
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=lambda value: [int(n) for n in value.split(",")], default=default_workers,
+                        help="comma-separated worker counts to measure (include 1 for speedup figures)")
+    parser.add_argument("--requests", type=int, default=60, help="measured requests per worker process")
+    parser.add_argument("--warmup", type=int, default=4, help="unmeasured requests per worker process")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent clients per worker process")
+    parser.add_argument("--latency-median", type=float, default=0.0, help="fake model median latency, seconds")
+    parser.add_argument("--latency-p95", type=float, default=None, help="fake model 95th percentile latency")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for each worker")
+    parser.add_argument("--output", help="write the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    report = run_scaling(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
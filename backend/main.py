@@ -1,11 +1,60 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from routers import jd_generator, cv_screener, tech_quiz, live_interview
+import time
+_import_started = time.perf_counter()
+
+import logging  # noqa: E402
+from contextlib import asynccontextmanager  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+
+# Before any service module is imported, since they read their settings from the environment at import time
+load_dotenv()
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.responses import JSONResponse, PlainTextResponse  # noqa: E402
+from routers import jd_generator, cv_screener, tech_quiz, live_interview, jobs, admin, artifacts  # noqa: E402
+from services.errors import ServiceError, ClientDisconnected  # noqa: E402
+from services.extraction import document_extractor  # noqa: E402
+from services.gemini_client import gemini_client  # noqa: E402
+from services.jobs import job_queue  # noqa: E402
+from services.question_bank import question_bank, QUIZ_BANK_ENABLED  # noqa: E402
+from services.metrics import metrics, MetricsMiddleware, PROMETHEUS_MEDIA_TYPE  # noqa: E402
+from services.compression import CompressionMiddleware  # noqa: E402
+from services.startup import startup_state  # noqa: E402
+from services.shared_state import WEB_CONCURRENCY  # noqa: E402
+
+logger = logging.getLogger("uvicorn.error")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # Under serve.py the launcher requeues interrupted jobs once, before any worker process starts
+    job_queue.start(recover=WEB_CONCURRENCY <= 1)
+    if QUIZ_BANK_ENABLED:
+        # Fill the bank for the popular roles in the background; startup does not wait for it
+        question_bank.warm_up(gemini_client.generate_tech_questions)
+    # With STARTUP_PREWARM the SDK and parser imports happen now, in the background, instead of on first use
+    startup_state.start_prewarm(gemini_client.warm_up, document_extractor.warm_up)
+    startup_state.started = True
+    startup_state.startup_seconds = round(time.perf_counter() - started, 4)
+    logger.info("Startup took %.3fs (imports %.3fs, lifespan %.3fs)",
+                startup_state.import_seconds + startup_state.startup_seconds,
+                startup_state.import_seconds, startup_state.startup_seconds)
+    yield
+    startup_state.started = False
+    await startup_state.stop()
+    await question_bank.stop()
+    # Jobs still running are put back in the queue and picked up on the next start
+    await job_queue.stop()
+    # Let background deletions of uploaded recordings finish before the pool goes away
+    await gemini_client.remote_files.drain()
+    document_extractor.shutdown()
+    gemini_client.executor.shutdown()
 
 app = FastAPI(
     title="HR Helper API",
     description="AI-powered recruitment assistant using Google Gemini",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration for Next.js frontend
@@ -15,13 +64,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend read artifact ETags for its conditional re-fetches
+    expose_headers=["ETag"],
 )
+# Added before MetricsMiddleware, which wraps it, so request latency includes compression time
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+def _service_gauges() -> dict:
+    limiter, cache, jobs_stats = gemini_client.limiter.stats(), gemini_client.cache.stats(), job_queue.stats()
+    return {
+        ("hr_helper_gemini_in_flight", "Gemini calls currently running"): limiter["in_flight"],
+        ("hr_helper_gemini_waiting", "Gemini calls waiting for admission"): limiter["waiting"],
+        ("hr_helper_gemini_retries", "Gemini calls retried after quota or transient errors"): limiter["retries"],
+        ("hr_helper_gemini_rejected", "Gemini calls rejected by the admission queue"): limiter["rejected"],
+        ("hr_helper_response_cache_hits", "Response cache hits"): cache["hits"],
+        ("hr_helper_response_cache_misses", "Response cache misses"): cache["misses"],
+        ("hr_helper_jobs_queued", "Background jobs waiting for a worker"): jobs_stats["queued"],
+        ("hr_helper_jobs_running", "Background jobs running"): jobs_stats["running"],
+        ("hr_helper_import_seconds", "Time spent importing the app"): startup_state.import_seconds or 0,
+        ("hr_helper_startup_seconds", "Time spent in lifespan startup"): startup_state.startup_seconds or 0,
+        ("hr_helper_ready", "1 when /ready reports the app ready for traffic"): int(startup_state.ready),
+    }
+
+metrics.register_collector(_service_gauges)
+
+@app.exception_handler(ServiceError)
+async def service_error_handler(request: Request, exc: ServiceError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)}, headers=exc.headers)
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Nobody is listening any more; 499 mirrors nginx's "client closed request"
+    return JSONResponse(status_code=499, content={"detail": str(exc)})
 
 # Include routers
 app.include_router(jd_generator.router, prefix="/api/jd", tags=["Job Description"])
 app.include_router(cv_screener.router, prefix="/api/cv", tags=["CV Screening"])
 app.include_router(tech_quiz.router, prefix="/api/quiz", tags=["Technical Quiz"])
 app.include_router(live_interview.router, prefix="/api/interview", tags=["Live Interview"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(artifacts.router, prefix="/api/artifacts", tags=["Artifacts"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 @app.get("/")
 async def root():
@@ -31,6 +115,18 @@ async def root():
         "docs": "/docs"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    """503 until startup (and any pre-warm) has finished and an API key is configured; reports startup timings"""
+    report = startup_state.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+startup_state.import_seconds = round(time.perf_counter() - _import_started, 4)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from typing import List, Optional
 
 # JD Generator Models
@@ -11,6 +11,31 @@ class JDRequest(BaseModel):
 class JDResponse(BaseModel):
     job_description: str
     title: str
+    artifact_id: Optional[str] = None  # GET /api/artifacts/{artifact_id} returns it again
+
+# JD Profile Models
+class JDProfileRequest(BaseModel):
+    # Also accepts a /api/jd/generate response as is
+    jd_text: str = Field(validation_alias=AliasChoices("jd_text", "job_description"))
+    title: Optional[str] = None
+
+class JDRequirements(BaseModel):
+    title: str
+    seniority: str  # "entry", "mid", "senior", "lead"
+    min_years_experience: Optional[int] = None
+    must_haves: List[str]
+    skills: List[str]
+    nice_to_haves: List[str] = []
+    responsibilities: List[str] = []
+
+class JDProfile(BaseModel):
+    id: str  # content hash of the JD text
+    requirements: JDRequirements
+    compact_text: str  # what screening prompts carry instead of the full JD
+    terms: List[str]  # pre-score query terms, requirement terms first and repeated as a weight
+    jd_tokens: int
+    compact_tokens: int
+    created_at: float
 
 # CV Screener Models
 class CVScreenRequest(BaseModel):
@@ -24,6 +49,7 @@ class CVScreenResponse(BaseModel):
     confidence_level: str  # "High", "Medium", "Low"
     confidence_analysis: str
     recommendation: str
+    pre_score: Optional[float] = None  # 0-100 local keyword relevance, computed before the LLM call
 
 # Tech Quiz Models
 class QuizRequest(BaseModel):
@@ -39,6 +65,7 @@ class Question(BaseModel):
 
 class QuizResponse(BaseModel):
     questions: List[Question]
+    artifact_id: Optional[str] = None
 
 class UserAnswer(BaseModel):
     question: str
@@ -52,9 +79,58 @@ class QuizEvaluationResponse(BaseModel):
     confidence_level: str  # "High", "Medium", "Low"
     feedback: str
 
+class AudioTimelineEntry(BaseModel):
+    start_seconds: float
+    end_seconds: float
+    confidence_score: Optional[int] = None
+    confidence_level: Optional[str] = None
+    tone: Optional[str] = None
+    summary: Optional[str] = None
+    attempts: int = 1
+    error: Optional[str] = None  # the segment still failed after its retries and is left out of the merge
+
 class AudioAnalysisResponse(BaseModel):
     confidence_score: int  # 0-100
     confidence_level: str  # "High", "Medium", "Low"
     tone: str  # e.g., "Calm", "Nervous"
     summary: str
     transcription: str
+    timeline: Optional[List[AudioTimelineEntry]] = None  # per-segment results when analyzed in chunks
+
+# Batch CV Screening Models
+class CVBatchItem(BaseModel):
+    index: int
+    filename: str
+    pre_score: Optional[float] = None
+    skipped: bool = False  # filtered out by the pre-score stage, never sent to the LLM
+    result: Optional[CVScreenResponse] = None
+    error: Optional[str] = None
+
+class CVBatchRankingEntry(BaseModel):
+    rank: int
+    index: int
+    filename: str
+    match_score: int
+    recommendation: str
+
+class CVBatchSummary(BaseModel):
+    total: int
+    screened: int
+    skipped: int
+    failed: int
+    ranking: List[CVBatchRankingEntry]
+    artifact_id: Optional[str] = None  # the stored report: every item plus this summary
+
+# Background Job Models
+class JobResponse(BaseModel):
+    id: str
+    kind: str  # "cv_screen_batch", "audio_analysis"
+    status: str  # "queued", "running", "succeeded", "failed"
+    progress: float  # 0-1
+    detail: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
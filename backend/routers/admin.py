@@ -0,0 +1,94 @@
+import asyncio
+from fastapi import APIRouter
+from services.gemini_client import gemini_client
+from services.document_store import document_store
+from services.audio_ingest import audio_metrics
+from services.live_session import live_sessions
+from services.jobs import job_queue
+from services.question_bank import question_bank
+from services.shared_state import shared_state
+from services.prompt_prep import prompt_compactor
+from services.jd_profiles import jd_profile_store
+from services.artifacts import artifact_store
+
+router = APIRouter()
+
+@router.get("/cache")
+async def cache_stats():
+    """Report response cache size and hit/miss counters"""
+    return gemini_client.cache.stats()
+
+@router.delete("/cache")
+async def clear_cache():
+    """Drop every cached model response"""
+    gemini_client.cache.clear()
+    return gemini_client.cache.stats()
+
+@router.get("/store")
+async def store_stats():
+    """Report document store size and hit ratios"""
+    return document_store.stats()
+
+@router.post("/store/prune")
+async def prune_store():
+    """Apply the retention policy now instead of waiting for the next upload"""
+    removed = await asyncio.to_thread(document_store.enforce_retention)
+    return {"removed": removed, **document_store.stats()}
+
+@router.get("/jd-profiles")
+async def jd_profile_stats():
+    """Report stored JD profiles, how often screens referenced them and the in-memory hit ratio"""
+    return jd_profile_store.stats()
+
+@router.get("/artifacts")
+async def artifact_stats():
+    """Report stored artifacts and bytes per kind, and how often GETs found them"""
+    return artifact_store.stats()
+
+@router.get("/batching")
+async def batching_stats():
+    """Report micro-batch sizes and queueing delay for screening and quiz generation"""
+    return {
+        "enabled": gemini_client.batching,
+        "screen": gemini_client.screen_batcher.stats(),
+        "quiz": gemini_client.quiz_batcher.stats(),
+    }
+
+@router.get("/models")
+async def model_stats():
+    """Report each task's route and per-model latency, failures, fallbacks, tokens and estimated cost"""
+    return gemini_client.router.stats()
+
+@router.get("/prompts")
+async def prompt_stats():
+    """Report CV and JD tokens before and after prompt compaction, and how often inputs exceeded their budget"""
+    return prompt_compactor.stats()
+
+@router.get("/limiter")
+async def limiter_stats():
+    """Report Gemini admission queue depth, rejections and retries"""
+    return gemini_client.limiter.stats()
+
+@router.get("/audio")
+async def audio_stats():
+    """Report audio upload throughput, analysis latency and pending remote file deletions"""
+    return {
+        **audio_metrics.stats(),
+        "remote_files": gemini_client.remote_files.stats(),
+        "live_sessions": live_sessions.stats(),
+    }
+
+@router.get("/jobs")
+async def job_stats():
+    """Report job counts by status and the number of running workers"""
+    return job_queue.stats()
+
+@router.get("/quiz-bank")
+async def quiz_bank_stats():
+    """Report banked questions per role and level, bank hit ratio and background refills"""
+    return question_bank.stats()
+
+@router.get("/workers")
+async def worker_stats():
+    """Report the worker processes' shared state: quota bucket levels and in-flight call leases"""
+    return shared_state.stats()
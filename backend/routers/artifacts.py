@@ -0,0 +1,22 @@
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Response
+from services.artifacts import artifact_store, matching_etag, ARTIFACT_CACHE_CONTROL
+
+router = APIRouter()
+
+@router.get("/{artifact_id}")
+async def get_artifact(artifact_id: str, if_none_match: Optional[str] = Header(None)):
+    """Return a generated JD, quiz or batch screening report by the ``artifact_id`` its endpoint returned.
+
+    The response carries a strong ETag; a request whose If-None-Match holds it
+    gets an empty 304 instead of the body.
+    """
+    artifact = artifact_store.get(artifact_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    headers = {"ETag": artifact.etag, "Cache-Control": ARTIFACT_CACHE_CONTROL, "X-Artifact-Kind": artifact.kind}
+    matched = matching_etag(if_none_match, artifact.etag)
+    if matched:
+        # Echo the tag the client holds, which may be that of the compressed representation
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+    return Response(artifact.body, media_type="application/json", headers=headers)
@@ -1,32 +1,257 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from models.schemas import CVScreenResponse
+import asyncio
+import contextlib
+import os
+import zipfile
+from io import BytesIO
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from models.schemas import CVScreenResponse, CVBatchItem, CVBatchRankingEntry, CVBatchSummary
 from services.gemini_client import gemini_client
-from services.pdf_parser import extract_text_from_pdf
-from services.docx_parser import extract_text_from_docx
+from services.model_router import SCREEN
+from services.extraction import document_extractor, document_kind
+from services.document_store import document_store, sha256_bytes, hash_text
+from services.prefilter import pre_score, select_for_screening, PREFILTER_TOP_K, PREFILTER_MIN_SCORE
+from services.jd_profiles import jd_profile_store
+from services.artifacts import artifact_store
+from services.errors import ServiceError, ClientDisconnected
+from services.executor import cancel_on_disconnect
+from services.cache import cache_bypassed
+from services.streaming import wants_sse, encode_event, SSE_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+from services.metrics import stage
+
+CV_BATCH_CONCURRENCY = int(os.getenv("CV_BATCH_CONCURRENCY", "8"))
+CV_BATCH_MAX_FILES = int(os.getenv("CV_BATCH_MAX_FILES", "500"))
 
 router = APIRouter()
 
+def resolve_jd(jd_text: Optional[str], jd_profile_id: Optional[str]) -> tuple:
+    """(JD text for the prompt, pre-score terms or None) from a raw ``jd_text`` or a stored JD profile"""
+    if jd_text and jd_profile_id:
+        raise HTTPException(status_code=400, detail="Send either jd_text or jd_profile_id, not both")
+    if jd_profile_id:
+        profile = jd_profile_store.get(jd_profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="JD profile not found")
+        return profile.compact_text, profile.terms
+    if not jd_text:
+        raise HTTPException(status_code=400, detail="Send jd_text or a jd_profile_id from /api/jd/profiles")
+    return jd_text, None
+
+async def _load_document(filename: str, file_bytes: bytes) -> tuple:
+    """(sha256, ExtractedDocument) for an upload; resubmitted resumes skip parsing entirely"""
+    document_kind(filename)
+    sha256 = sha256_bytes(file_bytes)
+    # The store blocks on SQLite and the disk, so it is called on a thread
+    document = await asyncio.to_thread(document_store.get_document, sha256)
+    if document is None:
+        document = await document_extractor.extract(filename, file_bytes)
+        await asyncio.to_thread(document_store.put_document, sha256, filename, len(file_bytes), document)
+    return sha256, document
+
+async def _screen_document(sha256: str, cv_text: str, jd_text: str, use_cache: bool) -> CVScreenResponse:
+    """Screen extracted CV text with Gemini, reusing any prior screen of the same bytes against this JD"""
+    jd_hash = hash_text(jd_text)
+    model = gemini_client.model_name_for(SCREEN)
+    if use_cache:
+        cached = await asyncio.to_thread(document_store.get_screen, sha256, jd_hash, model)
+        if cached is not None:
+            return CVScreenResponse(**cached)
+
+    result = await gemini_client.screen_cv(cv_text, jd_text, use_cache=use_cache)
+    await asyncio.to_thread(document_store.put_screen, sha256, jd_hash, model, result.model_dump(exclude={"pre_score"}))
+    return result
+
+async def _screen_upload(filename: str, file_bytes: bytes, jd_text: str, terms: Optional[list],
+                         use_cache: bool) -> CVScreenResponse:
+    sha256, document = await _load_document(filename, file_bytes)
+    result = await _screen_document(sha256, document.text, jd_text, use_cache)
+    result.pre_score = pre_score(jd_text, [document.text], terms, [document.term_counts])[0]
+    return result
+
 @router.post("/screen", response_model=CVScreenResponse)
 async def screen_cv(
+    http_request: Request,
     cv_file: UploadFile = File(...),
-    jd_text: str = Form(...)
+    jd_text: Optional[str] = Form(None),
+    jd_profile_id: Optional[str] = Form(None)
 ):
-    """Screen a CV against a job description"""
+    """Screen a CV against a job description, sent as ``jd_text`` or as a ``jd_profile_id`` from /api/jd/profiles"""
     try:
+        jd_text, terms = resolve_jd(jd_text, jd_profile_id)
+
         # Read file bytes
-        file_bytes = await cv_file.read()
-        
-        # Extract text based on file type
-        if cv_file.filename.endswith('.pdf'):
-            cv_text = extract_text_from_pdf(file_bytes)
-        elif cv_file.filename.endswith('.docx'):
-            cv_text = extract_text_from_docx(file_bytes)
-        else:
-            raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+        with stage("upload_read"):
+            file_bytes = await cv_file.read()
         
-        # Screen CV using Gemini
-        result = await gemini_client.screen_cv(cv_text, jd_text)
-        
-        return CVScreenResponse(**result)
+        # Extract text and screen CV using Gemini, reusing stored results for resubmissions
+        return await cancel_on_disconnect(http_request, _screen_upload(
+            cv_file.filename, file_bytes, jd_text, terms, use_cache=not cache_bypassed(http_request.headers)
+        ))
+    except (HTTPException, ServiceError, ClientDisconnected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def iter_archive(file):
+    """Yield (filename, readable member or None past the size limit) for every PDF/DOCX member of a zip archive"""
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Archive is not a valid zip file")
+
+    with archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or info.filename.startswith("__MACOSX/") or not name.lower().endswith(('.pdf', '.docx')):
+                continue
+            # Checked against the declared size so a zip bomb is never inflated
+            if info.file_size > document_extractor.max_bytes:
+                yield name, None
+                continue
+            with archive.open(info) as member:
+                yield name, member
+
+def _unpack_archive(archive_bytes: bytes) -> list:
+    """List (filename, bytes) for every PDF/DOCX member of a zip archive"""
+    return [(name, member.read() if member is not None else None)
+            for name, member in iter_archive(BytesIO(archive_bytes))]
+
+async def _load_batch_item(index: int, filename: str, file_bytes: Optional[bytes], semaphore: asyncio.Semaphore):
+    """Parse one CV of a batch; a failure becomes an error item instead of aborting the batch"""
+    try:
+        if file_bytes is None:
+            raise ValueError(f"File exceeds the {document_extractor.max_bytes} byte limit")
+        async with semaphore:
+            return await _load_document(filename, file_bytes)
+    except Exception as e:
+        return CVBatchItem(index=index, filename=filename, error=str(e))
+
+async def _screen_batch_item(item: CVBatchItem, sha256: str, cv_text: str, jd_text: str,
+                             use_cache: bool, semaphore: asyncio.Semaphore) -> CVBatchItem:
+    """Screen one parsed CV; failures are reported on the item instead of raised"""
+    try:
+        async with semaphore:
+            item.result = await _screen_document(sha256, cv_text, jd_text, use_cache)
+        item.result.pre_score = item.pre_score
+    except Exception as e:
+        item.error = str(e)
+    return item
+
+def _rank(items: list) -> CVBatchSummary:
+    screened = sorted((item for item in items if item.result is not None),
+                      key=lambda item: (-item.result.match_score, item.index))
+    ranking = [
+        CVBatchRankingEntry(
+            rank=rank,
+            index=item.index,
+            filename=item.filename,
+            match_score=item.result.match_score,
+            recommendation=item.result.recommendation,
+        )
+        for rank, item in enumerate(screened, start=1)
+    ]
+    skipped = sum(1 for item in items if item.skipped)
+    return CVBatchSummary(total=len(items), screened=len(screened), skipped=skipped,
+                          failed=len(items) - len(screened) - skipped, ranking=ranking)
+
+async def screen_batch_events(documents: list, jd_text: str, use_cache: bool, top_k: int, min_pre_score: float,
+                              terms: list = None):
+    """Screen (filename, bytes) pairs against one JD: a ("result", CVBatchItem) per CV, then ("summary", ...)
+
+    ``terms`` are a JD profile's precomputed pre-score terms.
+    """
+    # Parse the whole batch so it can be pre-scored as one corpus, no more CVs at a time than there are workers
+    parsing = asyncio.Semaphore(max(document_extractor.workers, 1))
+    loaded = await asyncio.gather(*[
+        _load_batch_item(index, filename, file_bytes, parsing)
+        for index, (filename, file_bytes) in enumerate(documents)
+    ])
+    items, parsed = [], []
+    for index, outcome in enumerate(loaded):
+        if isinstance(outcome, CVBatchItem):
+            items.append(outcome)
+            yield "result", outcome
+        else:
+            parsed.append((CVBatchItem(index=index, filename=documents[index][0]), *outcome))
+
+    extracted = [document for _, _, document in parsed]
+    scores = pre_score(jd_text, [document.text for document in extracted], terms,
+                       [document.term_counts for document in extracted])
+    selected = select_for_screening(scores, top_k, min_pre_score)
+    semaphore = asyncio.Semaphore(CV_BATCH_CONCURRENCY)
+    tasks = []
+    for position, (item, sha256, document) in enumerate(parsed):
+        item.pre_score = scores[position]
+        if position in selected:
+            tasks.append(asyncio.create_task(
+                _screen_batch_item(item, sha256, document.text, jd_text, use_cache, semaphore)
+            ))
+        else:
+            item.skipped = True
+            items.append(item)
+            yield "result", item
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            items.append(item)
+            yield "result", item
+        summary = _rank(items)
+        # The whole report is stored so the frontend can re-fetch it by id instead of rerunning the batch
+        summary.artifact_id = artifact_store.put("cv_batch_report", {
+            "items": [item.model_dump() for item in sorted(items, key=lambda item: item.index)],
+            "summary": summary.model_dump(exclude={"artifact_id"}),
+        })
+        yield "summary", summary
+    finally:
+        # The consumer went away mid-batch; stop screening the rest
+        for task in tasks:
+            task.cancel()
+
+async def read_batch_uploads(cv_files: Optional[list], archive: Optional[UploadFile]) -> list:
+    """(filename, bytes) for every uploaded CV and archive member, within the batch size limit"""
+    with stage("upload_read"):
+        documents = [(f.filename, await f.read()) for f in cv_files or []]
+        if archive is not None:
+            documents.extend(_unpack_archive(await archive.read()))
+    if not documents:
+        raise HTTPException(status_code=400, detail="Upload at least one PDF/DOCX file or a zip archive")
+    if len(documents) > CV_BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"A batch may contain at most {CV_BATCH_MAX_FILES} CVs")
+    return documents
+
+@router.post("/screen/batch")
+async def screen_cv_batch(
+    http_request: Request,
+    jd_text: Optional[str] = Form(None),
+    jd_profile_id: Optional[str] = Form(None),
+    cv_files: List[UploadFile] = File(None),
+    archive: UploadFile = File(None),
+    top_k: Optional[int] = Form(None),
+    min_pre_score: Optional[float] = Form(None)
+):
+    """Screen many CVs (files and/or a zip archive) against one JD, sent as ``jd_text`` or a ``jd_profile_id``.
+
+    Every CV is parsed and given a local keyword ``pre_score`` first; only the
+    ``top_k`` best at or above ``min_pre_score`` go on to the LLM screen.
+    Results stream back as NDJSON, or as Server-Sent Events when the client
+    sends ``Accept: text/event-stream``: one ``result`` event per CV in
+    completion order, then a ``summary`` event ranking them by match score.
+    """
+    jd_text, terms = resolve_jd(jd_text, jd_profile_id)
+    documents = await read_batch_uploads(cv_files, archive)
+    sse = wants_sse(http_request.headers)
+    events = screen_batch_events(
+        documents, jd_text, use_cache=not cache_bypassed(http_request.headers),
+        top_k=PREFILTER_TOP_K if top_k is None else top_k,
+        min_pre_score=PREFILTER_MIN_SCORE if min_pre_score is None else min_pre_score,
+        terms=terms,
+    )
+
+    async def stream():
+        async with contextlib.aclosing(events):
+            async for event, payload in events:
+                yield encode_event(event, payload.model_dump(), sse)
+
+    return StreamingResponse(stream(), media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE)
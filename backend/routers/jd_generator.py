@@ -1,19 +1,89 @@
-from fastapi import APIRouter, HTTPException
-from models.schemas import JDRequest, JDResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from models.schemas import JDRequest, JDResponse, JDProfileRequest, JDProfile
 from services.gemini_client import gemini_client
+from services.jd_profiles import jd_profile_store, jd_profile_id, build_profile
+from services.artifacts import store_artifact
+from services.errors import ServiceError, ClientDisconnected
+from services.executor import cancel_on_disconnect
+from services.cache import cache_bypassed
+from services.streaming import encode_event, SSE_MEDIA_TYPE
 
 router = APIRouter()
 
 @router.post("/generate", response_model=JDResponse)
-async def generate_jd(request: JDRequest):
+async def generate_jd(request: JDRequest, http_request: Request):
     """Generate a job description based on role and requirements"""
     try:
-        result = await gemini_client.generate_jd(
+        result = await cancel_on_disconnect(http_request, gemini_client.generate_jd(
             role=request.role,
             skills=request.skills,
             experience_level=request.experience_level,
-            company_type=request.company_type
-        )
-        return JDResponse(**result)
+            company_type=request.company_type,
+            use_cache=not cache_bypassed(http_request.headers)
+        ))
+        return store_artifact("jd", JDResponse(**result))
+    except (ServiceError, ClientDisconnected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/generate/stream")
+async def generate_jd_stream(request: JDRequest, http_request: Request):
+    """Stream a job description as Server-Sent Events.
+
+    ``token`` events carry text as the model produces it; the final ``result``
+    event carries the same JDResponse that /generate returns.
+    """
+    events = gemini_client.stream_jd(
+        role=request.role,
+        skills=request.skills,
+        experience_level=request.experience_level,
+        company_type=request.company_type,
+        use_cache=not cache_bypassed(http_request.headers)
+    )
+
+    async def stream():
+        try:
+            async for event, payload in events:
+                if event == "token":
+                    yield encode_event("token", {"text": payload}, sse=True)
+                else:
+                    yield encode_event("result", store_artifact("jd", JDResponse(**payload)).model_dump(), sse=True)
+        except Exception as e:
+            yield encode_event("error", {"detail": str(e)}, sse=True)
+
+    return StreamingResponse(stream(), media_type=SSE_MEDIA_TYPE)
+
+@router.post("/profiles", response_model=JDProfile)
+async def create_jd_profile(request: JDProfileRequest, http_request: Request):
+    """Extract a JD's requirements once and return a profile to screen CVs against.
+
+    Pass the returned ``id`` as ``jd_profile_id`` to the screening endpoints
+    instead of resending ``jd_text``. Profiles are keyed by the JD's content,
+    so posting the same JD again returns the stored profile without a model
+    call; ``Cache-Control: no-cache`` extracts it afresh and replaces the
+    stored one. The body of a /generate response is accepted as is.
+    """
+    try:
+        bypass = cache_bypassed(http_request.headers)
+        profile = None if bypass else jd_profile_store.get(jd_profile_id(request.jd_text))
+        if profile is None:
+            requirements = await cancel_on_disconnect(http_request, gemini_client.extract_jd_requirements(
+                request.jd_text, use_cache=not bypass
+            ))
+            profile = build_profile(request.jd_text, requirements, title=request.title)
+            jd_profile_store.put(profile, request.jd_text)
+        return profile
+    except (ServiceError, ClientDisconnected):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/profiles/{profile_id}", response_model=JDProfile)
+async def get_jd_profile(profile_id: str):
+    """Return a stored JD profile"""
+    profile = jd_profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="JD profile not found")
+    return profile
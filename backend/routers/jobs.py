@@ -0,0 +1,152 @@
+import asyncio
+import itertools
+import os
+import shutil
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Request, Response
+from models.schemas import JobResponse
+from services.gemini_client import gemini_client
+from services.jobs import job_queue, Job
+from services.audio_ingest import open_audio_upload
+from services.metrics import stage
+from services.cache import cache_bypassed
+from services.prefilter import PREFILTER_TOP_K, PREFILTER_MIN_SCORE
+from routers.cv_screener import iter_archive, screen_batch_events, resolve_jd, CV_BATCH_MAX_FILES
+
+router = APIRouter()
+
+def _read_batch_files(job: Job) -> list:
+    files = iter(job.files)
+    documents = []
+    for filename, oversized in zip(job.params["filenames"], job.params["oversized"]):
+        if oversized:
+            documents.append((filename, None))
+            continue
+        with open(next(files), "rb") as f:
+            documents.append((filename, f.read()))
+    return documents
+
+async def run_cv_batch_job(job: Job, progress) -> dict:
+    """Screen a stored batch of CVs, reporting progress per CV"""
+    documents = await asyncio.to_thread(_read_batch_files, job)
+    items, summary = [], None
+    progress(0, len(documents), "parsing")
+    async for event, payload in screen_batch_events(documents, job.params["jd_text"], job.params["use_cache"],
+                                                    job.params["top_k"], job.params["min_pre_score"],
+                                                    job.params.get("jd_terms")):
+        if event == "result":
+            items.append(payload.model_dump())
+            progress(len(items), len(documents), f"{len(items)}/{len(documents)} CVs done")
+        else:
+            summary = payload.model_dump()
+    return {"items": sorted(items, key=lambda item: item["index"]), "summary": summary}
+
+async def run_audio_job(job: Job, progress) -> dict:
+    """Analyze a stored recording"""
+    progress(0, 1, "analyzing")
+    with open(job.files[0], "rb") as f:
+        result = await gemini_client.analyze_audio(f, job.params["mime_type"], duration=job.params["duration"])
+    return result.model_dump()
+
+JOB_HANDLERS = {
+    "cv_screen_batch": run_cv_batch_job,
+    "audio_analysis": run_audio_job,
+}
+job_queue.handlers.update(JOB_HANDLERS)
+
+def _save_upload(source, path: str) -> str:
+    """Stream a readable file to ``path`` in chunks; returns the path"""
+    with open(path, "wb") as f:
+        shutil.copyfileobj(source, f)
+    return path
+
+def _stage_cv_uploads(cv_files: Optional[list], archive: Optional[UploadFile], directory: str) -> list:
+    """(filename, staged path or None past the size limit) for every uploaded CV and archive member"""
+    uploads = [(upload.filename, upload.file) for upload in cv_files or []]
+    members = iter_archive(archive.file) if archive is not None else ()
+    documents = []
+    for filename, source in itertools.chain(uploads, members):
+        # Checked as the files are written, so an oversized batch is not staged in full first
+        if len(documents) == CV_BATCH_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"A batch may contain at most {CV_BATCH_MAX_FILES} CVs")
+        path = os.path.join(directory, f"{len(documents):04d}")
+        documents.append((filename, _save_upload(source, path) if source is not None else None))
+    if not documents:
+        raise HTTPException(status_code=400, detail="Upload at least one PDF/DOCX file or a zip archive")
+    return documents
+
+def _job_response(job: Job) -> JobResponse:
+    return JobResponse(**{name: getattr(job, name) for name in JobResponse.model_fields})
+
+def _accepted(job: Job, created: bool, response: Response) -> JobResponse:
+    # A replayed idempotency key gets the original job back with 200 instead of 202
+    response.status_code = 202 if created else 200
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return _job_response(job)
+
+@router.post("/cv-screen-batch", response_model=JobResponse, status_code=202)
+async def submit_cv_batch(
+    http_request: Request,
+    response: Response,
+    jd_text: Optional[str] = Form(None),
+    jd_profile_id: Optional[str] = Form(None),
+    cv_files: List[UploadFile] = File(None),
+    archive: UploadFile = File(None),
+    top_k: Optional[int] = Form(None),
+    min_pre_score: Optional[float] = Form(None),
+    use_cache: bool = Form(True),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Queue a batch CV screen; poll /api/jobs/{id} for progress and the ranked results"""
+    # A profile is resolved now, so the job does not depend on it still being stored when it runs
+    jd_text, terms = resolve_jd(jd_text, jd_profile_id)
+    staging = job_queue.make_staging_dir()
+    try:
+        with stage("upload_read"):
+            documents = await asyncio.to_thread(_stage_cv_uploads, cv_files, archive, staging)
+        params = {
+            "jd_text": jd_text,
+            "jd_profile_id": jd_profile_id,
+            "jd_terms": terms,
+            "filenames": [filename for filename, _ in documents],
+            "oversized": [path is None for _, path in documents],
+            "top_k": PREFILTER_TOP_K if top_k is None else top_k,
+            "min_pre_score": PREFILTER_MIN_SCORE if min_pre_score is None else min_pre_score,
+            # Cache-Control: no-cache is honoured as on the synchronous endpoints, and kept for when the job runs
+            "use_cache": use_cache and not cache_bypassed(http_request.headers),
+        }
+        files = [(filename, path) for filename, path in documents if path is not None]
+        job, created = await asyncio.to_thread(job_queue.submit, "cv_screen_batch", params, files, idempotency_key)
+    finally:
+        # Empty unless the submit was refused or replayed an earlier job
+        shutil.rmtree(staging, ignore_errors=True)
+    return _accepted(job, created, response)
+
+@router.post("/audio-analysis", response_model=JobResponse, status_code=202)
+async def submit_audio_analysis(
+    response: Response,
+    file: UploadFile = File(...),
+    duration_seconds: Optional[float] = Form(None),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Queue analysis of a recording; poll /api/jobs/{id} for the AudioAnalysisResponse"""
+    audio = open_audio_upload(file)
+    params = {"mime_type": audio.mime_type, "duration": audio.duration or duration_seconds}
+    staging = job_queue.make_staging_dir()
+    try:
+        # The spooled upload is copied to the job's files in chunks, never held in memory whole
+        with stage("upload_read"):
+            path = await asyncio.to_thread(_save_upload, audio.file, os.path.join(staging, "audio"))
+        job, created = await asyncio.to_thread(job_queue.submit, "audio_analysis", params, [(audio.filename, path)],
+                                               idempotency_key)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return _accepted(job, created, response)
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Status, progress and, once finished, the result or error of a job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
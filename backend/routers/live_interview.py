@@ -1,29 +1,145 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, WebSocket, WebSocketDisconnect
 from models.schemas import AudioAnalysisResponse
 from services.gemini_client import gemini_client
-import shutil
-import os
-import tempfile
+from services.errors import ServiceError, ClientDisconnected
+from services.executor import cancel_on_disconnect
+from services.audio_ingest import open_audio_upload, audio_mime_type, audio_metrics
+from services.metrics import stage
+from services.live_session import LiveSession, LatestOnly, live_sessions, LIVE_UPDATE_SECONDS
+import asyncio
+import io
+import json
+import time
 
 router = APIRouter()
 
 @router.post("/analyze-audio", response_model=AudioAnalysisResponse)
-async def analyze_audio(file: UploadFile = File(...)):
-    """Analyze uploaded audio file"""
+async def analyze_audio(
+    http_request: Request,
+    file: UploadFile = File(...),
+    duration_seconds: Optional[float] = Form(None)
+):
+    """Analyze uploaded audio file.
+
+    Long recordings are analyzed in parallel time windows; their length is
+    read from WAV headers, or taken from ``duration_seconds`` for other
+    formats.
+    """
     try:
-        # Create a temporary file to save the upload
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
-            temp_path = temp_file.name
+        started = time.perf_counter()
 
-        try:
-            # Analyze using Gemini
-            result = await gemini_client.analyze_audio(temp_path)
-            return AudioAnalysisResponse(**result)
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        # Stream the spooled upload straight to Gemini rather than copying it to a temp file first
+        with stage("upload_read"):
+            audio = open_audio_upload(file)
+
+        # Analyze using Gemini
+        result = await cancel_on_disconnect(http_request, gemini_client.analyze_audio(
+            audio.file, audio.mime_type, duration=audio.duration or duration_seconds
+        ))
+        audio_metrics.record_analysis(time.perf_counter() - started)
+        return result
                 
+    except (ServiceError, ClientDisconnected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _parse_control(text: Optional[str]) -> dict:
+    try:
+        control = json.loads(text or "")
+    except ValueError:
+        return {}
+    return control if isinstance(control, dict) else {}
+
+async def _cancel(tasks: list):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+async def _send_updates(websocket: WebSocket, outbox: LatestOnly):
+    while True:
+        await websocket.send_json(await outbox.get())
+
+async def _analyze_window(session: LiveSession, outbox: LatestOnly):
+    """Every LIVE_UPDATE_SECONDS, analyze the ring buffer and publish a rolling update.
+
+    Only one analysis runs at a time, so a slow model stretches the interval
+    instead of piling up calls.
+    """
+    while True:
+        await asyncio.sleep(LIVE_UPDATE_SECONDS)
+        if not session.has_new_audio():
+            continue
+        try:
+            result = await gemini_client.analyze_audio(io.BytesIO(session.snapshot()), session.mime_type)
+        except Exception as e:
+            outbox.put({"type": "error", "detail": str(e), "final": False})
+            continue
+        outbox.put(session.apply(result))
+
+@router.websocket("/live")
+async def live_interview(websocket: WebSocket):
+    """Stream interview audio and get rolling feedback while the candidate is talking.
+
+    The client sends binary audio frames (the first one carrying the
+    container header), optionally preceded by ``{"type": "start",
+    "mime_type": ...}``. Every few seconds the server sends an ``update``
+    with the stitched transcription so far and the latest and rolling
+    confidence. After ``{"type": "stop"}`` it sends a ``final`` message with
+    the AudioAnalysisResponse for the whole recording and closes.
+    """
+    await websocket.accept()
+    session = LiveSession()
+    if not live_sessions.open(session):
+        await websocket.send_json({"type": "error", "detail": "Too many live interviews in progress", "final": True})
+        await websocket.close(code=1013)  # Try Again Later
+        return
+
+    outbox = LatestOnly()
+    tasks = [asyncio.create_task(_send_updates(websocket, outbox)),
+             asyncio.create_task(_analyze_window(session, outbox))]
+    try:
+        await websocket.send_json({"type": "ready", "session_id": session.id, "update_seconds": LIVE_UPDATE_SECONDS})
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                if not session.feed(message["bytes"]):
+                    await websocket.close(code=1009, reason="Recording exceeds the size limit")
+                    return
+                continue
+
+            control = _parse_control(message.get("text"))
+            if control.get("type") == "start" and not session.received_bytes:
+                try:
+                    session.mime_type = audio_mime_type("", control.get("mime_type"))
+                except ServiceError as e:
+                    await websocket.close(code=1003, reason=str(e))
+                    return
+            elif control.get("type") == "stop":
+                break
+
+        # Stop incremental work so the final analysis has the model to itself
+        await _cancel(tasks)
+        if not session.received_bytes:
+            await websocket.close(code=1000, reason="No audio received")
+            return
+        started = time.perf_counter()
+        try:
+            result = await gemini_client.analyze_audio(session.recording_file(), session.mime_type,
+                                                       duration=session.recording_duration())
+        except Exception as e:
+            await websocket.send_json({"type": "error", "detail": str(e), "final": True})
+            await websocket.close(code=1011)
+            return
+        audio_metrics.record_analysis(time.perf_counter() - started)
+        await websocket.send_json({"type": "final", "result": result.model_dump()})
+        await websocket.close(code=1000)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await _cancel(tasks)
+        live_sessions.dropped_updates += outbox.replaced
+        live_sessions.close(session)
@@ -1,31 +1,85 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from models.schemas import QuizRequest, QuizResponse, Question, QuizEvaluationRequest, QuizEvaluationResponse
 from services.gemini_client import gemini_client
+from services.errors import ServiceError, ClientDisconnected
+from services.executor import cancel_on_disconnect
+from services.cache import cache_bypassed
+from services.question_bank import question_bank, QUIZ_BANK_ENABLED
+from services.artifacts import store_artifact
+from services.streaming import encode_event, SSE_MEDIA_TYPE
 
 router = APIRouter()
 
 @router.post("/generate", response_model=QuizResponse)
-async def generate_quiz(request: QuizRequest):
-    """Generate technical assessment questions"""
+async def generate_quiz(request: QuizRequest, http_request: Request, response: Response):
+    """Generate technical assessment questions, sampled from the question bank when it holds enough"""
     try:
-        questions_data = await gemini_client.generate_tech_questions(
-            role=request.role,
-            skill_level=request.skill_level,
-            num_questions=request.num_questions
-        )
+        if QUIZ_BANK_ENABLED and not cache_bypassed(http_request.headers):
+            questions, from_bank = await cancel_on_disconnect(http_request, question_bank.serve(
+                role=request.role,
+                skill_level=request.skill_level,
+                num_questions=request.num_questions,
+                generate=gemini_client.generate_tech_questions
+            ))
+            response.headers["X-Quiz-Source"] = "bank" if from_bank else "generated"
+        else:
+            questions = await cancel_on_disconnect(http_request, gemini_client.generate_tech_questions(
+                role=request.role,
+                skill_level=request.skill_level,
+                num_questions=request.num_questions,
+                use_cache=not cache_bypassed(http_request.headers)
+            ))
+            response.headers["X-Quiz-Source"] = "generated"
         
-        questions = [Question(**q) for q in questions_data]
-        return QuizResponse(questions=questions)
+        return store_artifact("quiz", QuizResponse(questions=questions))
+    except (ServiceError, ClientDisconnected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate/stream")
+async def generate_quiz_stream(request: QuizRequest, http_request: Request):
+    """Stream quiz questions as Server-Sent Events.
+
+    A ``question`` event is sent as soon as each question's JSON object is
+    complete; the final ``result`` event carries the same QuizResponse that
+    /generate returns.
+    """
+    events = gemini_client.stream_tech_questions(
+        role=request.role,
+        skill_level=request.skill_level,
+        num_questions=request.num_questions,
+        use_cache=not cache_bypassed(http_request.headers)
+    )
+
+    async def stream():
+        index = 0
+        try:
+            async for event, payload in events:
+                if event == "question":
+                    try:
+                        question = Question(**payload)
+                    except ValueError:
+                        # Malformed partial output; the final result is validated as a whole
+                        continue
+                    yield encode_event("question", {"index": index, **question.model_dump()}, sse=True)
+                    index += 1
+                else:
+                    yield encode_event("result", store_artifact("quiz", QuizResponse(questions=payload)).model_dump(), sse=True)
+        except Exception as e:
+            yield encode_event("error", {"detail": str(e)}, sse=True)
+
+    return StreamingResponse(stream(), media_type=SSE_MEDIA_TYPE)
+
 @router.post("/evaluate", response_model=QuizEvaluationResponse)
-async def evaluate_quiz(request: QuizEvaluationRequest):
+async def evaluate_quiz(request: QuizEvaluationRequest, http_request: Request):
     """Evaluate quiz answers"""
     try:
-        result = await gemini_client.evaluate_quiz(
-            answers=[a.dict() for a in request.answers]
-        )
-        return QuizEvaluationResponse(**result)
+        return await cancel_on_disconnect(http_request, gemini_client.evaluate_quiz(
+            answers=[a.model_dump() for a in request.answers]
+        ))
+    except (ServiceError, ClientDisconnected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
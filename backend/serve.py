@@ -0,0 +1,76 @@
+"""Run the API in several worker processes that share Gemini quota, cached responses and in-flight calls.
+
+    python serve.py                      # one worker per available core
+    python serve.py --workers 4 --port 8000
+
+Plain ``uvicorn --workers N`` gives every process its own rate limiter and
+cache, so N workers spend N quotas and repeat each other's calls. This
+launcher points all of them at one SharedState file (SHARED_STATE_PATH), puts
+the response cache in SQLite where every worker can read it, sizes each
+worker's extraction pool to its share of the cores, and requeues interrupted
+background jobs once, before the workers start. Settings already present in
+the environment or .env win over these defaults.
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS or Windows
+        return os.cpu_count() or 1
+
+
+def configure_environment(workers: int, state_dir: str) -> dict:
+    """Defaults for a multi-worker deployment; must run before any service module is imported"""
+    defaults = {
+        "WEB_CONCURRENCY": str(workers),
+        "EXTRACTION_WORKERS": str(max(1, available_cores() // workers)),
+    }
+    if workers > 1:
+        defaults.update({
+            "SHARED_STATE_PATH": os.path.join(state_dir, "shared_state.sqlite3"),
+            "RESPONSE_CACHE_BACKEND": "sqlite",
+        })
+    for name, value in defaults.items():
+        # An empty value (SHARED_STATE_PATH= in a copied .env.example) counts as unset
+        if not os.environ.get(name):
+            os.environ[name] = value
+    return {name: os.environ[name] for name in defaults}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or available_cores(),
+                        help="worker processes (default: WEB_CONCURRENCY, else one per available core)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--state-dir", default="data", help="directory for the shared state file")
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    load_dotenv()
+    args = parse_args(argv)
+    settings = configure_environment(args.workers, args.state_dir)
+
+    import uvicorn
+    from services.jobs import job_queue
+    from services.shared_state import shared_state
+
+    if shared_state.enabled:
+        # Bucket levels and leases from a previous run describe processes that no longer exist
+        shared_state.reset()
+    requeued = job_queue.requeue_interrupted()
+    if args.workers > 1 and settings["RESPONSE_CACHE_BACKEND"] != "sqlite":
+        print("warning: RESPONSE_CACHE_BACKEND is not sqlite, so each worker keeps a private response cache")
+    print(f"Starting {args.workers} worker(s): {settings}; requeued {requeued} interrupted job(s)")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+ARTIFACT_STORE_PATH = os.getenv("ARTIFACT_STORE_PATH", "data/artifacts.sqlite3")
+ARTIFACT_RETENTION_DAYS = float(os.getenv("ARTIFACT_RETENTION_DAYS", "30"))
+
+# Content under an id never changes, so clients may keep it as long as they like; private because reports hold CVs
+ARTIFACT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS artifacts_last_used ON artifacts (last_used_at);
+"""
+
+
+def encode_artifact(payload: dict) -> bytes:
+    """Canonical JSON, so equal content always hashes to the same id"""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def artifact_id(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def matching_etag(if_none_match: str, etag: str):
+    """The entity tag in an If-None-Match header that matches ``etag``, or None.
+
+    Comparison is weak, as RFC 9110 prescribes for If-None-Match, and ignores
+    the ``-gzip``/``-br`` suffix CompressionMiddleware gives the tag of an
+    encoded representation.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        opaque = candidate[2:] if candidate.startswith("W/") else candidate
+        for suffix in ('-gzip"', '-br"'):
+            if opaque.endswith(suffix):
+                opaque = opaque[:-len(suffix)] + '"'
+        if opaque == etag:
+            return candidate
+    return None
+
+
+@dataclass
+class Artifact:
+    id: str
+    kind: str
+    body: bytes
+    created_at: float
+
+    @property
+    def etag(self) -> str:
+        # The id is a hash of the exact bytes served, so it is a strong validator as is
+        return f'"{self.id}"'
+
+
+class ArtifactStore:
+    """Generated JDs, quiz sets and batch screening reports, stored under the hash of their content.
+
+    Generation endpoints return the id alongside the result; GET
+    /api/artifacts/{id} serves the stored bytes with a strong ETag, so the
+    frontend can re-fetch a result for free instead of regenerating it.
+    Artifacts unused for ``retention_days`` are dropped.
+    """
+
+    def __init__(self, path: str = ARTIFACT_STORE_PATH, retention_days: float = ARTIFACT_RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def put(self, kind: str, payload: dict) -> str:
+        """Store ``payload`` (or refresh its copy) and return its id"""
+        body = encode_artifact(payload)
+        id, now = artifact_id(body), time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT INTO artifacts (id, kind, body, created_at, last_used_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET last_used_at = excluded.last_used_at",
+                (id, kind, body, now, now),
+            )
+            db.execute("DELETE FROM artifacts WHERE last_used_at < ?", (now - self.retention_days * 86400,))
+            db.commit()
+        return id
+
+    def get(self, id: str):
+        """Stored artifact, or None"""
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT kind, body, created_at FROM artifacts WHERE id = ?", (id,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE artifacts SET hits = hits + 1, last_used_at = ? WHERE id = ?", (time.time(), id))
+            db.commit()
+            self.hits += 1
+        kind, body, created_at = row
+        return Artifact(id, kind, bytes(body), created_at)
+
+    def stats(self) -> dict:
+        with self._lock:
+            kinds = {kind: {"artifacts": count, "bytes": size} for kind, count, size in self._db().execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM artifacts GROUP BY kind")}
+        lookups = self.hits + self.misses
+        return {
+            "kinds": kinds,
+            "retention_days": self.retention_days,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def store_artifact(kind: str, result):
+    """Persist a generated result model and set its ``artifact_id``; the id is left out of the hashed content"""
+    result.artifact_id = artifact_store.put(kind, result.model_dump(exclude={"artifact_id"}))
+    return result
+
+
+# Singleton instance
+artifact_store = ArtifactStore()
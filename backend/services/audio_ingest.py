@@ -0,0 +1,188 @@
+import asyncio
+import mimetypes
+import os
+import tempfile
+import wave
+from dataclasses import dataclass
+from services.errors import UnsupportedAudio, AudioTooLarge
+
+AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", str(100 * 1024 * 1024)))
+# Window slices larger than this are spooled to disk
+AUDIO_SLICE_MEMORY_BYTES = 8 * 1024 * 1024
+
+WAV_MIME_TYPES = ("audio/wav", "audio/x-wav", "audio/wave")
+
+# Browsers record webm/opus; mimetypes would call these video
+AUDIO_EXTENSION_TYPES = {
+    ".webm": "audio/webm",
+    ".wav": "audio/wav",
+    ".mp3": "audio/mp3",
+    ".ogg": "audio/ogg",
+    ".oga": "audio/ogg",
+    ".flac": "audio/flac",
+    ".aac": "audio/aac",
+    ".m4a": "audio/mp4",
+    ".aiff": "audio/aiff",
+}
+
+
+@dataclass
+class AudioUpload:
+    file: object  # readable, seekable binary file positioned at the start
+    size: int
+    mime_type: str
+    filename: str
+    duration: float = None  # seconds, when the container can be read without decoding (WAV)
+
+
+def audio_mime_type(filename: str, content_type: str = None) -> str:
+    """MIME type Gemini should be told for an upload; raises UnsupportedAudio for anything else"""
+    if content_type and content_type.startswith("audio/"):
+        return content_type.split(";")[0].strip()
+    extension = os.path.splitext(filename or "")[1].lower()
+    guessed = AUDIO_EXTENSION_TYPES.get(extension) or mimetypes.guess_type(filename or "")[0]
+    if guessed and guessed.startswith("audio/"):
+        return guessed
+    raise UnsupportedAudio(f"Unsupported audio type: {content_type or extension or 'unknown'}")
+
+
+def wav_duration(file) -> float:
+    """Length of a WAV recording from its header, or None for anything else"""
+    try:
+        with wave.open(file, "rb") as reader:
+            return reader.getnframes() / reader.getframerate()
+    except (wave.Error, EOFError):
+        return None
+    finally:
+        file.seek(0)
+
+
+def wav_stream_duration(file, size: int) -> float:
+    """Length of ``size`` bytes of WAV audio from its format header, or None for anything else.
+
+    For recordings streamed as they were made, whose header was written
+    before the length was known, so only its format can be trusted.
+    """
+    try:
+        with wave.open(file, "rb") as reader:
+            # wave stops at the start of the data chunk, so what is left of ``size`` is audio
+            audio_bytes = max(size - file.tell(), 0)
+            return audio_bytes // (reader.getnchannels() * reader.getsampwidth()) / reader.getframerate()
+    except (wave.Error, EOFError):
+        return None
+    finally:
+        file.seek(0)
+
+
+def slice_wav(file, start: float, end: float):
+    """A standalone WAV file object holding the ``start``-``end`` seconds of a WAV recording (a path or file)"""
+    out = tempfile.SpooledTemporaryFile(max_size=AUDIO_SLICE_MEMORY_BYTES)
+    try:
+        with wave.open(file, "rb") as reader:
+            rate = reader.getframerate()
+            reader.setpos(min(int(start * rate), reader.getnframes()))
+            remaining = max(int((end - start) * rate), 0)
+            # The frame count in the header is fixed up when the writer closes
+            with wave.open(out, "wb") as writer:
+                writer.setparams(reader.getparams())
+                while remaining > 0:
+                    frames = reader.readframes(min(remaining, rate))
+                    if not frames:
+                        break
+                    writer.writeframes(frames)
+                    remaining -= min(remaining, rate)
+    finally:
+        if hasattr(file, "seek"):
+            file.seek(0)
+    out.seek(0)
+    return out
+
+
+def open_audio_upload(upload, max_bytes: int = None) -> AudioUpload:
+    """Validate a FastAPI UploadFile and expose its spooled buffer without copying it.
+
+    Starlette already spools the multipart body in memory (rolling over to a
+    temp file for large recordings); that buffer is handed to the Gemini
+    upload as is instead of being copied to a second temp file.
+    """
+    max_bytes = max_bytes or AUDIO_MAX_BYTES
+    mime_type = audio_mime_type(upload.filename, upload.content_type)
+    size = upload.size
+    if size is None:
+        size = upload.file.seek(0, os.SEEK_END)
+    if size > max_bytes:
+        raise AudioTooLarge(f"Recording is {size} bytes; the limit is {max_bytes}")
+    if not size:
+        raise UnsupportedAudio("Recording is empty")
+    upload.file.seek(0)
+    duration = wav_duration(upload.file) if mime_type in WAV_MIME_TYPES else None
+    return AudioUpload(file=upload.file, size=size, mime_type=mime_type, filename=upload.filename, duration=duration)
+
+
+class AudioMetrics:
+    """Throughput of audio uploads to Gemini and end-to-end analysis latency"""
+
+    def __init__(self):
+        self.uploads = 0
+        self.upload_bytes = 0
+        self.upload_seconds = 0.0
+        self.analyses = 0
+        self.analysis_seconds = 0.0
+        self.max_analysis_seconds = 0.0
+
+    def record_upload(self, size: int, elapsed: float):
+        self.uploads += 1
+        self.upload_bytes += size
+        self.upload_seconds += elapsed
+
+    def record_analysis(self, elapsed: float):
+        self.analyses += 1
+        self.analysis_seconds += elapsed
+        self.max_analysis_seconds = max(self.max_analysis_seconds, elapsed)
+
+    def stats(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "upload_bytes": self.upload_bytes,
+            "upload_bytes_per_second": round(self.upload_bytes / self.upload_seconds) if self.upload_seconds else 0,
+            "analyses": self.analyses,
+            "mean_latency_seconds": round(self.analysis_seconds / self.analyses, 3) if self.analyses else 0.0,
+            "max_latency_seconds": round(self.max_analysis_seconds, 3),
+        }
+
+
+class RemoteFileCleanup:
+    """Deletes files uploaded to Gemini on background tasks so callers never wait on it.
+
+    Failures are counted rather than raised; ``drain()`` waits for pending
+    deletions so a graceful shutdown does not leak remote storage.
+    """
+
+    def __init__(self, delete):
+        self.delete = delete
+        self.deleted = 0
+        self.failed = 0
+        self._tasks = set()
+
+    def schedule(self, name: str, executor):
+        task = asyncio.get_running_loop().create_task(self._delete(name, executor))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _delete(self, name: str, executor):
+        try:
+            await executor.run_sync(self.delete, name)
+            self.deleted += 1
+        except Exception:
+            self.failed += 1
+
+    async def drain(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"pending": len(self._tasks), "deleted": self.deleted, "failed": self.failed}
+
+
+# Singleton instance
+audio_metrics = AudioMetrics()
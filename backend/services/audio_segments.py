@@ -0,0 +1,143 @@
+import difflib
+import os
+import re
+from collections import defaultdict
+from models.schemas import AudioAnalysisResponse, AudioTimelineEntry
+from services.errors import GeminiError
+
+AUDIO_SEGMENT_SECONDS = float(os.getenv("AUDIO_SEGMENT_SECONDS", "300"))
+AUDIO_SEGMENT_OVERLAP_SECONDS = float(os.getenv("AUDIO_SEGMENT_OVERLAP_SECONDS", "10"))
+AUDIO_SEGMENT_CONCURRENCY = int(os.getenv("AUDIO_SEGMENT_CONCURRENCY", "4"))
+AUDIO_SEGMENT_RETRIES = int(os.getenv("AUDIO_SEGMENT_RETRIES", "2"))
+AUDIO_CHUNKED_MIN_SECONDS = float(os.getenv("AUDIO_CHUNKED_MIN_SECONDS", "600"))
+# Windows for formats that cannot be sliced (anything but WAV) resend the whole file each time; off by default
+AUDIO_WINDOW_WHOLE_FILE = os.getenv("AUDIO_WINDOW_WHOLE_FILE", "false").lower() == "true"
+
+# How far back to look for words repeated across a window overlap when stitching
+MAX_STITCH_WORDS = 80
+_NORMALIZE_WORD = re.compile(r"[^\w']+")
+
+
+def format_timestamp(seconds: float) -> str:
+    """MM:SS, the form Gemini understands for referring to a point in an audio file"""
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def plan_windows(duration: float, window: float = AUDIO_SEGMENT_SECONDS,
+                 overlap: float = AUDIO_SEGMENT_OVERLAP_SECONDS) -> list:
+    """(start, end) windows of ``window`` seconds covering ``duration``, each overlapping the previous one"""
+    if duration <= window:
+        return [(0.0, float(duration))]
+    step = window - overlap
+    windows = []
+    start = 0.0
+    while start + overlap < duration:
+        windows.append((start, min(start + window, float(duration))))
+        start += step
+    return windows
+
+
+def _owned_seconds(windows: list, index: int) -> float:
+    """Length of a window minus the halves of its overlaps, so overlapped audio is not counted twice"""
+    start, end = windows[index]
+    if index > 0:
+        start = max(start, (start + windows[index - 1][1]) / 2)
+    if index < len(windows) - 1:
+        end = min(end, (windows[index + 1][0] + end) / 2)
+    return max(end - start, 0.0)
+
+
+def _words(text: str) -> list:
+    return [_NORMALIZE_WORD.sub("", word).lower() for word in text.split()]
+
+
+def stitch_transcripts(transcripts: list, max_words: int = MAX_STITCH_WORDS) -> str:
+    """Join consecutive window transcripts, dropping the words repeated across each overlap"""
+    stitched = []
+    for text in transcripts:
+        words = text.split()
+        if stitched and words:
+            tail = _words(" ".join(stitched[-max_words:]))
+            head = _words(" ".join(words[:max_words]))
+            # Longest run that ends the previous transcript and starts this one
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    words = words[size:]
+                    break
+        stitched.extend(words)
+    return " ".join(stitched)
+
+
+def merge_window_transcript(previous: str, window_text: str, min_run: int = 3) -> str:
+    """``previous`` extended with what the transcript of a sliding audio window adds to it.
+
+    The window re-transcribes audio the previous transcript already covers,
+    usually worded a little differently, so it is aligned against the end of
+    ``previous`` however long the shared part is, and only the words after the
+    last run of ``min_run`` matching words are appended.
+    """
+    words = window_text.split()
+    if not previous or not words:
+        return " ".join(previous.split() + words)
+    new = _words(window_text)
+    # The shared audio cannot hold more words than the window's own transcript; the rest is slack for rewording
+    old = _words(previous)[-2 * len(new):]
+    cut = 0
+    for block in difflib.SequenceMatcher(None, old, new, autojunk=False).get_matching_blocks():
+        if block.size >= min(min_run, len(new)):
+            cut = max(cut, block.b + block.size)
+    return " ".join(previous.split() + words[cut:])
+
+
+def _dominant(weights: dict) -> str:
+    return max(weights.items(), key=lambda item: item[1])[0]
+
+
+def merge_segments(windows: list, results: list) -> AudioAnalysisResponse:
+    """Combine per-window analyses into one response.
+
+    ``results`` holds an (attempts, AudioAnalysisResponse or exception) pair
+    per window. The score is weighted by the audio each window owns; level
+    and tone are the ones covering the most audio; failed windows only
+    appear in the timeline.
+    """
+    timeline = []
+    score_total = weight_total = 0.0
+    levels, tones = defaultdict(float), defaultdict(float)
+    summaries, transcripts = [], []
+    error = None
+
+    for index, ((start, end), result) in enumerate(zip(windows, results)):
+        attempts, result = result
+        if isinstance(result, BaseException):
+            error = str(result) or type(result).__name__
+            timeline.append(AudioTimelineEntry(start_seconds=start, end_seconds=end, attempts=attempts, error=error))
+            continue
+        weight = max(_owned_seconds(windows, index), 1e-6)
+        score_total += result.confidence_score * weight
+        weight_total += weight
+        levels[result.confidence_level] += weight
+        tones[result.tone] += weight
+        summaries.append(f"[{format_timestamp(start)}] {result.summary}")
+        transcripts.append(result.transcription)
+        timeline.append(AudioTimelineEntry(
+            start_seconds=start,
+            end_seconds=end,
+            confidence_score=result.confidence_score,
+            confidence_level=result.confidence_level,
+            tone=result.tone,
+            summary=result.summary,
+            attempts=attempts,
+        ))
+
+    if not weight_total:
+        raise GeminiError(f"Every audio segment failed; last error: {error}")
+    return AudioAnalysisResponse(
+        confidence_score=round(score_total / weight_total),
+        confidence_level=_dominant(levels),
+        tone=_dominant(tones),
+        summary="\n".join(summaries),
+        transcription=stitch_transcripts(transcripts),
+        timeline=timeline,
+    )
@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import os
+import time
+from collections import Counter
+from pydantic import create_model
+
+GEMINI_BATCHING = os.getenv("GEMINI_BATCHING", "false").lower() in ("1", "true", "yes")
+GEMINI_BATCH_MAX_ITEMS = int(os.getenv("GEMINI_BATCH_MAX_ITEMS", "8"))
+GEMINI_BATCH_MAX_WAIT_MS = float(os.getenv("GEMINI_BATCH_MAX_WAIT_MS", "50"))
+GEMINI_BATCH_MAX_TOKENS = int(os.getenv("GEMINI_BATCH_MAX_TOKENS", "30000"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) used to size batches"""
+    return len(text) // 4 + 1
+
+
+@functools.cache
+def indexed(schema):
+    """``schema`` plus the ``index`` field that ties a batched answer back to its request"""
+    return create_model(f"Indexed{schema.__name__}", __base__=schema, index=(int, ...))
+
+
+class _Window:
+    def __init__(self):
+        self.entries = []
+        self.tokens = 0
+        self.timer = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests of one kind into batched model calls.
+
+    Requests submitted under the same key within ``max_wait`` seconds share a
+    batch, which is dispatched early once it holds ``max_items`` requests or
+    adding another would exceed ``max_tokens``. ``run_batch(key, items)``
+    makes the call and returns one result (or exception) per item, which is
+    handed back to the matching caller. A longer wait trades per-item latency
+    for fewer, larger calls.
+    """
+
+    def __init__(self, run_batch, max_items: int = GEMINI_BATCH_MAX_ITEMS,
+                 max_wait: float = GEMINI_BATCH_MAX_WAIT_MS / 1000, max_tokens: int = GEMINI_BATCH_MAX_TOKENS):
+        self.run_batch = run_batch
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.max_tokens = max_tokens
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = Counter()
+        self.flush_reasons = Counter()
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self._windows = {}
+        self._tasks = set()
+
+    async def submit(self, key, item, tokens: int = 0):
+        """Queue ``item`` for the next batch under ``key`` and wait for its own result"""
+        loop = asyncio.get_running_loop()
+        window = self._windows.get(key)
+        if window is not None and window.tokens + tokens > self.max_tokens:
+            self._flush(key, window, "tokens")
+            window = None
+        if window is None:
+            window = _Window()
+            window.timer = loop.call_later(self.max_wait, self._flush, key, window, "wait")
+            self._windows[key] = window
+
+        future = loop.create_future()
+        window.entries.append((item, future, time.monotonic()))
+        window.tokens += tokens
+        if len(window.entries) >= self.max_items:
+            self._flush(key, window, "size")
+        return await future
+
+    def _flush(self, key, window: _Window, reason: str):
+        if self._windows.get(key) is not window:
+            return
+        del self._windows[key]
+        window.timer.cancel()
+        self.flush_reasons[reason] += 1
+        task = asyncio.create_task(self._dispatch(key, window))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, key, window: _Window):
+        now = time.monotonic()
+        self.batches += 1
+        self.items += len(window.entries)
+        self.batch_sizes[len(window.entries)] += 1
+        for _, _, submitted in window.entries:
+            self.total_wait += now - submitted
+            self.max_wait_seen = max(self.max_wait_seen, now - submitted)
+
+        try:
+            results = await self.run_batch(key, [item for item, _, _ in window.entries])
+        except Exception as e:
+            results = [e] * len(window.entries)
+
+        for (_, future, _), result in zip(window.entries, results):
+            # A caller that gave up has already cancelled its future
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "pending": sum(len(window.entries) for window in self._windows.values()),
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_sizes": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "flush_reasons": dict(self.flush_reasons),
+            "mean_wait_ms": round(1000 * self.total_wait / self.items, 2) if self.items else 0.0,
+            "max_wait_ms": round(1000 * self.max_wait_seen, 2),
+            "max_items": self.max_items,
+            "max_wait_ms_setting": round(1000 * self.max_wait, 2),
+            "max_tokens": self.max_tokens,
+        }
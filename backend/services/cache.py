@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from services.shared_state import shared_state
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # "memory", "sqlite" or "none"
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_SQLITE_PATH = os.getenv("RESPONSE_CACHE_SQLITE_PATH", "data/response_cache.sqlite3")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def make_cache_key(prompt: str, model_name: str) -> str:
+    """Content address for a prompt: sha256 of the model name and whitespace-normalized prompt"""
+    normalized = _WHITESPACE.sub(" ", prompt).strip()
+    return hashlib.sha256(f"{model_name}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+def cache_bypassed(headers) -> bool:
+    """True when the request asked for a fresh answer with Cache-Control: no-cache"""
+    directives = headers.get("cache-control", "").lower()
+    return "no-cache" in directives or "no-store" in directives
+
+
+class MemoryCacheBackend:
+    """In-process LRU with per-entry TTL and a bounded number of entries"""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache that survives restarts; least recently used rows are evicted past max_entries.
+
+    A hit only notes its time in memory; the times are written with the next
+    ``set``, before it evicts, so reads never take the write lock.
+    """
+
+    # Calls may wait on another worker's lock on the file, so ResponseCache runs them on a thread
+    blocking = True
+
+    def __init__(self, path: str = RESPONSE_CACHE_SQLITE_PATH, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._touched = {}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._touched[key] = now
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._conn.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                   [(accessed_at, key) for key, accessed_at in touched.items()])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """Content-addressed cache for model responses.
+
+    Concurrent requests for the same key are collapsed so that only one
+    upstream call is ever in flight; the others await its result. The shared
+    call runs as its own task, so a caller that disconnects does not cancel it
+    for the others and the result still lands in the cache.
+
+    With ``leases`` (SharedState over a backend every worker process reads)
+    the collapsing extends across processes: the worker holding a key's
+    lease calls upstream, and the others poll the backend for its result.
+    Calls to a blocking (SQLite) backend run on a thread, off the event loop.
+    """
+
+    def __init__(self, backend, leases=None):
+        self.backend = backend
+        self.leases = leases
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.peer_coalesced = 0
+        self._inflight = {}
+
+    async def _backend_call(self, method: str, *args):
+        if self.backend is None:
+            return None
+        func = getattr(self.backend, method)
+        return await asyncio.to_thread(func, *args) if self.backend.blocking else func(*args)
+
+    async def get_or_compute(self, key: str, compute, bypass: bool = False) -> str:
+        """Return the cached value for ``key`` or await ``compute()`` and store its result"""
+        task = None
+        if not bypass:
+            value = await self._backend_call("get", key)
+            if value is not None:
+                self.hits += 1
+                return value
+            task = self._inflight.get(key)
+
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._compute_and_store(key, compute, shared=not bypass))
+            task.add_done_callback(self._discard_unobserved_error)
+            if not bypass:
+                self._inflight[key] = task
+                task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        return await asyncio.shield(task)
+
+    async def lookup(self, key: str):
+        """Cached value for ``key`` or None, counted as a hit or miss"""
+        value = await self._backend_call("get", key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def store(self, key: str, value: str):
+        await self._backend_call("set", key, value)
+
+    async def _compute_and_store(self, key: str, compute, shared: bool = False) -> str:
+        if not shared or self.leases is None:
+            value = await compute()
+            await self._backend_call("set", key, value)
+            return value
+
+        # Another worker process may already be asking Gemini for this key; wait for its answer instead.
+        # Lease calls run on a thread too, since they may wait on another worker's lock on the SQLite file
+        while not await asyncio.to_thread(self.leases.claim, key):
+            await asyncio.sleep(self.leases.poll_interval)
+            value = await self._backend_call("get", key)
+            if value is not None:
+                self.peer_coalesced += 1
+                return value
+        try:
+            # The previous holder may have stored the value just before its lease was released
+            value = await self._backend_call("get", key)
+            if value is None:
+                value = await compute()
+                await self._backend_call("set", key, value)
+            return value
+        finally:
+            # Shielded, so a cancelled caller still gives the lease up instead of leaving it to lapse
+            await asyncio.shield(asyncio.to_thread(self.leases.release, key))
+
+    @staticmethod
+    def _discard_unobserved_error(task):
+        # Every waiter may have been cancelled; retrieve the error so asyncio does not log it
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "entries": len(self.backend) if self.backend is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "peer_coalesced": self.peer_coalesced,
+            "in_flight": len(self._inflight),
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+
+def create_response_cache() -> ResponseCache:
+    """Build the response cache selected by RESPONSE_CACHE_BACKEND"""
+    if RESPONSE_CACHE_BACKEND == "sqlite":
+        # Worker processes share the SQLite file, so they can also share in-flight calls
+        return ResponseCache(SQLiteCacheBackend(), leases=shared_state if shared_state.enabled else None)
+    if RESPONSE_CACHE_BACKEND == "none":
+        return ResponseCache(None)
+    return ResponseCache(MemoryCacheBackend())
@@ -0,0 +1,112 @@
+import asyncio
+import gzip
+import importlib.util
+import os
+from starlette.datastructures import Headers, MutableHeaders
+from services.lazy_import import lazy_import
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# Optional: without the brotli package every client that accepts gzip gets gzip
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+brotli = lazy_import("brotli")
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# Compressing bodies above this size is moved off the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = BROTLI_AVAILABLE):
+    """"br", "gzip" or None for an Accept-Encoding header, honouring q-values and preferring brotli on a tie"""
+    weights = {}
+    for entry in accept_encoding.split(","):
+        name, _, params = entry.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    wildcard = weights.get("*", 0.0)
+    # max() keeps the first of equal weights, so brotli wins a tie
+    best = max((["br"] if brotli_available else []) + ["gzip"], key=lambda name: weights.get(name, wildcard))
+    return best if weights.get(best, wildcard) > 0 else None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = COMPRESSION_GZIP_LEVEL,
+             brotli_quality: int = COMPRESSION_BROTLI_QUALITY) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output, and so any cache keyed on it, identical for identical bodies
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete responses with brotli or gzip, as the client accepts.
+
+    Only bodies sent in one piece are compressed, at least ``minimum_size``
+    bytes long and of a text-like type: streamed responses (SSE, NDJSON) pass
+    through as is so no event is held back. A strong ETag on a compressed
+    response gets an ``-gzip``/``-br`` suffix, since the encoded bytes are a
+    different representation; ``matching_etag`` accepts either form.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES, enabled: bool = COMPRESSION_ENABLED,
+                 brotli_available: bool = BROTLI_AVAILABLE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.enabled = enabled
+        self.brotli_available = brotli_available
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.brotli_available)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether the body comes in one piece
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=held)
+            if (message.get("more_body", False) or len(body) < self.minimum_size or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)):
+                await send(held)
+                await send(message)
+                return
+
+            if len(body) > OFFLOAD_BYTES:
+                compressed = await asyncio.to_thread(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) >= len(body):
+                await send(held)
+                await send(message)
+                return
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/") and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            await send(held)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from services.extraction import ExtractedDocument
+from services.prefilter import count_terms
+
+DOCUMENT_STORE_DIR = os.getenv("DOCUMENT_STORE_DIR", "data/documents")
+DOCUMENT_STORE_MAX_BYTES = int(os.getenv("DOCUMENT_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+DOCUMENT_STORE_RETENTION_DAYS = float(os.getenv("DOCUMENT_STORE_RETENTION_DAYS", "90"))
+DOCUMENT_STORE_SWEEP_SECONDS = float(os.getenv("DOCUMENT_STORE_SWEEP_SECONDS", "3600"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    sha256 TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    byte_size INTEGER NOT NULL,
+    text_bytes INTEGER NOT NULL,
+    page_count INTEGER NOT NULL,
+    truncated INTEGER NOT NULL,
+    extract_seconds REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS documents_last_used ON documents (last_used_at);
+CREATE TABLE IF NOT EXISTS screens (
+    sha256 TEXT NOT NULL REFERENCES documents (sha256) ON DELETE CASCADE,
+    jd_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (sha256, jd_hash, model)
+);
+CREATE TABLE IF NOT EXISTS term_counts (
+    sha256 TEXT PRIMARY KEY REFERENCES documents (sha256) ON DELETE CASCADE,
+    counts TEXT NOT NULL
+);
+"""
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Hash of whitespace-normalized text, so reformatted copies of a JD share a key"""
+    return hashlib.sha256(_WHITESPACE.sub(" ", text).strip().encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    """Extracted CV text, its BM25 term counts and prior screen results, keyed by the SHA-256 of the uploaded bytes.
+
+    Metadata and term counts live in SQLite and the extracted text in a blob
+    directory, so a resubmitted CV is neither parsed nor tokenized again.
+    Documents unused for ``retention_days`` are dropped, and the least
+    recently used ones go first once the blobs exceed ``max_bytes``; a put
+    sweeps only when it takes the blobs past ``max_bytes`` or the last sweep
+    is more than ``sweep_seconds`` old. Every method blocks on SQLite and
+    the disk, so async callers run them on a thread.
+    """
+
+    def __init__(self, directory: str = DOCUMENT_STORE_DIR, max_bytes: int = DOCUMENT_STORE_MAX_BYTES,
+                 retention_days: float = DOCUMENT_STORE_RETENTION_DAYS,
+                 sweep_seconds: float = DOCUMENT_STORE_SWEEP_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.sweep_seconds = sweep_seconds
+        self.document_hits = 0
+        self.document_misses = 0
+        self.screen_hits = 0
+        self.screen_misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        # Blob bytes as of the last sweep plus those put since; the first put always sweeps
+        self._text_bytes = 0
+        self._swept_at = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module never touches the disk
+        if self._conn is None:
+            os.makedirs(os.path.join(self.directory, "blobs"), exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.directory, "documents.sqlite3"), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, "blobs", sha256[:2], f"{sha256}.txt")
+
+    def get_document(self, sha256: str):
+        """Previously extracted document for these bytes, or None"""
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT kind, page_count, truncated, extract_seconds, counts FROM documents "
+                "LEFT JOIN term_counts USING (sha256) WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            text = None
+            if row is not None:
+                try:
+                    with open(self._blob_path(sha256), encoding="utf-8") as f:
+                        text = f.read()
+                except FileNotFoundError:
+                    pass
+            if text is None:
+                self.document_misses += 1
+                return None
+            db.execute("UPDATE documents SET hits = hits + 1, last_used_at = ? WHERE sha256 = ?", (time.time(), sha256))
+            db.commit()
+            self.document_hits += 1
+        kind, page_count, truncated, extract_seconds, counts = row
+        return ExtractedDocument(text=text, kind=kind, page_count=page_count, truncated=bool(truncated),
+                                 elapsed=extract_seconds, term_counts=json.loads(counts) if counts else None)
+
+    def put_document(self, sha256: str, filename: str, byte_size: int, document: ExtractedDocument):
+        path = self._blob_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        encoded = document.text.encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(encoded)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT INTO documents (sha256, filename, kind, byte_size, text_bytes, page_count, truncated, "
+                "extract_seconds, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                # An upsert rather than REPLACE, which would cascade-delete the document's screens
+                "ON CONFLICT (sha256) DO UPDATE SET text_bytes = excluded.text_bytes, "
+                "last_used_at = excluded.last_used_at",
+                (sha256, filename, document.kind, byte_size, len(encoded), document.page_count,
+                 int(document.truncated), document.elapsed, now, now),
+            )
+            counts = document.term_counts if document.term_counts is not None else count_terms(document.text)
+            db.execute("INSERT OR REPLACE INTO term_counts (sha256, counts) VALUES (?, ?)",
+                       (sha256, json.dumps(counts)))
+            db.commit()
+            self._text_bytes += len(encoded)
+            due = self._text_bytes > self.max_bytes or now - self._swept_at > self.sweep_seconds
+        if due:
+            self.enforce_retention()
+
+    def get_screen(self, sha256: str, jd_hash: str, model: str):
+        """Prior screen result for this CV against this JD, or None"""
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT result FROM screens WHERE sha256 = ? AND jd_hash = ? AND model = ?", (sha256, jd_hash, model)
+            ).fetchone()
+            if row is None:
+                self.screen_misses += 1
+                return None
+            db.execute("UPDATE documents SET last_used_at = ? WHERE sha256 = ?", (time.time(), sha256))
+            db.commit()
+            self.screen_hits += 1
+        return json.loads(row[0])
+
+    def put_screen(self, sha256: str, jd_hash: str, model: str, result: dict):
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO screens (sha256, jd_hash, model, result, created_at) VALUES (?, ?, ?, ?, ?)",
+                (sha256, jd_hash, model, json.dumps(result), time.time()),
+            )
+            db.commit()
+
+    def enforce_retention(self) -> int:
+        """Drop expired documents, then least recently used ones until under max_bytes; returns the count removed"""
+        with self._lock:
+            db = self._db()
+            self._swept_at = time.time()
+            cutoff = self._swept_at - self.retention_days * 86400
+            doomed = [row[0] for row in db.execute("SELECT sha256 FROM documents WHERE last_used_at < ?", (cutoff,))]
+            total = db.execute("SELECT COALESCE(SUM(text_bytes), 0) FROM documents WHERE last_used_at >= ?",
+                               (cutoff,)).fetchone()[0]
+            if total > self.max_bytes:
+                for sha256, text_bytes in db.execute(
+                    "SELECT sha256, text_bytes FROM documents WHERE last_used_at >= ? ORDER BY last_used_at", (cutoff,)
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append(sha256)
+                    total -= text_bytes
+            self._text_bytes = total
+            if not doomed:
+                return 0
+            db.executemany("DELETE FROM documents WHERE sha256 = ?", [(sha256,) for sha256 in doomed])
+            db.commit()
+        for sha256 in doomed:
+            try:
+                os.remove(self._blob_path(sha256))
+            except FileNotFoundError:
+                pass
+        return len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db()
+            documents, text_bytes, upload_bytes = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(text_bytes), 0), COALESCE(SUM(byte_size), 0) FROM documents"
+            ).fetchone()
+            screens = db.execute("SELECT COUNT(*) FROM screens").fetchone()[0]
+        document_lookups = self.document_hits + self.document_misses
+        screen_lookups = self.screen_hits + self.screen_misses
+        return {
+            "documents": documents,
+            "screens": screens,
+            "text_bytes": text_bytes,
+            "upload_bytes": upload_bytes,
+            "max_bytes": self.max_bytes,
+            "retention_days": self.retention_days,
+            "document_hits": self.document_hits,
+            "document_misses": self.document_misses,
+            "document_hit_ratio": round(self.document_hits / document_lookups, 4) if document_lookups else 0.0,
+            "screen_hits": self.screen_hits,
+            "screen_misses": self.screen_misses,
+            "screen_hit_ratio": round(self.screen_hits / screen_lookups, 4) if screen_lookups else 0.0,
+        }
+
+
+# Singleton instance
+document_store = DocumentStore()
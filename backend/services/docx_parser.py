@@ -1,16 +1,56 @@
-from docx import Document
 from io import BytesIO
+from services.lazy_import import lazy_import
 
-def extract_text_from_docx(file_bytes: bytes) -> str:
-    """Extract text from DOCX file bytes"""
+docx = lazy_import("docx")
+docx_table = lazy_import("docx.table")
+docx_paragraph = lazy_import("docx.text.paragraph")
+
+def _table_text(table) -> str:
+    """Render a table row by row with cells separated by ' | '"""
+    rows = []
+    for row in table.rows:
+        cells, seen = [], set()
+        for cell in row.cells:
+            # Merged cells repeat the same underlying <w:tc> across the span
+            if id(cell._tc) in seen:
+                continue
+            seen.add(id(cell._tc))
+            text = cell.text.strip()
+            if text:
+                cells.append(text)
+        if cells:
+            rows.append(" | ".join(cells))
+    return "\n".join(rows)
+
+def _iter_block_text(element, parent):
+    """Yield paragraph and table text of a document body, header or footer in document order"""
+    for child in element.iterchildren():
+        if child.tag.endswith('}p'):
+            yield docx_paragraph.Paragraph(child, parent).text
+        elif child.tag.endswith('}tbl'):
+            yield _table_text(docx_table.Table(child, parent))
+
+def iter_docx_blocks(file_bytes: bytes):
+    """Yield DOCX text block by block: headers, body paragraphs and tables, then footers"""
     try:
-        docx_file = BytesIO(file_bytes)
-        doc = Document(docx_file)
-        
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
-        return text.strip()
+        doc = docx.Document(BytesIO(file_bytes))
+
+        # Sections usually share one header/footer; only emit each distinct part once
+        seen_parts = set()
+        headers, footers = [], []
+        for section in doc.sections:
+            for part, target in ((section.header, headers), (section.footer, footers)):
+                if part.is_linked_to_previous or id(part.part) in seen_parts:
+                    continue
+                seen_parts.add(id(part.part))
+                target.append("\n".join(t for t in _iter_block_text(part._element, part) if t.strip()))
+
+        yield from (h for h in headers if h)
+        yield from _iter_block_text(doc.element.body, doc._body)
+        yield from (f for f in footers if f)
     except Exception as e:
         raise Exception(f"Error parsing DOCX: {str(e)}")
+
+def extract_text_from_docx(file_bytes: bytes) -> str:
+    """Extract text from DOCX file bytes"""
+    return "\n".join(iter_docx_blocks(file_bytes)).strip()
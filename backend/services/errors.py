@@ -0,0 +1,65 @@
+class ServiceError(Exception):
+    """Base class for service failures that map onto a specific HTTP status"""
+    status_code = 500
+
+    def __init__(self, message: str, headers: dict = None):
+        super().__init__(message)
+        self.headers = headers
+
+
+class GeminiError(ServiceError):
+    """Base class for Gemini failures"""
+    status_code = 502
+
+
+class GeminiTimeoutError(GeminiError):
+    """A Gemini call exceeded its per-call time budget"""
+    status_code = 504
+
+
+class GeminiNotConfigured(GeminiError):
+    """No Gemini API key is configured, so model calls cannot be made"""
+    status_code = 503
+
+
+class RateLimited(GeminiError):
+    """Gemini capacity is exhausted; the client should retry after ``retry_after`` seconds"""
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message, headers={"Retry-After": str(max(1, round(retry_after)))})
+        self.retry_after = retry_after
+
+
+class DocumentError(ServiceError):
+    """An uploaded document could not be parsed"""
+    status_code = 422
+
+
+class UnsupportedDocument(DocumentError):
+    """The upload is not a PDF or DOCX file"""
+    status_code = 400
+
+
+class DocumentTooLarge(DocumentError):
+    """The upload exceeds the configured byte limit"""
+    status_code = 413
+
+
+class AudioError(ServiceError):
+    """An uploaded audio recording cannot be analyzed"""
+    status_code = 400
+
+
+class UnsupportedAudio(AudioError):
+    """The upload is not a recognizable audio format"""
+    status_code = 415
+
+
+class AudioTooLarge(AudioError):
+    """The recording exceeds the configured byte limit"""
+    status_code = 413
+
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before the work finished"""
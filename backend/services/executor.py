@@ -0,0 +1,69 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from services.errors import GeminiTimeoutError, ClientDisconnected
+
+GEMINI_MAX_WORKERS = int(os.getenv("GEMINI_MAX_WORKERS", "16"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "120"))
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class GeminiExecutor:
+    """Runs Gemini SDK calls without blocking the event loop.
+
+    Coroutines (the SDK's ``*_async`` methods) are awaited directly; blocking
+    SDK functions such as ``genai.upload_file`` are pushed onto a bounded
+    thread pool. Every call is subject to a timeout.
+    """
+
+    def __init__(self, max_workers: int = GEMINI_MAX_WORKERS, timeout: float = GEMINI_TIMEOUT_SECONDS):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+
+    async def run(self, awaitable, timeout: float = None):
+        """Await a coroutine with the per-call timeout"""
+        timeout = timeout or self.timeout
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            raise GeminiTimeoutError(f"Gemini call timed out after {timeout:g}s")
+
+    async def run_sync(self, func, *args, timeout: float = None, on_abandoned=None, **kwargs):
+        """Run a blocking function on the thread pool with the per-call timeout.
+
+        On timeout or cancellation the caller is released immediately; the
+        worker thread finishes in the background and its result is dropped,
+        or passed to ``on_abandoned`` so whatever it created can be released.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+        if on_abandoned is None:
+            return await self.run(future, timeout=timeout)
+        try:
+            return await self.run(asyncio.shield(future), timeout=timeout)
+        except (asyncio.CancelledError, GeminiTimeoutError):
+            future.add_done_callback(
+                lambda done: None if done.cancelled() or done.exception() else on_abandoned(done.result())
+            )
+            raise
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def cancel_on_disconnect(request, awaitable):
+    """Await ``awaitable`` but cancel it as soon as the HTTP client disconnects"""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected("Client disconnected before the response was ready")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,195 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from services.errors import DocumentError, DocumentTooLarge, UnsupportedDocument
+from services.metrics import stage
+from services.lazy_import import preload
+from services.pdf_parser import open_pdf, iter_pdf_pages, count_pdf_pages
+from services.docx_parser import iter_docx_blocks
+from services.prompt_prep import strip_repeated_lines
+from services.prefilter import count_terms
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 2)))
+EXTRACTION_MAX_BYTES = int(os.getenv("EXTRACTION_MAX_BYTES", str(10 * 1024 * 1024)))
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "50"))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "20"))
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+
+@dataclass
+class ExtractedDocument:
+    """Text pulled out of a CV plus what the parser saw along the way"""
+    text: str
+    pages: list = field(default_factory=list)
+    kind: str = ""
+    page_count: int = 0
+    truncated: bool = False
+    elapsed: float = 0.0
+    term_counts: dict = None  # BM25 term frequencies of ``text``, counted in the worker
+
+
+def document_kind(filename: str) -> str:
+    """'pdf' or 'docx' for a supported upload; raises UnsupportedDocument otherwise"""
+    if filename and filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        return os.path.splitext(filename)[1].lower().lstrip('.')
+    raise UnsupportedDocument("Only PDF and DOCX files are supported")
+
+
+def _extract(kind: str, file_bytes: bytes, max_pages: int, time_budget: float) -> ExtractedDocument:
+    """Parse a document page by page (PDF) or block by block (DOCX) within a time budget.
+
+    Runs inside a worker process, so it only touches picklable arguments.
+    """
+    started = time.monotonic()
+    deadline = started + time_budget
+    try:
+        if kind == "pdf":
+            # One reader for both, so the document is only parsed once
+            reader = open_pdf(file_bytes)
+            page_count = count_pdf_pages(file_bytes, reader=reader)
+            chunks = iter_pdf_pages(file_bytes, max_pages, reader=reader)
+        else:
+            page_count = 0
+            chunks = iter_docx_blocks(file_bytes)
+
+        pages = []
+        for chunk in chunks:
+            pages.append(chunk)
+            if time.monotonic() > deadline:
+                raise DocumentError(f"Document extraction exceeded its {time_budget:g}s budget")
+    except DocumentError:
+        raise
+    except Exception as e:
+        raise DocumentError(str(e))
+
+    if kind == "docx":
+        page_count = len(pages)
+        text = "\n".join(pages)
+    else:
+        # Page boundaries are only known here, so running headers and footers are dropped before pages are joined
+        text = "\n".join(strip_repeated_lines(pages))
+    text = text.strip()
+    return ExtractedDocument(
+        text=text,
+        pages=pages,
+        kind=kind,
+        page_count=page_count,
+        truncated=kind == "pdf" and page_count > max_pages,
+        elapsed=time.monotonic() - started,
+        term_counts=count_terms(text),
+    )
+
+
+class DocumentExtractor:
+    """Runs PDF/DOCX text extraction in worker processes so parsing never holds the event loop.
+
+    Uploads above ``max_bytes`` are rejected, PDFs are cut off after
+    ``max_pages`` and each document gets ``timeout`` seconds once a worker
+    picks it up; documents beyond ``workers`` wait for a free one without
+    using their budget. Each worker is its own single-process pool, so one
+    stuck on a pathological page is killed and replaced without touching the
+    documents on the others. With ``workers=0`` extraction runs on a thread
+    instead, for constrained hosts.
+    """
+
+    def __init__(self, workers: int = EXTRACTION_WORKERS, max_bytes: int = EXTRACTION_MAX_BYTES,
+                 max_pages: int = EXTRACTION_MAX_PAGES, timeout: float = EXTRACTION_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self._slots = [None] * max(workers, 0)
+        self._idle = None
+        self._loop = None
+
+    def _idle_slots(self) -> asyncio.Queue:
+        # The queue belongs to one event loop; tests and the benchmarks each run their own
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._idle = loop, asyncio.Queue()
+            for index in range(len(self._slots)):
+                self._idle.put_nowait(index)
+        return self._idle
+
+    async def _worker(self, index: int) -> ProcessPoolExecutor:
+        """The slot's worker, spawned (and its parsers imported) first if needed, outside any document's budget"""
+        if self._slots[index] is None:
+            # spawn keeps workers independent of the server's threads and event loop
+            worker = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            self._slots[index] = worker
+            try:
+                await asyncio.get_running_loop().run_in_executor(worker, preload)
+            except BaseException:
+                self._replace(index)
+                raise
+        return self._slots[index]
+
+    def _replace(self, index: int):
+        worker, self._slots[index] = self._slots[index], None
+        if worker is None:
+            return
+        # ProcessPoolExecutor cannot cancel a running task; terminating the process is the only hard stop
+        for process in list(getattr(worker, "_processes", {}).values()):
+            process.terminate()
+        worker.shutdown(wait=False, cancel_futures=True)
+
+    async def warm_up(self):
+        """Start the worker processes and import the parsers in each, ahead of the first upload"""
+        if self.workers <= 0:
+            await asyncio.to_thread(preload)
+            return
+        await asyncio.gather(*[self._worker(index) for index in range(self.workers)])
+
+    async def _run(self, index: int, args: tuple) -> ExtractedDocument:
+        # A worker that died under another cause (OOM kill, crash) is replaced and the document tried once more
+        for attempt in range(2):
+            future = asyncio.get_running_loop().run_in_executor(await self._worker(index), _extract, *args)
+            try:
+                # The worker enforces the budget between pages; the grace period covers a hung page
+                return await asyncio.wait_for(future, self.timeout + 1)
+            except asyncio.TimeoutError:
+                self._replace(index)
+                raise DocumentError(f"Document extraction exceeded its {self.timeout:g}s budget")
+            except BrokenProcessPool:
+                self._replace(index)
+            except asyncio.CancelledError:
+                # Nobody waits for the result any more; free the worker for the next document
+                self._replace(index)
+                raise
+        raise DocumentError("Document extraction crashed its worker")
+
+    async def extract(self, filename: str, file_bytes: bytes) -> ExtractedDocument:
+        """Extract text from an uploaded PDF or DOCX"""
+        kind = document_kind(filename)
+        if len(file_bytes) > self.max_bytes:
+            raise DocumentTooLarge(f"{filename} exceeds the {self.max_bytes} byte limit")
+
+        args = (kind, file_bytes, self.max_pages, self.timeout)
+        with stage("extraction"):
+            if self.workers <= 0:
+                return await asyncio.to_thread(_extract, *args)
+
+            idle = self._idle_slots()
+            index = await idle.get()
+            try:
+                return await self._run(index, args)
+            finally:
+                idle.put_nowait(index)
+
+    async def extract_text(self, filename: str, file_bytes: bytes) -> str:
+        return (await self.extract(filename, file_bytes)).text
+
+    def shutdown(self):
+        for index, worker in enumerate(self._slots):
+            if worker is not None:
+                worker.shutdown(wait=False, cancel_futures=True)
+                self._slots[index] = None
+
+
+# Singleton instance
+document_extractor = DocumentExtractor()
@@ -1,28 +1,254 @@
+import asyncio
+import contextlib
+import json
 import os
-from dotenv import load_dotenv
-import google.generativeai as genai
+import time
+from services.errors import GeminiError, GeminiNotConfigured, GeminiTimeoutError
+from services.executor import GeminiExecutor
+from services.cache import create_response_cache, make_cache_key
+from services.json_stream import JSONArrayStreamParser
+from services.structured_output import StructuredOutputError, parse_structured, repair_prompt
+from services.batching import GEMINI_BATCHING, MicroBatcher, estimate_tokens, indexed
+from services.rate_limit import create_limiter, estimate_contents_tokens, quota_errors, transient_errors
+from services.model_router import ModelRouter, Route, JD, JD_PROFILE, SCREEN, QUIZ_GEN, QUIZ_EVAL, AUDIO
+from services.audio_ingest import RemoteFileCleanup, audio_metrics, slice_wav, WAV_MIME_TYPES
+from services.metrics import stage, record_gemini_exchange
+from services.prompt_prep import prompt_compactor, normalize_text
+from services.lazy_import import lazy_import
+from services.audio_segments import (AUDIO_SEGMENT_SECONDS, AUDIO_SEGMENT_OVERLAP_SECONDS, AUDIO_SEGMENT_CONCURRENCY,
+                                     AUDIO_SEGMENT_RETRIES, AUDIO_CHUNKED_MIN_SECONDS, AUDIO_WINDOW_WHOLE_FILE,
+                                     format_timestamp, plan_windows,
+                                     merge_segments)
+from models.schemas import JDRequirements, CVScreenResponse, Question, QuizResponse, QuizEvaluationResponse, AudioAnalysisResponse
 
-load_dotenv()
+# The SDK takes about a second to import; it is loaded on the first model call, or by the startup pre-warm
+genai = lazy_import("google.generativeai")
 
 class GeminiClient:
+    """Gemini calls for every feature of the app.
+
+    Constructing the client is free: the SDK is imported and models are
+    configured on first use (or by ``warm_up``), so importing the app needs
+    neither the SDK nor an API key. Each task is answered by the model its
+    route names (see ModelRouter), with a fallback model when the primary
+    times out or is overloaded.
+    """
+
     def __init__(self):
+        self.router = ModelRouter()
+        # Assigning ``model`` pins one model for every task; tests and the offline benchmarks swap in stand-ins this way
+        self._model = None
+        self._models = {}
+        self._configured = False
+        self.executor = GeminiExecutor()
+        self.limiter = create_limiter()
+        # Looked up per call so scheduling a deletion does not import the SDK
+        self.remote_files = RemoteFileCleanup(lambda name: genai.delete_file(name))
+        self.cache = create_response_cache()
+        # Opt-in: coalesce concurrent screens of one JD, and quiz generations, into single calls
+        self.batching = GEMINI_BATCHING
+        self.screen_batcher = MicroBatcher(self._run_screen_batch)
+        self.quiz_batcher = MicroBatcher(self._run_quiz_batch)
+
+    @property
+    def model(self):
+        route = self.router.route(JD)
+        return self._model_for(route.model, route)
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    @property
+    def configured(self) -> bool:
+        return self._model is not None or self._configured
+
+    def _configure(self):
+        if self._configured:
+            return
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        
+            raise GeminiNotConfigured("GEMINI_API_KEY not found in environment variables")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-    
-    async def generate_content(self, prompt: str) -> str:
+        self._configured = True
+
+    def _model_for(self, name: str, route: Route, scale: int = 1):
+        """Model ``name`` with the route's generation config, built once per distinct config"""
+        if self._model is not None:
+            return self._model
+        config = route.generation_config(scale)
+        key = (name, config["max_output_tokens"], config["temperature"])
+        model = self._models.get(key)
+        if model is None:
+            self._configure()
+            model = self._models[key] = genai.GenerativeModel(name, generation_config=config)
+        return model
+
+    def model_name_for(self, task: str) -> str:
+        return self.router.route(task).model
+
+    def warm_up(self):
+        """Import the SDK and configure every route's model now instead of on the first request"""
+        return [self._model_for(route.model, route) for route in self.router.routes.values()]
+
+    async def _call_model(self, name: str, route: Route, contents, scale: int = 1, stream: bool = False):
+        """One call of model ``name`` with the route's settings, timed into the router's stats.
+
+        Natively async when the SDK supports it, otherwise on the thread pool.
+        """
+        model = self._model_for(name, route, scale)
+        generate_async = getattr(model, "generate_content_async", None)
+        started = time.perf_counter()
+        try:
+            if generate_async is not None:
+                call = generate_async(contents, stream=True) if stream else generate_async(contents)
+                response = await self.executor.run(call, timeout=route.timeout)
+            else:
+                response = await self.executor.run_sync(model.generate_content, contents, timeout=route.timeout)
+        except Exception as e:
+            self.router.record(name, route.task, time.perf_counter() - started, error=e,
+                               timed_out=isinstance(e, GeminiTimeoutError))
+            raise
+        # A stream is timed until it opens; its usage is not known yet
+        self.router.record(name, route.task, time.perf_counter() - started, response=None if stream else response)
+        return response
+
+    async def _routed_call(self, route: Route, contents, scale: int = 1, stream: bool = False):
+        """Call the route's model, switching to its fallback when the primary times out or is overloaded"""
+        try:
+            return await self._call_model(route.model, route, contents, scale, stream)
+        except (GeminiTimeoutError, *quota_errors(), *transient_errors()):
+            # A pinned model answers every task, so there is nothing to fall back to
+            if not route.fallback or route.fallback == route.model or self._model is not None:
+                raise
+            self.router.record_fallback(route.model, route.task)
+            return await self._call_model(route.fallback, route, contents, scale, stream)
+
+    async def _generate(self, contents, task: str, scale: int = 1):
+        """Call the model routed for ``task``; ``scale`` raises its output cap for a batch of that many requests.
+
+        Every call goes through the rate limiter, which retries quota and
+        transient server errors the fallback model could not absorb.
+        """
+        route = self.router.route(task)
+        with stage("gemini_call"):
+            response = await self.limiter.call(lambda: self._routed_call(route, contents, scale),
+                                               estimate_contents_tokens(contents))
+        record_gemini_exchange(contents, response)
+        return response
+
+    async def generate_content(self, prompt: str, task: str, scale: int = 1) -> str:
         """Generate content using Gemini API"""
         try:
-            response = self.model.generate_content(prompt)
+            response = await self._generate(prompt, task, scale)
             return response.text
+        except GeminiError:
+            raise
         except Exception as e:
             raise Exception(f"Gemini API error: {str(e)}")
+
+    async def _generate_stream(self, contents, task: str):
+        """Yield response text chunks, natively streamed when the SDK supports it"""
+        route = self.router.route(task)
+        if getattr(self._model_for(route.model, route), "generate_content_async", None) is None:
+            response = await self._generate(contents, task)
+            yield response.text
+            return
+
+        with stage("gemini_stream"):
+            # Only opening the stream is rate limited and retried; a failure mid-stream is surfaced as is
+            response = await self.limiter.call(lambda: self._routed_call(route, contents, stream=True),
+                                               estimate_contents_tokens(contents))
+            chunks = response.__aiter__()
+            while True:
+                # The timeout applies to the gap between chunks, not the whole generation
+                try:
+                    chunk = await self.executor.run(chunks.__anext__(), timeout=route.timeout)
+                except StopAsyncIteration:
+                    return
+                if chunk.text:
+                    yield chunk.text
+
+    async def stream_content(self, prompt: str, task: str, use_cache: bool = True):
+        """Stream generated text; a cached response is replayed as a single chunk"""
+        key = make_cache_key(prompt, self.model_name_for(task))
+        cached = await self.cache.lookup(key) if use_cache else None
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        try:
+            async for chunk in self._generate_stream(prompt, task):
+                chunks.append(chunk)
+                yield chunk
+        except GeminiError:
+            raise
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+        await self.cache.store(key, "".join(chunks))
+
+    async def _generate_cached(self, prompt: str, task: str, use_cache: bool) -> str:
+        """Serve repeat prompts from the response cache; ``use_cache=False`` forces a fresh call"""
+        key = make_cache_key(prompt, self.model_name_for(task))
+        return await self.cache.get_or_compute(key, lambda: self.generate_content(prompt, task),
+                                               bypass=not use_cache)
+
+    async def _parse_or_repair(self, response: str, schema, task: str, many: bool = False, prompt: str = None):
+        """Validate a response into ``schema``, with one repair round trip when it does not fit.
+
+        When ``prompt`` is given, the repaired response replaces the unusable
+        one in the response cache.
+        """
+        try:
+            return parse_structured(response, schema, many)
+        except StructuredOutputError as e:
+            repaired = await self.generate_content(repair_prompt(response, schema, many, e), task)
+            result = parse_structured(repaired, schema, many)
+            if prompt is not None:
+                await self.cache.store(make_cache_key(prompt, self.model_name_for(task)), repaired)
+            return result
+
+    async def _submit_batched(self, batcher: MicroBatcher, key, item, prompt: str, schema, task: str, many: bool,
+                              use_cache: bool):
+        """Answer one request through a micro-batch, sharing the cache entry its unbatched prompt would use.
+
+        The batch call goes through the response cache like an unbatched one, so identical requests in flight
+        at once join a single batch entry instead of each taking a place in the batch.
+        """
+        async def compute() -> str:
+            result = await batcher.submit(key, item, estimate_tokens(prompt))
+            if many:
+                return json.dumps([entry.model_dump() for entry in result])
+            return result.model_dump_json()
+
+        cache_key = make_cache_key(prompt, self.model_name_for(task))
+        response = await self.cache.get_or_compute(cache_key, compute, bypass=not use_cache)
+        # Each caller gets its own parsed copy; a fresh entry was serialized from a validated model, so it parses
+        return await self._parse_or_repair(response, schema, task, many, prompt=prompt)
+
+    async def _fan_out(self, response: str, schema, task: str, count: int, unbatched):
+        """Hand each request its own entry of an indexed batch response.
+
+        Entries the model dropped or numbered wrongly are retried one by one
+        with ``unbatched(position)``.
+        """
+        try:
+            entries = await self._parse_or_repair(response, indexed(schema), task, many=True)
+        except StructuredOutputError:
+            entries = []
+        by_index = {entry.index: entry for entry in entries}
+
+        async def resolve(position: int):
+            entry = by_index.get(position)
+            if entry is None:
+                return await unbatched(position)
+            return schema(**entry.model_dump(exclude={"index"}))
+
+        return await asyncio.gather(*[resolve(position) for position in range(count)], return_exceptions=True)
     
-    async def generate_jd(self, role: str, skills: list, experience_level: str, company_type: str = None) -> dict:
-        """Generate a job description"""
+    @stage("prompt_build")
+    def _jd_prompt(self, role: str, skills: list, experience_level: str, company_type: str = None) -> str:
         skills_str = ", ".join(skills)
         company_info = f" for a {company_type} company" if company_type else ""
         
@@ -41,9 +267,9 @@ Please provide:
 6. Benefits (if applicable)
 
 Make it professional, unbiased, and attractive to candidates. Format it in a clean, readable way."""
+        return prompt
 
-        content = await self.generate_content(prompt)
-        
+    def _parse_jd(self, content: str) -> dict:
         # Extract title (first line usually)
         lines = content.strip().split('\n')
         title = lines[0].replace('**', '').replace('#', '').strip()
@@ -52,9 +278,53 @@ Make it professional, unbiased, and attractive to candidates. Format it in a cle
             "title": title,
             "job_description": content
         }
+
+    async def generate_jd(self, role: str, skills: list, experience_level: str, company_type: str = None,
+                          use_cache: bool = True) -> dict:
+        """Generate a job description"""
+        prompt = self._jd_prompt(role, skills, experience_level, company_type)
+        content = await self._generate_cached(prompt, JD, use_cache)
+        return self._parse_jd(content)
+
+    async def stream_jd(self, role: str, skills: list, experience_level: str, company_type: str = None,
+                        use_cache: bool = True):
+        """Stream a job description: ("token", text) events, then ("result", dict) as generate_jd returns"""
+        prompt = self._jd_prompt(role, skills, experience_level, company_type)
+        chunks = []
+        async for chunk in self.stream_content(prompt, JD, use_cache):
+            chunks.append(chunk)
+            yield "token", chunk
+        yield "result", self._parse_jd("".join(chunks))
     
-    async def screen_cv(self, cv_text: str, jd_text: str) -> dict:
-        """Screen a CV against a job description"""
+    @stage("prompt_build")
+    def _jd_profile_prompt(self, jd_text: str) -> str:
+        prompt = f"""You are an expert HR recruiter. Extract the hiring requirements from the following job description.
+
+Job Description:
+{jd_text}
+
+Provide them in the following JSON format:
+{{
+    "title": "job title",
+    "seniority": "entry/mid/senior/lead",
+    "min_years_experience": <number, or null if not stated>,
+    "must_haves": ["requirement1", "requirement2", ...],
+    "skills": ["skill1", "skill2", ...],
+    "nice_to_haves": ["skill1", "skill2", ...],
+    "responsibilities": ["responsibility1", "responsibility2", ...]
+}}
+
+Keep every item to a few words. List under must_haves only what the description states as required."""
+        return prompt
+
+    async def extract_jd_requirements(self, jd_text: str, use_cache: bool = True) -> JDRequirements:
+        """Extract a JD's title, seniority, must-haves and skills, to screen many CVs against"""
+        prompt = self._jd_profile_prompt(normalize_text(jd_text))
+        response = await self._generate_cached(prompt, JD_PROFILE, use_cache)
+        return await self._parse_or_repair(response, JDRequirements, JD_PROFILE, prompt=prompt)
+
+    @stage("prompt_build")
+    def _screen_prompt(self, cv_text: str, jd_text: str) -> str:
         prompt = f"""You are an expert HR recruiter. Analyze the following CV against the job description and provide:
 
 1. A match score (0-100) based on skills, experience, and qualifications
@@ -79,39 +349,65 @@ Provide your analysis in the following JSON format:
     "confidence_analysis": "analysis text",
     "recommendation": "your recommendation here"
 }}"""
+        return prompt
 
-        response = await self.generate_content(prompt)
-        
-        # Parse JSON from response
-        import json
-        import re
-        
-        # Extract JSON from markdown code blocks if present
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Try to find JSON object in the response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            json_str = json_match.group(0) if json_match else response
-        
-        try:
-            result = json.loads(json_str)
-            return result
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            return {
-                "match_score": 50,
-                "strengths": ["Unable to parse detailed analysis"],
-                "gaps": ["Please review manually"],
-                "confidence_level": "Medium",
-                "confidence_analysis": "Unable to analyze confidence due to parsing error.",
-                "recommendation": response
-            }
-    
-        
-    async def generate_tech_questions(self, role: str, skill_level: str, num_questions: int = 5) -> list:
-        """Generate technical assessment questions"""
+    @stage("prompt_build")
+    def _screen_batch_prompt(self, cv_texts: list, jd_text: str) -> str:
+        cvs = "\n\n".join(f"Candidate CV #{index}:\n{cv_text}" for index, cv_text in enumerate(cv_texts))
+        prompt = f"""You are an expert HR recruiter. Analyze each of the following {len(cv_texts)} CVs independently against the job description and provide, for each CV:
+
+1. A match score (0-100) based on skills, experience, and qualifications
+2. Top 3-5 strengths (what makes this candidate a good fit)
+3. Top 3-5 gaps (what's missing or weak)
+4. Confidence Level (High/Medium/Low) based on writing style/tone
+5. Brief confidence analysis (why you assigned that level)
+6. A brief recommendation (hire/interview/reject with reasoning)
+
+Job Description:
+{jd_text}
+
+{cvs}
+
+Provide your analysis as a JSON array with exactly one object per CV, where "index" is the CV number:
+[
+    {{
+        "index": <CV number>,
+        "match_score": <number 0-100>,
+        "strengths": ["strength1", "strength2", ...],
+        "gaps": ["gap1", "gap2", ...],
+        "confidence_level": "High/Medium/Low",
+        "confidence_analysis": "analysis text",
+        "recommendation": "your recommendation here"
+    }},
+    ...
+]"""
+        return prompt
+
+    async def _screen_unbatched(self, cv_text: str, jd_text: str, use_cache: bool) -> CVScreenResponse:
+        prompt = self._screen_prompt(cv_text, jd_text)
+        response = await self._generate_cached(prompt, SCREEN, use_cache)
+        return await self._parse_or_repair(response, CVScreenResponse, SCREEN, prompt=prompt)
+
+    async def _run_screen_batch(self, jd_text: str, cv_texts: list) -> list:
+        if len(cv_texts) == 1:
+            return [await self._screen_unbatched(cv_texts[0], jd_text, use_cache=False)]
+        response = await self.generate_content(self._screen_batch_prompt(cv_texts, jd_text), SCREEN,
+                                               scale=len(cv_texts))
+        return await self._fan_out(response, CVScreenResponse, SCREEN, len(cv_texts),
+                                   lambda i: self._screen_unbatched(cv_texts[i], jd_text, use_cache=False))
+
+    async def screen_cv(self, cv_text: str, jd_text: str, use_cache: bool = True) -> CVScreenResponse:
+        """Screen a CV against a job description"""
+        with stage("prompt_compaction"):
+            cv_text, jd_text = prompt_compactor.screening_inputs(cv_text, jd_text)
+        if self.batching:
+            prompt = self._screen_prompt(cv_text, jd_text)
+            return await self._submit_batched(self.screen_batcher, jd_text, cv_text, prompt, CVScreenResponse,
+                                              SCREEN, many=False, use_cache=use_cache)
+        return await self._screen_unbatched(cv_text, jd_text, use_cache)
+
+    @stage("prompt_build")
+    def _quiz_prompt(self, role: str, skill_level: str, num_questions: int) -> str:
         prompt = f"""Generate {num_questions} technical interview questions for a {role} position at {skill_level} level.
 
 For each question, provide:
@@ -132,38 +428,80 @@ Format as JSON array:
 ]
 
 Make questions practical, relevant, and appropriate for the skill level."""
+        return prompt
 
-        response = await self.generate_content(prompt)
-        
-        # Parse JSON from response
-        import json
-        import re
-        
-        # Extract JSON array from markdown code blocks if present
-        json_match = re.search(r'```(?:json)?\s*(\[.*?\])\s*```', response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Try to find JSON array in the response
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            json_str = json_match.group(0) if json_match else "[]"
-        
-        try:
-            questions = json.loads(json_str)
-            return questions
-        except json.JSONDecodeError:
-            # Fallback questions
-            return [
-                {
-                    "question": "Unable to generate questions. Please try again.",
-                    "answer": "N/A",
-                    "difficulty": "medium",
-                    "topic": "General"
-                }
-            ]
-
-    async def evaluate_quiz(self, answers: list) -> dict:
-        """Evaluate quiz answers"""
+    @stage("prompt_build")
+    def _quiz_batch_prompt(self, requests: list) -> str:
+        listed = "\n".join(
+            f"Request #{index}: {num_questions} questions for a {role} position at {skill_level} level"
+            for index, (role, skill_level, num_questions) in enumerate(requests)
+        )
+        prompt = f"""Generate technical interview questions for each of the following {len(requests)} requests:
+
+{listed}
+
+For each question, provide:
+1. The question itself
+2. The correct answer (concise explanation)
+3. Difficulty level (easy/medium/hard)
+4. Topic/skill being tested
+
+Format as a JSON array with exactly one object per request, where "index" is the request number:
+[
+    {{
+        "index": <request number>,
+        "questions": [
+            {{
+                "question": "question text",
+                "answer": "answer text",
+                "difficulty": "easy/medium/hard",
+                "topic": "topic name"
+            }},
+            ...
+        ]
+    }},
+    ...
+]
+
+Make questions practical, relevant, and appropriate for each skill level."""
+        return prompt
+
+    async def _quiz_unbatched(self, role: str, skill_level: str, num_questions: int, use_cache: bool) -> list:
+        prompt = self._quiz_prompt(role, skill_level, num_questions)
+        response = await self._generate_cached(prompt, QUIZ_GEN, use_cache)
+        return await self._parse_or_repair(response, Question, QUIZ_GEN, many=True, prompt=prompt)
+
+    async def _run_quiz_batch(self, key, requests: list) -> list:
+        if len(requests) == 1:
+            return [await self._quiz_unbatched(*requests[0], use_cache=False)]
+        response = await self.generate_content(self._quiz_batch_prompt(requests), QUIZ_GEN, scale=len(requests))
+        results = await self._fan_out(response, QuizResponse, QUIZ_GEN, len(requests),
+                                      lambda i: self._quiz_unbatched(*requests[i], use_cache=False))
+        return [result if isinstance(result, BaseException) else result.questions for result in results]
+
+    async def generate_tech_questions(self, role: str, skill_level: str, num_questions: int = 5,
+                                      use_cache: bool = True) -> list:
+        """Generate technical assessment questions as validated Question models"""
+        if self.batching:
+            prompt = self._quiz_prompt(role, skill_level, num_questions)
+            return await self._submit_batched(self.quiz_batcher, "quiz", (role, skill_level, num_questions), prompt,
+                                              Question, QUIZ_GEN, many=True, use_cache=use_cache)
+        return await self._quiz_unbatched(role, skill_level, num_questions, use_cache)
+
+    async def stream_tech_questions(self, role: str, skill_level: str, num_questions: int = 5,
+                                    use_cache: bool = True):
+        """Stream a quiz: a ("question", dict) event as each JSON object closes, then ("result", list)"""
+        prompt = self._quiz_prompt(role, skill_level, num_questions)
+        parser = JSONArrayStreamParser()
+        chunks = []
+        async for chunk in self.stream_content(prompt, QUIZ_GEN, use_cache):
+            chunks.append(chunk)
+            for question in parser.feed(chunk):
+                yield "question", question
+        yield "result", await self._parse_or_repair("".join(chunks), Question, QUIZ_GEN, many=True, prompt=prompt)
+
+    @stage("prompt_build")
+    def _evaluation_prompt(self, answers: list) -> str:
         answers_text = "\n\n".join([f"Q: {a['question']}\nA: {a['answer']}" for a in answers])
         
         prompt = f"""You are a technical interviewer. Evaluate the following candidate answers:
@@ -181,39 +519,42 @@ Format as JSON:
     "confidence_level": "High/Medium/Low",
     "feedback": "feedback text"
 }}"""
+        return prompt
 
-        response = await self.generate_content(prompt)
-        
-        # Parse JSON from response
-        import json
-        import re
-        
-        # Extract JSON from markdown code blocks if present
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
+    async def evaluate_quiz(self, answers: list) -> QuizEvaluationResponse:
+        """Evaluate quiz answers"""
+        response = await self.generate_content(self._evaluation_prompt(answers), QUIZ_EVAL)
+        return await self._parse_or_repair(response, QuizEvaluationResponse, QUIZ_EVAL)
+
+    async def _upload_audio(self, audio, mime_type: str = None):
+        """Upload a recording (a path, or a binary file object streamed as is) to Gemini file storage"""
+        if isinstance(audio, (str, os.PathLike)):
+            size = os.path.getsize(audio)
         else:
-            # Try to find JSON object in the response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            json_str = json_match.group(0) if json_match else response
-        
-        try:
-            result = json.loads(json_str)
-            return result
-        except json.JSONDecodeError:
-            return {
-                "score": 0,
-                "confidence_level": "Low",
-                "feedback": "Unable to evaluate answers."
-            }
-
-    async def analyze_audio(self, audio_path: str) -> dict:
-        """Analyze audio for confidence and tone"""
-        try:
-            # Upload file to Gemini
-            audio_file = genai.upload_file(audio_path)
-            
-            prompt = """Listen to this interview answer carefully. Analyze the speaker's voice tone, pitch, fluency, and hesitations to assess their confidence.
+            size = audio.seek(0, os.SEEK_END)
+            audio.seek(0)
+        started = time.perf_counter()
+        with stage("gemini_upload"):
+            audio_file = await self.executor.run_sync(
+                genai.upload_file, audio, mime_type=mime_type,
+                # An upload that finishes after the caller gave up is still deleted
+                on_abandoned=lambda uploaded: self.remote_files.schedule(uploaded.name, self.executor),
+            )
+        audio_metrics.record_upload(size, time.perf_counter() - started)
+        return audio_file
+
+    @stage("prompt_build")
+    def _audio_prompt(self, window: tuple = None, sliced: bool = False) -> str:
+        scope = ""
+        if window is not None:
+            start, end = window
+            if sliced:
+                scope = (f"\n\nThis clip is the part of a longer recording from {format_timestamp(start)} to "
+                         f"{format_timestamp(end)}.")
+            else:
+                scope = (f"\n\nConsider only the part of the recording from {format_timestamp(start)} to "
+                         f"{format_timestamp(end)}; ignore everything before or after it.")
+        prompt = """Listen to this interview answer carefully. Analyze the speaker's voice tone, pitch, fluency, and hesitations to assess their confidence.""" + scope + """
 
 Provide:
 1. Confidence Score (0-100)
@@ -230,35 +571,96 @@ Format as JSON:
     "summary": "summary text",
     "transcription": "transcription text"
 }"""
+        return prompt
 
-            response = self.model.generate_content([prompt, audio_file])
-            
-            # Clean up - delete the file from Gemini storage (optional but good practice)
-            # genai.delete_file(audio_file.name) 
-            
-            # Parse JSON
-            import json
-            import re
-            
+    async def _analyze_uploaded_audio(self, audio_file, window: tuple = None,
+                                      sliced: bool = False) -> AudioAnalysisResponse:
+        try:
+            response = await self._generate([self._audio_prompt(window, sliced), audio_file], AUDIO)
             text_response = response.text
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text_response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_match = re.search(r'\{.*\}', text_response, re.DOTALL)
-                json_str = json_match.group(0) if json_match else text_response
-            
-            return json.loads(json_str)
-            
+        except GeminiError:
+            raise
         except Exception as e:
-            print(f"Error analyzing audio: {e}")
-            return {
-                "confidence_score": 0,
-                "confidence_level": "Low",
-                "tone": "Error analyzing audio",
-                "summary": "N/A",
-                "transcription": "N/A"
-            }
+            raise Exception(f"Gemini API error: {str(e)}")
+
+        return await self._parse_or_repair(text_response, AudioAnalysisResponse, AUDIO)
+
+    async def _analyze_audio_window(self, audio_file, window: tuple, semaphore: asyncio.Semaphore) -> tuple:
+        """(attempts, result or exception) for one window; a failure is retried on its own, not the whole file"""
+        for attempt in range(1, AUDIO_SEGMENT_RETRIES + 2):
+            try:
+                async with semaphore:
+                    return attempt, await self._analyze_uploaded_audio(audio_file, window)
+            except Exception as e:
+                error = e
+        return attempt, error
+
+    async def _analyze_wav_slice(self, source, mime_type: str, window: tuple, semaphore: asyncio.Semaphore,
+                                 reading: asyncio.Lock) -> tuple:
+        """(attempts, result or exception) for one window uploaded as its own WAV slice"""
+        attempt, audio_file = 0, None
+        async with semaphore:
+            try:
+                # Windows share the source file's position, so slices are cut one at a time
+                async with reading:
+                    clip = await asyncio.to_thread(slice_wav, source, *window)
+                with clip:
+                    audio_file = await self._upload_audio(clip, mime_type)
+                for attempt in range(1, AUDIO_SEGMENT_RETRIES + 2):
+                    try:
+                        return attempt, await self._analyze_uploaded_audio(audio_file, window, sliced=True)
+                    except Exception as e:
+                        error = e
+                return attempt, error
+            except Exception as e:
+                return max(attempt, 1), e
+            finally:
+                if audio_file is not None:
+                    self.remote_files.schedule(audio_file.name, self.executor)
+
+    async def analyze_audio(self, audio, mime_type: str = None, duration: float = None) -> AudioAnalysisResponse:
+        """Analyze audio for confidence and tone.
+
+        WAV recordings known to last ``AUDIO_CHUNKED_MIN_SECONDS`` or more are
+        cut into overlapping time windows, each uploaded and analyzed on its
+        own in parallel, then merged into one response with a per-window
+        timeline. Other formats cannot be cut without decoding, so they are
+        analyzed in one call, unless ``AUDIO_WINDOW_WHOLE_FILE`` sends the
+        whole file with every window's prompt.
+        """
+        windowed = duration is not None and duration >= AUDIO_CHUNKED_MIN_SECONDS
+        if windowed and mime_type in WAV_MIME_TYPES:
+            windows = plan_windows(duration, AUDIO_SEGMENT_SECONDS, AUDIO_SEGMENT_OVERLAP_SECONDS)
+            semaphore, reading = asyncio.Semaphore(AUDIO_SEGMENT_CONCURRENCY), asyncio.Lock()
+            with contextlib.ExitStack() as stack:
+                source = stack.enter_context(open(audio, "rb")) if isinstance(audio, (str, os.PathLike)) else audio
+                results = await asyncio.gather(*[
+                    self._analyze_wav_slice(source, mime_type, window, semaphore, reading) for window in windows
+                ])
+            return merge_segments(windows, results)
+
+        try:
+            # Upload file to Gemini
+            audio_file = await self._upload_audio(audio, mime_type)
+        except GeminiError:
+            raise
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+
+        try:
+            if not (windowed and AUDIO_WINDOW_WHOLE_FILE):
+                return await self._analyze_uploaded_audio(audio_file)
+
+            # Every window's call carries the whole recording: N windows cost N times its input tokens
+            windows = plan_windows(duration, AUDIO_SEGMENT_SECONDS, AUDIO_SEGMENT_OVERLAP_SECONDS)
+            semaphore = asyncio.Semaphore(AUDIO_SEGMENT_CONCURRENCY)
+            results = await asyncio.gather(*[
+                self._analyze_audio_window(audio_file, window, semaphore) for window in windows
+            ])
+            return merge_segments(windows, results)
+        finally:
+            # Clean up - delete the file from Gemini storage in the background
+            self.remote_files.schedule(audio_file.name, self.executor)
 
 # Singleton instance
 gemini_client = GeminiClient()
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from models.schemas import JDProfile, JDRequirements
+from services.batching import estimate_tokens
+from services.document_store import hash_text
+from services.prefilter import query_terms
+
+JD_PROFILE_DB_PATH = os.getenv("JD_PROFILE_DB_PATH", "data/jd_profiles.sqlite3")
+JD_PROFILE_CACHE_SIZE = int(os.getenv("JD_PROFILE_CACHE_SIZE", "256"))
+# Times each stated requirement term is repeated in the pre-score query, which sums over its terms
+JD_PROFILE_REQUIREMENT_WEIGHT = int(os.getenv("JD_PROFILE_REQUIREMENT_WEIGHT", "3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jd_profiles (
+    id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    jd_text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def jd_profile_id(jd_text: str) -> str:
+    """Id of the profile for a JD: its whitespace-normalized hash, so posting the same JD twice reuses one profile"""
+    return hash_text(jd_text)[:24]
+
+
+def compact_requirements(requirements: JDRequirements) -> str:
+    """The requirements as the short block screening prompts carry in place of the JD"""
+    lines = [f"Title: {requirements.title}", f"Seniority: {requirements.seniority}"]
+    if requirements.min_years_experience:
+        lines.append(f"Minimum experience: {requirements.min_years_experience} years")
+    for label, values in (("Must-have", requirements.must_haves), ("Skills", requirements.skills),
+                          ("Nice to have", requirements.nice_to_haves),
+                          ("Responsibilities", requirements.responsibilities)):
+        if values:
+            lines.append(f"{label}: " + "; ".join(values))
+    return "\n".join(lines)
+
+
+def build_profile(jd_text: str, requirements: JDRequirements, title: str = None) -> JDProfile:
+    if title:
+        requirements.title = title
+    compact_text = compact_requirements(requirements)
+    # Requirement terms lead and are weighted over whatever else the JD mentions (culture, perks, boilerplate)
+    stated = query_terms(" ".join([requirements.title, *requirements.must_haves, *requirements.skills,
+                                   *requirements.nice_to_haves]))
+    rest = [term for term in query_terms(jd_text) if term not in stated]
+    return JDProfile(
+        id=jd_profile_id(jd_text),
+        requirements=requirements,
+        compact_text=compact_text,
+        terms=stated * max(JD_PROFILE_REQUIREMENT_WEIGHT, 1) + rest,
+        jd_tokens=estimate_tokens(jd_text),
+        compact_tokens=estimate_tokens(compact_text),
+        created_at=time.time(),
+    )
+
+
+class JDProfileStore:
+    """JD profiles by id in SQLite, the most recently used ones also held in memory.
+
+    A profile is extracted from its JD once; every screen that references it
+    then reads the stored requirements instead of sending and re-analyzing
+    the full JD.
+    """
+
+    def __init__(self, path: str = JD_PROFILE_DB_PATH, cache_size: int = JD_PROFILE_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _remember(self, profile: JDProfile):
+        self._memory[profile.id] = profile
+        self._memory.move_to_end(profile.id)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def get(self, id: str):
+        """Stored profile, or None"""
+        with self._lock:
+            db = self._db()
+            profile = self._memory.get(id)
+            if profile is None:
+                row = db.execute("SELECT profile FROM jd_profiles WHERE id = ?", (id,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                profile = JDProfile.model_validate_json(row[0])
+            self._remember(profile)
+            db.execute("UPDATE jd_profiles SET uses = uses + 1, last_used_at = ? WHERE id = ?", (time.time(), id))
+            db.commit()
+            self.hits += 1
+        return profile
+
+    def put(self, profile: JDProfile, jd_text: str):
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO jd_profiles (id, profile, jd_text, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (profile.id, profile.model_dump_json(), jd_text, profile.created_at, profile.created_at),
+            )
+            db.commit()
+            self._remember(profile)
+
+    def stats(self) -> dict:
+        with self._lock:
+            profiles, uses = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(uses), 0) FROM jd_profiles").fetchone()
+            cached = len(self._memory)
+        lookups = self.hits + self.misses
+        return {
+            "profiles": profiles,
+            "uses": uses,
+            "in_memory": cached,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+jd_profile_store = JDProfileStore()
@@ -0,0 +1,320 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from services.metrics import timing_context
+
+JOB_STORE_DIR = os.getenv("JOB_STORE_DIR", "data/jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Longest pause between retries when a worker cannot reach the job database
+JOB_MAX_BACKOFF_SECONDS = 30
+
+logger = logging.getLogger("hr_helper.jobs")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    idempotency_key TEXT,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    detail TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    UNIQUE (kind, idempotency_key)
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, created_at);
+"""
+
+_COLUMNS = "id, kind, idempotency_key, status, params, progress, detail, result, error, attempts, " \
+           "created_at, started_at, finished_at"
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    idempotency_key: str
+    status: str
+    params: dict
+    progress: float = 0.0
+    detail: str = None
+    result: dict = None
+    error: str = None
+    attempts: int = 0
+    created_at: float = 0.0
+    started_at: float = None
+    finished_at: float = None
+    files: list = field(default_factory=list)  # paths of the uploaded inputs, in submission order
+
+    @classmethod
+    def from_row(cls, row, files_dir: str) -> "Job":
+        (job_id, kind, key, status, params, progress, detail, result, error, attempts,
+         created_at, started_at, finished_at) = row
+        params = json.loads(params)
+        files = [os.path.join(files_dir, job_id, name) for name in params.pop("_files", [])]
+        return cls(id=job_id, kind=kind, idempotency_key=key, status=status, params=params, progress=progress,
+                   detail=detail, result=json.loads(result) if result else None, error=error, attempts=attempts,
+                   created_at=created_at, started_at=started_at, finished_at=finished_at, files=files)
+
+
+class JobQueue:
+    """Durable single-node job queue: SQLite holds job state, uploaded inputs live next to it on disk.
+
+    ``submit`` records a job and returns at once; ``workers`` tasks claim
+    queued jobs oldest first and run the handler registered for their kind.
+    Inputs are written to a ``make_staging_dir()`` directory beforehand and
+    passed as paths, which ``submit`` moves into the job's own directory.
+    A handler gets the Job and a ``progress(done, total, detail)`` callback
+    and returns a JSON-serializable result. Jobs interrupted by a restart are
+    queued again when the workers start, unless they have already been
+    started ``max_attempts`` times, in which case they are failed.
+    """
+
+    def __init__(self, directory: str = JOB_STORE_DIR, workers: int = JOB_WORKERS,
+                 poll_interval: float = JOB_POLL_SECONDS, retention_days: float = JOB_RETENTION_DAYS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, handlers: dict = None):
+        self.directory = directory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self.max_attempts = max_attempts
+        self.handlers = dict(handlers or {})
+        self.worker_errors = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._wakeup = None
+        self._loop = None
+        self._tasks = []
+
+    @property
+    def files_dir(self) -> str:
+        return os.path.join(self.directory, "files")
+
+    @property
+    def staging_dir(self) -> str:
+        return os.path.join(self.directory, "staging")
+
+    def make_staging_dir(self) -> str:
+        """A new directory to write a job's uploads into before ``submit``; the caller removes it afterwards"""
+        # Next to files_dir, so submit moves the files with a rename instead of copying them
+        os.makedirs(self.staging_dir, exist_ok=True)
+        return tempfile.mkdtemp(dir=self.staging_dir)
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module never touches the disk
+        if self._conn is None:
+            os.makedirs(self.files_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.directory, "jobs.sqlite3"), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _fetch(self, db, job_id: str):
+        row = db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row, self.files_dir) if row else None
+
+    def submit(self, kind: str, params: dict, files: list = (), idempotency_key: str = None) -> tuple:
+        """Queue a job with its (filename, staged path) inputs; returns (job, created).
+
+        A repeated idempotency key returns the original job instead and leaves the staged files where they are.
+        Blocks on SQLite and the disk, so async callers run it on a thread.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        # Prefixed so identical upload names within one job cannot collide
+        names = [f"{position:04d}-{os.path.basename(filename or 'upload')}"
+                 for position, (filename, _) in enumerate(files)]
+        with self._lock:
+            db = self._db()
+            # The unique key settles a race between processes submitting the same idempotency key at once:
+            # the second insert waits for the first to commit, then does nothing and returns that job
+            inserted = db.execute(
+                "INSERT INTO jobs (id, kind, idempotency_key, status, params, created_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (kind, idempotency_key) DO NOTHING",
+                (job_id, kind, idempotency_key, QUEUED, json.dumps({**params, "_files": names}), time.time()),
+            ).rowcount
+            if not inserted:
+                db.rollback()
+                row = db.execute("SELECT id FROM jobs WHERE kind = ? AND idempotency_key = ?",
+                                 (kind, idempotency_key)).fetchone()
+                return self._fetch(db, row[0]), False
+            job_dir = os.path.join(self.files_dir, job_id)
+            try:
+                # Moved before the commit, so a queued job always has its inputs in place
+                if files:
+                    os.makedirs(job_dir)
+                for name, (_, path) in zip(names, files):
+                    os.replace(path, os.path.join(job_dir, name))
+            except OSError:
+                db.rollback()
+                shutil.rmtree(job_dir, ignore_errors=True)
+                raise
+            db.commit()
+            job = self._fetch(db, job_id)
+        if self._loop is not None:
+            # Submitted from a thread as well as from the loop
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return job, True
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._fetch(self._db(), job_id)
+
+    def _claim(self):
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                return None
+            # Conditional on the status so that when several worker processes share the queue only one wins
+            claimed = db.execute("UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 "
+                                 "WHERE id = ? AND status = ?", (RUNNING, time.time(), row[0], QUEUED)).rowcount
+            db.commit()
+            return self._fetch(db, row[0]) if claimed else None
+
+    def _update(self, job_id: str, **columns):
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock:
+            db = self._db()
+            db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+            db.commit()
+
+    def _progress_callback(self, job: Job):
+        def progress(done: int, total: int, detail: str = None):
+            self._update(job.id, progress=round(done / total, 4) if total else 0.0, detail=detail)
+        return progress
+
+    async def _run(self, job: Job):
+        try:
+            with timing_context(f"job:{job.kind}"):
+                result = await self.handlers[job.kind](job, self._progress_callback(job))
+        except asyncio.CancelledError:
+            # Shutting down; the job goes back in the queue for the next start
+            self._update(job.id, status=QUEUED, started_at=None)
+            raise
+        except Exception as e:
+            self._update(job.id, status=FAILED, error=str(e) or type(e).__name__, finished_at=time.time())
+        else:
+            self._update(job.id, status=SUCCEEDED, progress=1.0, result=json.dumps(result), finished_at=time.time())
+        shutil.rmtree(os.path.join(self.files_dir, job.id), ignore_errors=True)
+
+    async def _claim_next(self):
+        # On a thread, since with several worker processes a claim can wait on a sibling's lock on the file
+        claim = asyncio.ensure_future(asyncio.to_thread(self._claim))
+        try:
+            return await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            # Stopped mid-claim: a job the thread claimed anyway goes straight back in the queue
+            job = await claim
+            if job is not None:
+                self._update(job.id, status=QUEUED, started_at=None, attempts=job.attempts - 1)
+            raise
+
+    async def _worker(self):
+        self._loop = asyncio.get_running_loop()
+        failures = 0
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim_next()
+                if job is not None:
+                    await self._run(job)
+            except Exception:
+                # A locked or unreadable database must not end the worker; back off and try again
+                failures += 1
+                self.worker_errors += 1
+                delay = min(self.poll_interval * 2 ** failures, JOB_MAX_BACKOFF_SECONDS)
+                logger.exception("Job worker error; retrying in %.2fs", delay)
+                await asyncio.sleep(delay)
+                continue
+            failures = 0
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def requeue_interrupted(self) -> int:
+        """Queue again the jobs a previous process left running; returns how many.
+
+        A job already started ``max_attempts`` times is failed instead, so one
+        that takes its worker down every time it runs is not retried forever.
+        """
+        with self._lock:
+            db = self._db()
+            exhausted = [row[0] for row in db.execute(
+                "SELECT id FROM jobs WHERE status = ? AND attempts >= ?", (RUNNING, self.max_attempts)
+            )]
+            db.executemany("UPDATE jobs SET status = ?, error = 'Interrupted on each of ' || attempts || ' attempts', "
+                           "finished_at = ? WHERE id = ?", [(FAILED, time.time(), job_id) for job_id in exhausted])
+            count = db.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                               (QUEUED, RUNNING)).rowcount
+            db.commit()
+        for job_id in exhausted:
+            shutil.rmtree(os.path.join(self.files_dir, job_id), ignore_errors=True)
+        return count
+
+    def start(self, recover: bool = True):
+        """Requeue interrupted jobs, drop expired ones, and start the workers.
+
+        With several worker processes on one queue, ``recover`` must be off in
+        each of them (the launcher requeues once, before they start), or a
+        starting process would requeue jobs its siblings are running.
+        """
+        if recover:
+            self.requeue_interrupted()
+            # Uploads staged for a submit the previous process never finished
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self.enforce_retention()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def enforce_retention(self) -> int:
+        """Delete finished jobs older than ``retention_days``; returns the count removed"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock:
+            db = self._db()
+            doomed = [row[0] for row in db.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (SUCCEEDED, FAILED, cutoff)
+            )]
+            db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in doomed])
+            db.commit()
+        for job_id in doomed:
+            shutil.rmtree(os.path.join(self.files_dir, job_id), ignore_errors=True)
+        return len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"workers": len(self._tasks), "worker_errors": self.worker_errors,
+                **{status: counts.get(status, 0) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}}
+
+
+# Singleton instance
+job_queue = JobQueue()
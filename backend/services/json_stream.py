@@ -0,0 +1,105 @@
+import json
+import re
+
+# The only characters that can change the scanner's state; everything else is skipped in bulk
+_SPECIAL = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class JSONScanner:
+    """Bracket-balancing scanner that finds complete JSON values in streamed text.
+
+    Feed it text chunks as they arrive; each call returns the raw text of the
+    values that closed within that chunk. With ``element_depth=0`` those are
+    top-level ``{...}``/``[...]`` values found anywhere in the text (prose and
+    ```json fences around them are skipped). With ``element_depth=1`` they are
+    the elements of the first top-level array, reported as soon as each one
+    closes, and scanning stops when the array does.
+
+    String and escape state are tracked so brackets inside strings do not
+    count, and each character is looked at once, so the cost is linear in the
+    size of the response however it is chunked.
+    """
+
+    def __init__(self, element_depth: int = 0, openers: str = "{["):
+        self.element_depth = element_depth
+        self.openers = openers
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._parts = []
+        self._value_start = None
+
+    def feed(self, chunk: str) -> list:
+        values = []
+        pos = 0
+        if self._escaped:
+            pos, self._escaped = 1, False
+        if self._value_start is not None:
+            self._value_start = 0
+
+        while not self.done:
+            if self._in_string:
+                # Jump straight to the next quote or backslash inside the string
+                match = _STRING_SPECIAL.search(chunk, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    pos += 1
+                    if pos > len(chunk):
+                        self._escaped = True
+                        break
+                else:
+                    self._in_string = False
+                continue
+
+            match = _SPECIAL.search(chunk, pos)
+            if match is None:
+                break
+            char, start, pos = match.group(), match.start(), match.end()
+
+            if self._depth > self.element_depth:
+                # Inside a value
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth == self.element_depth:
+                        values.append("".join(self._parts) + chunk[self._value_start:pos])
+                        self._parts, self._value_start = [], None
+            elif self._depth == self.element_depth:
+                # Between values; quotes here belong to surrounding prose
+                if char in self.openers:
+                    self._depth += 1
+                    self._value_start = start
+                elif char in "}]" and self.element_depth:
+                    self.done = True
+            elif char == "[":
+                # Entering the array whose elements are reported
+                self._depth += 1
+
+        if self._value_start is not None:
+            self._parts.append(chunk[self._value_start:])
+        return values
+
+
+class JSONArrayStreamParser:
+    """Pulls complete objects out of a JSON array while it is still being streamed"""
+
+    def __init__(self):
+        self._scanner = JSONScanner(element_depth=1, openers="{")
+
+    def feed(self, chunk: str) -> list:
+        objects = []
+        for raw in self._scanner.feed(chunk):
+            try:
+                parsed = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                objects.append(parsed)
+        return objects
@@ -0,0 +1,55 @@
+import importlib
+import sys
+import time
+import types
+
+# Every lazily imported module, so a pre-warm can load them all and startup reporting can time them
+_registry = {}
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a module and imports it on first attribute access.
+
+    Attributes assigned on the proxy (as tests and the benchmark harness do
+    to swap ``upload_file``) shadow the real module's without importing it.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+        self.__dict__["import_seconds"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            self.__dict__["import_seconds"] = time.perf_counter() - started
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_module"] is not None or self.__name__ in sys.modules
+
+
+def lazy_import(name: str) -> LazyModule:
+    """A proxy for module ``name`` that is only imported when first used"""
+    if name not in _registry:
+        _registry[name] = LazyModule(name)
+    return _registry[name]
+
+
+def preload() -> dict:
+    """Import every registered lazy module now; returns seconds spent per module"""
+    for module in _registry.values():
+        module._load()
+    return import_times()
+
+
+def import_times() -> dict:
+    return {name: round(module.import_seconds, 4) for name, module in _registry.items()
+            if module.import_seconds is not None}
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from collections import deque
+from services.audio_ingest import wav_stream_duration, WAV_MIME_TYPES
+from services.audio_segments import merge_window_transcript
+
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", "20"))
+LIVE_UPDATE_SECONDS = float(os.getenv("LIVE_UPDATE_SECONDS", "5"))
+LIVE_WINDOW_BYTES = int(os.getenv("LIVE_WINDOW_BYTES", str(2 * 1024 * 1024)))
+LIVE_MAX_BYTES = int(os.getenv("LIVE_MAX_BYTES", str(200 * 1024 * 1024)))
+LIVE_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+LIVE_ROLLING_UPDATES = 3
+
+
+class AudioRingBuffer:
+    """The most recent ``capacity`` bytes of a stream, plus its first frame.
+
+    Container formats such as WebM carry their header only in the first
+    frame a recorder emits, so that frame is pinned and prepended to every
+    snapshot; the oldest later frames are dropped once over capacity.
+    """
+
+    def __init__(self, capacity: int = LIVE_WINDOW_BYTES):
+        self.capacity = capacity
+        self.header = None
+        self.dropped_bytes = 0
+        self._frames = deque()
+        self._size = 0
+
+    def append(self, frame: bytes):
+        if self.header is None:
+            self.header = frame
+            return
+        self._frames.append(frame)
+        self._size += len(frame)
+        while self._size > self.capacity and len(self._frames) > 1:
+            dropped = self._frames.popleft()
+            self._size -= len(dropped)
+            self.dropped_bytes += len(dropped)
+
+    def snapshot(self) -> bytes:
+        return (self.header or b"") + b"".join(self._frames)
+
+
+class LatestOnly:
+    """Single-slot mailbox: an unsent message is replaced by a newer one instead of queueing behind a slow client"""
+
+    def __init__(self):
+        self.replaced = 0
+        self._message = None
+        self._ready = asyncio.Event()
+
+    def put(self, message: dict):
+        if self._message is not None:
+            self.replaced += 1
+        self._message = message
+        self._ready.set()
+
+    async def get(self) -> dict:
+        await self._ready.wait()
+        self._ready.clear()
+        message, self._message = self._message, None
+        return message
+
+
+class LiveSession:
+    """Audio and running analysis state of one live interview WebSocket.
+
+    Every frame is spooled (in memory, then on disk) for the final analysis
+    and also kept in a ring buffer that incremental updates analyze.
+    """
+
+    def __init__(self, mime_type: str = "audio/webm", window_bytes: int = LIVE_WINDOW_BYTES,
+                 max_bytes: int = LIVE_MAX_BYTES):
+        self.id = uuid.uuid4().hex
+        self.mime_type = mime_type
+        self.max_bytes = max_bytes
+        self.started = time.monotonic()
+        self.received_bytes = 0
+        self.updates = 0
+        self.window = AudioRingBuffer(window_bytes)
+        self.transcription = ""
+        self.recent_scores = deque(maxlen=LIVE_ROLLING_UPDATES)
+        self.recording = tempfile.SpooledTemporaryFile(max_size=LIVE_SPOOL_MEMORY_BYTES)
+        self._analyzed_bytes = 0
+        # Audio byte range of the snapshot being analyzed, and how far into the stream the transcript reaches
+        self._snapshot_range = (0, 0)
+        self._transcribed_bytes = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def feed(self, frame: bytes) -> bool:
+        """Record a frame; False once the recording would exceed ``max_bytes``"""
+        if self.received_bytes + len(frame) > self.max_bytes:
+            return False
+        self.recording.write(frame)
+        self.window.append(frame)
+        self.received_bytes += len(frame)
+        return True
+
+    def has_new_audio(self) -> bool:
+        return self.received_bytes > self._analyzed_bytes
+
+    def snapshot(self) -> bytes:
+        self._analyzed_bytes = self.received_bytes
+        self._snapshot_range = (len(self.window.header or b"") + self.window.dropped_bytes, self.received_bytes)
+        return self.window.snapshot()
+
+    def apply(self, result) -> dict:
+        """Fold one analysis of the recent window into the running state and describe it as an update message"""
+        previous = self.transcription
+        start, end = self._snapshot_range
+        if start < self._transcribed_bytes:
+            # The window still holds audio already transcribed; keep only what its transcript adds
+            self.transcription = merge_window_transcript(previous, result.transcription)
+        else:
+            # Everything transcribed before has scrolled out of the window, so nothing repeats
+            self.transcription = " ".join(previous.split() + result.transcription.split())
+        self._transcribed_bytes = end
+        self.recent_scores.append(result.confidence_score)
+        self.updates += 1
+        return {
+            "type": "update",
+            "seq": self.updates,
+            "elapsed_seconds": round(self.elapsed, 1),
+            "received_bytes": self.received_bytes,
+            "confidence_score": result.confidence_score,
+            "rolling_confidence_score": round(sum(self.recent_scores) / len(self.recent_scores)),
+            "confidence_level": result.confidence_level,
+            "tone": result.tone,
+            "transcription": self.transcription,
+            "new_text": self.transcription[len(previous):].strip(),
+        }
+
+    def recording_file(self):
+        self.recording.seek(0)
+        return self.recording
+
+    def recording_duration(self):
+        """Seconds of audio received, from the bytes themselves; None where only decoding could tell.
+
+        Not ``elapsed``: pauses and a client that sends faster or slower than
+        real time make wall-clock time a poor measure of the audio.
+        """
+        if self.mime_type not in WAV_MIME_TYPES:
+            return None
+        return wav_stream_duration(self.recording_file(), self.received_bytes)
+
+    def close(self):
+        self.recording.close()
+
+
+class SessionRegistry:
+    """Caps concurrent live sessions and keeps their counters for the admin endpoint"""
+
+    def __init__(self, max_sessions: int = LIVE_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.active = {}
+        self.opened = 0
+        self.rejected = 0
+        self.dropped_updates = 0
+
+    def open(self, session: LiveSession) -> bool:
+        if len(self.active) >= self.max_sessions:
+            self.rejected += 1
+            return False
+        self.active[session.id] = session
+        self.opened += 1
+        return True
+
+    def close(self, session: LiveSession):
+        self.active.pop(session.id, None)
+        session.close()
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self.active),
+            "max_sessions": self.max_sessions,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "dropped_updates": self.dropped_updates,
+            "received_bytes": sum(session.received_bytes for session in self.active.values()),
+        }
+
+
+# Singleton instance
+live_sessions = SessionRegistry()
@@ -0,0 +1,326 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_TIMING_LOGS = os.getenv("METRICS_TIMING_LOGS", "false").lower() == "true"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+timing_logger = logging.getLogger("hr_helper.timing")
+if METRICS_TIMING_LOGS and not timing_logger.handlers:
+    # One JSON object per line on stderr, independent of how uvicorn configures its own loggers
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    timing_logger.addHandler(_handler)
+    timing_logger.setLevel(logging.INFO)
+    timing_logger.propagate = False
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, "") for name in self.labels), 0)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label combination, as Prometheus histograms expose them"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts, made cumulative when rendered; the extra slot is +Inf
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels.get(name, "") for name in self.labels))
+        return series[2] if series else 0
+
+    def samples(self) -> list:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    le = f'le="{bound if bound == "+Inf" else _format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics rendered in the Prometheus text format.
+
+    Besides the counters and histograms it owns, ``collectors`` are called
+    at scrape time and return ``{(name, help): value}`` gauges, so state the
+    services already track (queue depth, cache entries) is exported without
+    being duplicated.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collect in self.collectors:
+            for (name, help), value in collect().items():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram(
+    "hr_helper_request_duration_seconds", "End-to-end HTTP request latency, including streamed bodies",
+    ("endpoint", "method", "status"))
+STAGE_SECONDS = metrics.histogram(
+    "hr_helper_stage_duration_seconds", "Latency of one processing stage within a request or background job",
+    ("endpoint", "stage", "outcome"))
+GEMINI_PAYLOAD_BYTES = metrics.histogram(
+    "hr_helper_gemini_payload_bytes", "Size of prompt text sent to and response text received from Gemini",
+    ("endpoint", "direction"), buckets=SIZE_BUCKETS)
+GEMINI_TOKENS = metrics.counter(
+    "hr_helper_gemini_tokens_total", "Tokens Gemini reported in usage metadata", ("endpoint", "kind"))
+GEMINI_MODEL_SECONDS = metrics.histogram(
+    "hr_helper_gemini_model_duration_seconds", "Latency of one model call, by model and routed task",
+    ("model", "task", "outcome"))
+PROMPT_INPUT_TOKENS = metrics.counter(
+    "hr_helper_prompt_input_tokens_total", "Estimated tokens of CV and JD text before and after prompt compaction",
+    ("endpoint", "input", "phase"))
+
+
+class RequestTiming:
+    """Stages timed on behalf of one request or background job.
+
+    For HTTP and WebSocket requests the endpoint label is the route's path
+    template, resolved lazily because routing happens after the middleware
+    has set this up.
+    """
+
+    def __init__(self, label: str = None, scope: dict = None):
+        self._label = label
+        self.scope = scope
+        self.stages = []
+        self.counts = {}
+
+    @property
+    def endpoint(self) -> str:
+        if self._label is None and self.scope is not None:
+            return route_template(self.scope)
+        return self._label or "background"
+
+    def record(self, name: str, seconds: float, outcome: str):
+        STAGE_SECONDS.observe(seconds, endpoint=self.endpoint, stage=name, outcome=outcome)
+        self.stages.append((name, seconds))
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a per-request tally (e.g. prompt tokens saved) reported in the timing log line"""
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+
+_current = contextvars.ContextVar("request_timing", default=None)
+_route_templates = {}
+
+
+def route_template(scope: dict) -> str:
+    """Path template of the matched route (``/api/jobs/{job_id}``), or "unmatched" before or without a match"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    template = _route_templates.get(endpoint)
+    if template is None:
+        app = scope.get("app")
+        template = next((route.path for route in getattr(app, "routes", ())
+                         if getattr(route, "endpoint", None) is endpoint), "unmatched")
+        _route_templates[endpoint] = template
+    return template
+
+
+def current_timing() -> RequestTiming:
+    timing = _current.get()
+    if timing is None:
+        timing = RequestTiming()
+    return timing
+
+
+@contextlib.contextmanager
+def timing_context(label: str):
+    """Attribute the stages timed inside the block (and tasks it starts) to ``label``, e.g. a job kind"""
+    token = _current.set(RequestTiming(label))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """Time a block as one stage of the current request; usable as a decorator on plain functions"""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        current_timing().record(name, time.perf_counter() - started, outcome)
+
+
+def record_gemini_exchange(contents, response):
+    """Count prompt/response sizes and the token usage Gemini reported for one call"""
+    if not METRICS_ENABLED:
+        return
+    endpoint = current_timing().endpoint
+    prompt = contents if isinstance(contents, str) else "".join(part for part in contents if isinstance(part, str))
+    GEMINI_PAYLOAD_BYTES.observe(len(prompt.encode("utf-8")), endpoint=endpoint, direction="prompt")
+    try:
+        text = response.text
+    except Exception:
+        # Blocked or empty candidates raise on .text; the caller surfaces that
+        text = None
+    if isinstance(text, str):
+        GEMINI_PAYLOAD_BYTES.observe(len(text.encode("utf-8")), endpoint=endpoint, direction="response")
+    usage = getattr(response, "usage_metadata", None)
+    for kind, attribute in (("prompt", "prompt_token_count"), ("response", "candidates_token_count"),
+                            ("total", "total_token_count")):
+        count = getattr(usage, attribute, None)
+        if isinstance(count, int) and count > 0:
+            GEMINI_TOKENS.inc(count, endpoint=endpoint, kind=kind)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request and giving its stages an endpoint label.
+
+    Written against raw ASGI rather than BaseHTTPMiddleware so streamed
+    responses are timed until their last chunk and WebSocket sessions get a
+    timing context too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not METRICS_ENABLED or scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(scope=scope)
+        token = _current.set(timing)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            if scope["type"] == "http":
+                elapsed = time.perf_counter() - started
+                REQUEST_SECONDS.observe(elapsed, endpoint=timing.endpoint, method=scope["method"], status=status)
+                if METRICS_TIMING_LOGS:
+                    log_timing(timing, scope["method"], status, elapsed)
+
+
+def log_timing(timing: RequestTiming, method: str, status: int, elapsed: float):
+    """One structured line per request: total time, the summed time of each stage and any tallies"""
+    stages = {}
+    for name, seconds in timing.stages:
+        stages[name] = stages.get(name, 0.0) + seconds
+    line = {
+        "endpoint": timing.endpoint,
+        "method": method,
+        "status": status,
+        "duration_ms": round(elapsed * 1000, 2),
+        "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in stages.items()},
+    }
+    if timing.counts:
+        line["counts"] = timing.counts
+    timing_logger.info(json.dumps(line))
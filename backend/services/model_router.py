@@ -0,0 +1,165 @@
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+from services.metrics import GEMINI_MODEL_SECONDS, METRICS_ENABLED
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_FALLBACK_MODEL = os.getenv("GEMINI_FALLBACK_MODEL", "gemini-2.0-flash-lite")  # empty disables fallback
+# "model=input/output" USD per million tokens, comma-separated; merged over MODEL_PRICES
+GEMINI_MODEL_PRICES = os.getenv("GEMINI_MODEL_PRICES", "")
+
+JD, JD_PROFILE, SCREEN, QUIZ_GEN, QUIZ_EVAL, AUDIO = "jd", "jd_profile", "screen", "quiz_gen", "quiz_eval", "audio"
+TASKS = (JD, JD_PROFILE, SCREEN, QUIZ_GEN, QUIZ_EVAL, AUDIO)
+
+# Output cap and temperature per task; sized to what each prompt asks for, with headroom
+DEFAULT_ROUTES = {
+    JD: (2048, 0.7),
+    JD_PROFILE: (1024, 0.1),
+    SCREEN: (1024, 0.2),
+    QUIZ_GEN: (4096, 0.7),
+    QUIZ_EVAL: (1024, 0.2),
+    AUDIO: (4096, 0.2),
+}
+
+# Published text-input/output prices, USD per million tokens; audio input is billed higher and not told apart
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+LATENCY_WINDOW = 512
+
+
+@dataclass
+class Route:
+    """Model and generation settings for one task"""
+    task: str
+    model: str
+    fallback: str
+    max_output_tokens: int
+    temperature: float
+    timeout: float = None  # None: the executor's GEMINI_TIMEOUT_SECONDS
+
+    def generation_config(self, scale: int = 1) -> dict:
+        """``scale`` multiplies the output cap for a batched prompt answering that many requests"""
+        return {"max_output_tokens": self.max_output_tokens * scale, "temperature": self.temperature}
+
+
+def load_routes() -> dict:
+    """Routes from GEMINI_ROUTE_<TASK>_{MODEL,FALLBACK,MAX_OUTPUT_TOKENS,TEMPERATURE,TIMEOUT_SECONDS}"""
+    routes = {}
+    for task, (max_output_tokens, temperature) in DEFAULT_ROUTES.items():
+        prefix = f"GEMINI_ROUTE_{task.upper()}_"
+        timeout = os.getenv(prefix + "TIMEOUT_SECONDS")
+        routes[task] = Route(
+            task=task,
+            model=os.getenv(prefix + "MODEL") or GEMINI_MODEL,
+            fallback=os.getenv(prefix + "FALLBACK", GEMINI_FALLBACK_MODEL),
+            max_output_tokens=int(os.getenv(prefix + "MAX_OUTPUT_TOKENS", str(max_output_tokens))),
+            temperature=float(os.getenv(prefix + "TEMPERATURE", str(temperature))),
+            timeout=float(timeout) if timeout else None,
+        )
+    return routes
+
+
+def load_prices(spec: str = GEMINI_MODEL_PRICES) -> dict:
+    prices = dict(MODEL_PRICES)
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, rates = entry.partition("=")
+        prompt, _, response = rates.partition("/")
+        prices[model.strip()] = (float(prompt), float(response or prompt))
+    return prices
+
+
+class ModelStats:
+    """Calls, outcomes, recent latencies and token spend of one model on one task"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self, price: tuple) -> dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 4) if ordered else 0.0
+
+        cost = (self.prompt_tokens * price[0] + self.response_tokens * price[1]) / 1_000_000 if price else None
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "fell_back": self.fallbacks,
+            "p50_seconds": percentile(0.50),
+            "p95_seconds": percentile(0.95),
+            "mean_seconds": round(sum(ordered) / len(ordered), 4) if ordered else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "cost_usd": round(cost, 6) if cost is not None else None,
+        }
+
+
+class ModelRouter:
+    """Which model answers each task, and how each model has been doing.
+
+    Every task (JD writing and requirement extraction, CV screening, quiz
+    generation and evaluation, audio analysis) has a Route: a primary model,
+    a fallback used when the primary times out or is overloaded, an output
+    cap and a temperature.
+    Stats are kept per model and task so a route can be tuned from
+    ``/api/admin/models``.
+    """
+
+    def __init__(self, routes: dict = None, prices: dict = None):
+        self.routes = routes or load_routes()
+        self.prices = prices or load_prices()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> Route:
+        return self.routes[task]
+
+    def _entry(self, model: str, task: str) -> ModelStats:
+        entry = self._stats.get((model, task))
+        if entry is None:
+            entry = self._stats[(model, task)] = ModelStats()
+        return entry
+
+    def record(self, model: str, task: str, seconds: float, response=None, error: Exception = None,
+               timed_out: bool = False):
+        """Count one call of ``model`` for ``task``: its latency, outcome and the tokens it reported"""
+        usage = getattr(response, "usage_metadata", None)
+        with self._lock:
+            entry = self._entry(model, task)
+            entry.calls += 1
+            entry.latencies.append(seconds)
+            if error is not None:
+                entry.errors += 1
+                entry.timeouts += timed_out
+            for attribute, total in (("prompt_token_count", "prompt_tokens"),
+                                     ("candidates_token_count", "response_tokens")):
+                count = getattr(usage, attribute, None)
+                if isinstance(count, int) and count > 0:
+                    setattr(entry, total, getattr(entry, total) + count)
+        if METRICS_ENABLED:
+            outcome = "timeout" if timed_out else "error" if error is not None else "ok"
+            GEMINI_MODEL_SECONDS.observe(seconds, model=model, task=task, outcome=outcome)
+
+    def record_fallback(self, model: str, task: str):
+        with self._lock:
+            self._entry(model, task).fallbacks += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {}
+            for (model, task), entry in sorted(self._stats.items()):
+                models.setdefault(model, {})[task] = entry.snapshot(self.prices.get(model))
+        return {"routes": {task: asdict(route) for task, route in self.routes.items()}, "models": models}
@@ -1,16 +1,27 @@
-from PyPDF2 import PdfReader
 from io import BytesIO
+from services.lazy_import import lazy_import
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    """Extract text from PDF file bytes"""
+PyPDF2 = lazy_import("PyPDF2")
+
+def open_pdf(file_bytes: bytes):
+    """A PdfReader for the document, to share between counting and reading its pages"""
+    return PyPDF2.PdfReader(BytesIO(file_bytes))
+
+def count_pdf_pages(file_bytes: bytes, reader=None) -> int:
+    """Number of pages in a PDF"""
+    return len((reader or open_pdf(file_bytes)).pages)
+
+def iter_pdf_pages(file_bytes: bytes, max_pages: int = None, reader=None):
+    """Yield the text of each PDF page in order, stopping after max_pages"""
     try:
-        pdf_file = BytesIO(file_bytes)
-        reader = PdfReader(pdf_file)
-        
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
+        reader = reader or open_pdf(file_bytes)
+        for number, page in enumerate(reader.pages):
+            if max_pages is not None and number >= max_pages:
+                return
+            yield page.extract_text() or ""
     except Exception as e:
         raise Exception(f"Error parsing PDF: {str(e)}")
+
+def extract_text_from_pdf(file_bytes: bytes, max_pages: int = None) -> str:
+    """Extract text from PDF file bytes"""
+    return "\n".join(iter_pdf_pages(file_bytes, max_pages)).strip()
@@ -0,0 +1,128 @@
+import math
+import os
+import re
+from collections import Counter
+
+PREFILTER_TOP_K = int(os.getenv("PREFILTER_TOP_K", "0"))  # 0 screens every CV
+PREFILTER_MIN_SCORE = float(os.getenv("PREFILTER_MIN_SCORE", "0"))
+# Content terms of a typical CV; pre-scores normalize CV length against this instead of a batch average
+PREFILTER_REFERENCE_TERMS = int(os.getenv("PREFILTER_REFERENCE_TERMS", "300"))
+
+# Keeps tech tokens like "c++", "c#" and "node.js" intact
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.-]*[a-z0-9+#]|[a-z0-9]")
+_LETTER = re.compile(r"[a-z]")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be been being below between both but by can could
+did do does doing down during each etc few for from further had has have having he her here hers him his how
+i if in into is it its just may me more most must my no nor not now of off on once only or other our ours out
+over own per same she should so some such than that the their theirs them then there these they this those
+through to too under until up us very via was we were what when where which while who whom why will with
+within would you your yours
+ability able experience experienced years year strong good excellent knowledge skills skill required
+requirements preferred plus including work working team role candidate candidates job using use new well
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercased content terms of a text, stopwords removed"""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and _LETTER.search(t)]
+
+
+def count_terms(text: str) -> dict:
+    """Term frequencies of a CV, as the document store keeps them next to its text"""
+    return dict(Counter(tokenize(text)))
+
+
+def query_terms(text: str) -> list:
+    """Distinct terms of a JD (or skills list) in first-seen order"""
+    return list(dict.fromkeys(tokenize(text)))
+
+
+class BM25Index:
+    """Sparse BM25 index over a small corpus of texts, such as the sections of one CV.
+
+    Scores are normalized into [0, 1] against an average-length document that
+    mentions every query term once. IDF and the average length both come
+    from the corpus, so scores rank documents within one index but are not
+    comparable across indexes; ``coverage_score`` is the corpus-free measure.
+    """
+
+    def __init__(self, texts: list, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokenize(text)) for text in texts]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths and any(self.lengths) else 1.0
+        self.document_frequency = Counter()
+        for counts in self.term_counts:
+            self.document_frequency.update(counts.keys())
+
+    def __len__(self):
+        return len(self.term_counts)
+
+    def idf(self, term: str) -> float:
+        # The +1 keeps terms present in every document (always true for a corpus of one) positive
+        n = len(self.term_counts)
+        df = self.document_frequency.get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def score(self, terms: list, index: int) -> float:
+        counts = self.term_counts[index]
+        length_norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / self.average_length)
+        total = 0.0
+        for term in terms:
+            tf = counts.get(term)
+            if tf:
+                total += self.idf(term) * tf * (self.k1 + 1) / (tf + length_norm)
+        return total
+
+    def normalized_scores(self, terms: list) -> list:
+        # At tf=1 and average length a term contributes exactly its idf
+        ceiling = sum(self.idf(term) for term in terms)
+        if not ceiling:
+            return [0.0] * len(self)
+        return [min(1.0, self.score(terms, i) / ceiling) for i in range(len(self))]
+
+
+def coverage_score(terms: list, counts: dict, k1: float = 1.5, b: float = 0.75,
+                   reference_length: int = PREFILTER_REFERENCE_TERMS) -> float:
+    """0-1 BM25-style match of one document's term counts to the query terms, using no corpus statistics.
+
+    Every query term weighs the same (a repeated term counts again) and length
+    is normalized against ``reference_length``, so a document that mentions
+    every term once at that length scores 1 whatever else it is scored with.
+    """
+    if not terms:
+        return 0.0
+    length_norm = k1 * (1 - b + b * sum(counts.values()) / reference_length)
+    total = 0.0
+    for term in terms:
+        tf = counts.get(term)
+        if tf:
+            total += tf * (k1 + 1) / (tf + length_norm)
+    return min(1.0, total / len(terms))
+
+
+def pre_score(jd_text: str, cv_texts: list, terms: list = None, term_counts: list = None) -> list:
+    """Cheap 0-100 relevance of each CV to the JD.
+
+    Each CV is scored on its own, so a CV gets the same score from /screen as
+    in a batch of any size and one ``min_pre_score`` threshold fits both.
+    ``terms`` are precomputed query terms (a JD profile's), used instead of tokenizing ``jd_text``;
+    ``term_counts`` are each CV's stored term counts, or None where a CV has to be tokenized.
+    """
+    if terms is None:
+        terms = query_terms(jd_text)
+    term_counts = term_counts or [None] * len(cv_texts)
+    return [round(100 * coverage_score(terms, counts if counts is not None else count_terms(text)), 1)
+            for text, counts in zip(cv_texts, term_counts)]
+
+
+def select_for_screening(pre_scores: list, top_k: int = PREFILTER_TOP_K,
+                         min_score: float = PREFILTER_MIN_SCORE) -> set:
+    """Indices of the CVs worth sending to the LLM: the top_k best (0 = all) at or above min_score"""
+    ranked = sorted(range(len(pre_scores)), key=lambda i: pre_scores[i], reverse=True)
+    if top_k:
+        ranked = ranked[:top_k]
+    return {i for i in ranked if pre_scores[i] >= min_score}
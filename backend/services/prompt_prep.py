@@ -0,0 +1,308 @@
+import functools
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from services.batching import estimate_tokens
+from services.metrics import PROMPT_INPUT_TOKENS, METRICS_ENABLED, current_timing
+from services.prefilter import BM25Index, query_terms
+
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "true").lower() in ("1", "true", "yes")
+# Estimated tokens (see estimate_tokens) each input may take up in a screening prompt
+PROMPT_CV_TOKEN_BUDGET = int(os.getenv("PROMPT_CV_TOKEN_BUDGET", "3000"))
+PROMPT_JD_TOKEN_BUDGET = int(os.getenv("PROMPT_JD_TOKEN_BUDGET", "1500"))
+
+# A section is only cut down to fit if at least this much of the budget is left for it
+MIN_PARTIAL_SECTION_TOKENS = 64
+
+_INVISIBLE = dict.fromkeys(map(ord, "­​‌‍⁠﻿"))
+_BULLET = re.compile(r"^[•‣⁃∙▪▫●◦■□–—*]\s*")
+_SPACES = re.compile(r"[ \t\f\v]+")
+_WRAPPED_HYPHEN = re.compile(r"([a-z])-\n([a-z])")
+_PAGE_NUMBER = re.compile(r"^(?:page\s*)?[-–\s]*\d{1,3}[-–\s]*(?:(?:of|/)\s*\d{1,3})?$", re.IGNORECASE)
+_DIGITS = re.compile(r"\d+")
+
+# Heading words and the kind of section they start; the weight is added to a section's JD relevance
+SECTION_KINDS = {
+    "summary": ("summary", "profile", "objective", "about"),
+    "skills": ("skills", "competencies", "technologies", "expertise", "stack"),
+    "experience": ("experience", "employment", "career", "history"),
+    "projects": ("projects", "portfolio"),
+    "education": ("education", "qualifications", "academic"),
+    "certifications": ("certifications", "certificates", "licenses", "courses", "training"),
+    "achievements": ("achievements", "awards", "publications", "honors"),
+    "languages": ("languages",),
+    "personal": ("interests", "hobbies", "references", "volunteering", "volunteer", "personal"),
+}
+SECTION_WEIGHTS = {"skills": 0.5, "experience": 0.4, "summary": 0.3, "projects": 0.3, "certifications": 0.2,
+                   "education": 0.2, "achievements": 0.1, "languages": 0.0, "personal": -0.5, "other": 0.0}
+_HEADING_WORDS = {word: kind for kind, words in SECTION_KINDS.items() for word in words}
+
+
+def normalize_text(text: str) -> str:
+    """Extracted text with layout noise removed: Unicode compatibility forms (ligatures, non-breaking
+    spaces), invisible characters, bullet glyphs, words hyphenated across lines, runs of spaces,
+    page-number lines and repeated blank lines"""
+    text = unicodedata.normalize("NFKC", text).translate(_INVISIBLE).replace("\r\n", "\n").replace("\r", "\n")
+    text = _WRAPPED_HYPHEN.sub(r"\1\2", text)
+    lines, blank = [], True
+    for line in text.split("\n"):
+        line = _BULLET.sub("- ", _SPACES.sub(" ", line).strip())
+        if not line:
+            if not blank:
+                lines.append("")
+            blank = True
+        elif not _PAGE_NUMBER.match(line):
+            lines.append(line)
+            blank = False
+    return "\n".join(lines).strip()
+
+
+def _signature(line: str) -> str:
+    # "Page 2 of 4" and "Page 3 of 4" are the same footer
+    return _DIGITS.sub("#", " ".join(line.lower().split()))
+
+
+def strip_repeated_lines(pages: list, edge_lines: int = 2) -> list:
+    """Pages with running headers and footers kept only where they first appear.
+
+    A line counts as a header or footer when it sits among the first or last
+    ``edge_lines`` lines of at least half the pages (digits ignored, so page
+    numbers and dates do not hide a repeat).
+    """
+    if len(pages) < 2:
+        return list(pages)
+    split = [page.split("\n") for page in pages]
+    edges = Counter()
+    for lines in split:
+        content = [line for line in lines if line.strip()]
+        edges.update({_signature(line) for line in content[:edge_lines] + content[-edge_lines:]})
+    threshold = max(2, (len(pages) + 1) // 2)
+    repeated = {signature for signature, count in edges.items() if count >= threshold}
+    if not repeated:
+        return list(pages)
+
+    seen, cleaned = set(), []
+    for lines in split:
+        kept = []
+        for line in lines:
+            signature = _signature(line)
+            if signature in repeated:
+                if signature in seen:
+                    continue
+                seen.add(signature)
+            kept.append(line)
+        cleaned.append("\n".join(kept))
+    return cleaned
+
+
+def dedupe_lines(text: str, min_length: int = 40) -> str:
+    """Drop later copies of long lines; short ones ("Python", "2019 - 2021") legitimately repeat"""
+    seen, lines = set(), []
+    for line in text.split("\n"):
+        if len(line) >= min_length:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@dataclass
+class Section:
+    """A heading and the lines under it; the leading contact block has no heading"""
+    title: str
+    kind: str
+    lines: list = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(([self.title] if self.title else []) + self.lines).strip()
+
+
+def heading_kind(line: str):
+    """Section kind if ``line`` looks like a CV heading, else None"""
+    stripped = line.strip().rstrip(":").strip()
+    words = stripped.lower().replace("&", " ").replace("/", " ").split()
+    if not words or len(words) > 4 or len(stripped) > 40 or stripped.endswith("."):
+        return None
+    for word in words:
+        if word in _HEADING_WORDS:
+            return _HEADING_WORDS[word]
+    if stripped.isupper() and any(character.isalpha() for character in stripped):
+        return "other"
+    return None
+
+
+def sectionize(text: str) -> list:
+    sections = [Section("", "header")]
+    for line in text.split("\n"):
+        kind = heading_kind(line)
+        if kind is not None:
+            sections.append(Section(line.strip(), kind))
+        else:
+            sections[-1].lines.append(line)
+    # A heading left with nothing under it (its lines were page furniture or duplicates) is dropped too
+    return [section for section in sections if any(line.strip() for line in section.lines)]
+
+
+def truncate_lines(text: str, budget: int) -> str:
+    """Leading whole lines of ``text`` within ``budget`` tokens; a first line that alone is too long is cut at a word"""
+    lines, used = [], 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            if not lines:
+                lines.append(line[:max(0, budget - 1) * 4].rsplit(" ", 1)[0])
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines).rstrip()
+
+
+@dataclass
+class PreparedText:
+    """One prompt input after compaction, with its estimated size before and after"""
+    text: str
+    raw_tokens: int
+    tokens: int
+    omitted: list = field(default_factory=list)
+    truncated: bool = False
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.raw_tokens - self.tokens)
+
+
+@functools.lru_cache(maxsize=64)
+def prepare_jd(jd_text: str, budget: int = PROMPT_JD_TOKEN_BUDGET) -> PreparedText:
+    """Normalized JD cut to ``budget``; cached, since one JD is screened against many CVs"""
+    text = dedupe_lines(normalize_text(jd_text))
+    compacted = text if estimate_tokens(text) <= budget else truncate_lines(text, budget)
+    return PreparedText(compacted, estimate_tokens(jd_text), estimate_tokens(compacted),
+                        truncated=compacted != text)
+
+
+@functools.lru_cache(maxsize=64)
+def _jd_terms(jd_text: str) -> list:
+    return query_terms(jd_text)
+
+
+def prepare_cv(cv_text: str, jd_text: str = "", budget: int = PROMPT_CV_TOKEN_BUDGET) -> PreparedText:
+    """Normalized CV within ``budget``, keeping the sections most relevant to the JD.
+
+    When the cleaned text is still over budget, the contact block is kept and
+    the remaining sections are ranked by BM25 relevance to the JD plus a
+    weight for their kind (skills and experience before hobbies). Sections are
+    taken whole in that order wherever they fit, the best one that did not is
+    cut at a line boundary to fill what is left, and the rest are named in a
+    closing note. Kept sections stay in their original order.
+    """
+    raw_tokens = estimate_tokens(cv_text)
+    text = dedupe_lines(normalize_text(cv_text))
+    if estimate_tokens(text) <= budget:
+        return PreparedText(text, raw_tokens, estimate_tokens(text))
+
+    sections = sectionize(text)
+    omitted_note = "[Omitted for length: {}]"
+    # Room for the note naming what was left out
+    remaining = budget - estimate_tokens(omitted_note.format(", ".join(s.title for s in sections if s.title)))
+    chosen = {}
+    header = sections[0] if sections[0].kind == "header" else None
+    if header is not None:
+        chosen[0] = truncate_lines(header.text, remaining)
+        remaining -= estimate_tokens(chosen[0])
+
+    relevance = BM25Index([section.text for section in sections]).normalized_scores(_jd_terms(jd_text))
+    scores = {i: relevance[i] + SECTION_WEIGHTS.get(sections[i].kind, 0.0)
+              for i in range(len(sections)) if sections[i] is not header}
+    ranked = sorted(scores, key=scores.get, reverse=True)
+
+    def take_whole(indices):
+        nonlocal remaining
+        for i in indices:
+            cost = estimate_tokens(sections[i].text)
+            if i not in chosen and cost <= remaining:
+                chosen[i] = sections[i].text
+                remaining -= cost
+
+    take_whole(i for i in ranked if scores[i] >= 0)
+    # What is left goes to the most relevant section that did not fit whole; hobbies and references come last
+    partial = next((i for i in ranked if i not in chosen and scores[i] >= 0), None)
+    truncated = partial is not None and remaining >= MIN_PARTIAL_SECTION_TOKENS
+    if truncated:
+        chosen[partial] = truncate_lines(sections[partial].text, remaining - estimate_tokens("[...]")) + "\n[...]"
+        remaining -= estimate_tokens(chosen[partial])
+    take_whole(i for i in ranked if scores[i] < 0)
+
+    omitted = [sections[i].title or "untitled" for i in range(len(sections)) if i not in chosen]
+    parts = [chosen[i] for i in sorted(chosen)]
+    if omitted:
+        parts.append(omitted_note.format(", ".join(omitted)))
+    compacted = "\n\n".join(parts)
+    return PreparedText(compacted, raw_tokens, estimate_tokens(compacted), omitted=omitted, truncated=truncated)
+
+
+class PromptCompactor:
+    """Prepares CV and JD text for screening prompts and keeps count of the tokens it saves.
+
+    Each input is normalized and held to its token budget (PROMPT_CV_TOKEN_BUDGET,
+    PROMPT_JD_TOKEN_BUDGET) before the prompt is built. Savings are exported as
+    metrics, added to the request's timing log line and summed for
+    ``/api/admin/prompts``.
+    """
+
+    def __init__(self, enabled: bool = PROMPT_COMPACTION, cv_budget: int = PROMPT_CV_TOKEN_BUDGET,
+                 jd_budget: int = PROMPT_JD_TOKEN_BUDGET):
+        self.enabled = enabled
+        self.cv_budget = cv_budget
+        self.jd_budget = jd_budget
+        self._totals = Counter()
+        self._lock = threading.Lock()
+
+    def screening_inputs(self, cv_text: str, jd_text: str) -> tuple:
+        """(cv_text, jd_text) as they should appear in a screening prompt"""
+        if not self.enabled:
+            return cv_text, jd_text
+        jd = prepare_jd(jd_text, self.jd_budget)
+        cv = prepare_cv(cv_text, jd.text, self.cv_budget)
+        self._record("cv", cv)
+        self._record("jd", jd)
+        return cv.text, jd.text
+
+    def _record(self, name: str, prepared: PreparedText):
+        with self._lock:
+            self._totals[f"{name}_inputs"] += 1
+            self._totals[f"{name}_raw_tokens"] += prepared.raw_tokens
+            self._totals[f"{name}_tokens"] += prepared.tokens
+            self._totals[f"{name}_over_budget"] += bool(prepared.truncated or prepared.omitted)
+            self._totals[f"{name}_sections_omitted"] += len(prepared.omitted)
+        if METRICS_ENABLED:
+            timing = current_timing()
+            PROMPT_INPUT_TOKENS.inc(prepared.raw_tokens, endpoint=timing.endpoint, input=name, phase="raw")
+            PROMPT_INPUT_TOKENS.inc(prepared.tokens, endpoint=timing.endpoint, input=name, phase="compacted")
+            timing.count("prompt_tokens_saved", prepared.saved)
+
+    def stats(self) -> dict:
+        with self._lock:
+            totals = dict(self._totals)
+        inputs = {}
+        for name in ("cv", "jd"):
+            raw, kept = totals.get(f"{name}_raw_tokens", 0), totals.get(f"{name}_tokens", 0)
+            inputs[name] = {
+                "inputs": totals.get(f"{name}_inputs", 0),
+                "raw_tokens": raw,
+                "tokens": kept,
+                "tokens_saved": max(0, raw - kept),
+                "saved_ratio": round(1 - kept / raw, 3) if raw else 0.0,
+                "over_budget": totals.get(f"{name}_over_budget", 0),
+                "sections_omitted": totals.get(f"{name}_sections_omitted", 0),
+            }
+        return {"enabled": self.enabled, "cv_budget": self.cv_budget, "jd_budget": self.jd_budget, **inputs}
+
+
+# Singleton instance
+prompt_compactor = PromptCompactor()
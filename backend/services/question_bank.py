@@ -0,0 +1,260 @@
+import asyncio
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from models.schemas import Question
+from services.metrics import timing_context
+
+QUIZ_BANK_ENABLED = os.getenv("QUIZ_BANK_ENABLED", "true").lower() == "true"
+QUIZ_BANK_PATH = os.getenv("QUIZ_BANK_PATH", "data/question_bank.sqlite3")
+QUIZ_BANK_LOW_WATER = int(os.getenv("QUIZ_BANK_LOW_WATER", "20"))
+QUIZ_BANK_TARGET = int(os.getenv("QUIZ_BANK_TARGET", "40"))
+QUIZ_BANK_REFILL_SIZE = int(os.getenv("QUIZ_BANK_REFILL_SIZE", "10"))
+QUIZ_BANK_WARM_ROLES = [role.strip() for role in os.getenv("QUIZ_BANK_WARM_ROLES", "").split(",") if role.strip()]
+QUIZ_BANK_WARM_LEVELS = [level.strip() for level in
+                         os.getenv("QUIZ_BANK_WARM_LEVELS", "beginner,intermediate,advanced").split(",")
+                         if level.strip()]
+
+# A refill that adds no new question this many times in a row stops, so a saturated bucket cannot loop
+MAX_FRUITLESS_REFILLS = 2
+
+_WHITESPACE = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    role TEXT NOT NULL,
+    skill_level TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    question TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (role, skill_level, normalized)
+);
+"""
+
+
+def normalize_key(text: str) -> str:
+    """Case- and whitespace-insensitive form of a role, level, topic or difficulty"""
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def normalize_question(text: str) -> str:
+    """Dedup key for a question: lowercased with punctuation and repeated whitespace removed"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text)).strip().lower()
+
+
+class Bucket:
+    """Questions for one (role, skill level), indexed by topic and difficulty"""
+
+    def __init__(self):
+        self.questions = []
+        self.keys = set()
+        self.by_topic = defaultdict(list)
+        self.by_difficulty = defaultdict(list)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def add(self, question: Question, key: str):
+        position = len(self.questions)
+        self.questions.append(question)
+        self.keys.add(key)
+        self.by_topic[normalize_key(question.topic)].append(position)
+        self.by_difficulty[normalize_key(question.difficulty)].append(position)
+
+    def sample(self, count: int, topic: str = None, difficulty: str = None):
+        """``count`` distinct questions spread across topics, or None if the bucket cannot supply them"""
+        candidates = set(range(len(self.questions)))
+        if topic is not None:
+            candidates &= set(self.by_topic.get(normalize_key(topic), ()))
+        if difficulty is not None:
+            candidates &= set(self.by_difficulty.get(normalize_key(difficulty), ()))
+        if len(candidates) < count:
+            return None
+
+        # Round-robin over shuffled topics so a quiz does not come out as five questions on one subject
+        groups = [[position for position in positions if position in candidates]
+                  for positions in self.by_topic.values()]
+        groups = [random.sample(group, len(group)) for group in groups if group]
+        random.shuffle(groups)
+        picked = []
+        while len(picked) < count:
+            for group in groups:
+                if group and len(picked) < count:
+                    picked.append(group.pop())
+        return [self.questions[position] for position in picked]
+
+
+class QuestionBank:
+    """Generated quiz questions kept for reuse, so repeated (role, skill level) quizzes skip Gemini.
+
+    Questions are deduplicated by normalized text and persisted in SQLite;
+    the index itself lives in memory, so serving a quiz is a sample over a
+    list. A bucket that drops below ``low_water`` is topped up in the
+    background, ``refill_size`` questions at a time, until it reaches
+    ``target``.
+    """
+
+    def __init__(self, path: str = QUIZ_BANK_PATH, low_water: int = QUIZ_BANK_LOW_WATER,
+                 target: int = QUIZ_BANK_TARGET, refill_size: int = QUIZ_BANK_REFILL_SIZE):
+        self.path = path
+        self.low_water = low_water
+        self.target = target
+        self.refill_size = refill_size
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0
+        self.refills = 0
+        self.refill_errors = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._buckets = None
+        self._refilling = {}
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._buckets = defaultdict(Bucket)
+            for role, skill_level, key, question in self._conn.execute(
+                "SELECT role, skill_level, normalized, question FROM questions ORDER BY created_at"
+            ):
+                self._buckets[(role, skill_level)].add(Question(**json.loads(question)), key)
+        return self._conn
+
+    def _bucket(self, role: str, skill_level: str) -> Bucket:
+        self._db()
+        return self._buckets[(normalize_key(role), normalize_key(skill_level))]
+
+    def add(self, role: str, skill_level: str, questions: list) -> int:
+        """Store the questions not already banked for this role and level; returns how many were new"""
+        role, skill_level = normalize_key(role), normalize_key(skill_level)
+        with self._lock:
+            db = self._db()
+            bucket = self._buckets[(role, skill_level)]
+            rows = []
+            for question in questions:
+                key = normalize_question(question.question)
+                if not key or key in bucket.keys:
+                    self.duplicates += 1
+                    continue
+                bucket.add(question, key)
+                rows.append((role, skill_level, key, normalize_key(question.topic),
+                             normalize_key(question.difficulty), question.model_dump_json(), time.time()))
+            db.executemany("INSERT OR IGNORE INTO questions (role, skill_level, normalized, topic, difficulty, "
+                           "question, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            db.commit()
+        return len(rows)
+
+    def sample(self, role: str, skill_level: str, count: int, topic: str = None, difficulty: str = None):
+        """``count`` banked questions, or None (a miss) if the bucket holds too few"""
+        with self._lock:
+            questions = self._bucket(role, skill_level).sample(count, topic, difficulty)
+        if questions is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return questions
+
+    def size(self, role: str, skill_level: str) -> int:
+        with self._lock:
+            return len(self._bucket(role, skill_level))
+
+    async def refill(self, role: str, skill_level: str, generate) -> int:
+        """Generate questions into a bucket until it reaches ``target``; returns how many were added"""
+        added = fruitless = 0
+        with timing_context("quiz_bank_refill"):
+            while self.size(role, skill_level) < self.target and fruitless < MAX_FRUITLESS_REFILLS:
+                # Bypass the response cache, which would hand back the questions already banked
+                questions = await generate(role=role, skill_level=skill_level, num_questions=self.refill_size,
+                                           use_cache=False)
+                new = self.add(role, skill_level, questions)
+                self.refills += 1
+                added += new
+                fruitless = 0 if new else fruitless + 1
+        return added
+
+    def schedule_refill(self, role: str, skill_level: str, generate):
+        """Top the bucket up in the background if it is below ``low_water``; at most one refill per bucket"""
+        key = (normalize_key(role), normalize_key(skill_level))
+        if key in self._refilling or self.size(role, skill_level) >= self.low_water:
+            return self._refilling.get(key)
+        task = asyncio.create_task(self.refill(role, skill_level, generate))
+        self._refilling[key] = task
+        task.add_done_callback(lambda t: self._refill_done(key, t))
+        return task
+
+    def _refill_done(self, key: tuple, task: asyncio.Task):
+        self._refilling.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.refill_errors += 1
+
+    async def serve(self, role: str, skill_level: str, num_questions: int, generate) -> tuple:
+        """A quiz from the bank, or freshly generated on a miss; returns (questions, served_from_bank).
+
+        Either way the bucket is topped up in the background when it runs low.
+        """
+        questions = self.sample(role, skill_level, num_questions)
+        from_bank = questions is not None
+        if not from_bank:
+            questions = await generate(role=role, skill_level=skill_level, num_questions=num_questions)
+            self.add(role, skill_level, questions)
+        self.schedule_refill(role, skill_level, generate)
+        return questions, from_bank
+
+    def warm_up(self, generate, roles: list = None, levels: list = None) -> list:
+        """Start background refills for every configured (role, level); returns the tasks"""
+        roles = QUIZ_BANK_WARM_ROLES if roles is None else roles
+        levels = QUIZ_BANK_WARM_LEVELS if levels is None else levels
+        tasks = [self.schedule_refill(role, level, generate) for role in roles for level in levels]
+        return [task for task in tasks if task is not None]
+
+    async def stop(self):
+        """Cancel refills still running"""
+        tasks = list(self._refilling.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._db()
+            buckets = {
+                f"{role}/{skill_level}": {
+                    "questions": len(bucket),
+                    "topics": {topic: len(positions) for topic, positions in bucket.by_topic.items()},
+                    "difficulties": {level: len(positions) for level, positions in bucket.by_difficulty.items()},
+                }
+                for (role, skill_level), bucket in self._buckets.items() if len(bucket)
+            }
+        lookups = self.hits + self.misses
+        return {
+            "enabled": QUIZ_BANK_ENABLED,
+            "questions": sum(bucket["questions"] for bucket in buckets.values()),
+            "buckets": buckets,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "duplicates": self.duplicates,
+            "refills": self.refills,
+            "refill_errors": self.refill_errors,
+            "refilling": len(self._refilling),
+            "low_water": self.low_water,
+            "target": self.target,
+        }
+
+
+# Singleton instance
+question_bank = QuestionBank()
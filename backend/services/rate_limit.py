@@ -0,0 +1,213 @@
+import asyncio
+import contextlib
+import os
+import random
+import time
+from services.errors import GeminiError, RateLimited
+from services.lazy_import import lazy_import
+from services.batching import estimate_tokens
+from services.shared_state import SharedState, SharedTokenBucket, shared_state
+
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "1000"))  # 0 disables the limit
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))  # 0 disables the limit
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+GEMINI_QUEUE_SIZE = int(os.getenv("GEMINI_QUEUE_SIZE", "200"))
+GEMINI_ADMISSION_TIMEOUT_SECONDS = float(os.getenv("GEMINI_ADMISSION_TIMEOUT_SECONDS", "30"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", "1"))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", "30"))
+
+google_exceptions = lazy_import("google.api_core.exceptions")
+
+
+def quota_errors() -> tuple:
+    # TooManyRequests covers ResourceExhausted, which is how Gemini reports quota errors
+    return (google_exceptions.TooManyRequests,)
+
+
+def transient_errors() -> tuple:
+    return (google_exceptions.ServiceUnavailable, google_exceptions.InternalServerError,
+            google_exceptions.GatewayTimeout)
+
+
+def estimate_contents_tokens(contents) -> int:
+    """Token estimate for the text parts of a prompt; file parts are reconciled from usage afterwards"""
+    if isinstance(contents, str):
+        return estimate_tokens(contents)
+    return sum(estimate_tokens(part) for part in contents if isinstance(part, str))
+
+
+class TokenBucket:
+    """Refills at ``per_minute`` units a minute, holding at most ``burst`` (default: one minute's worth).
+
+    The level may go negative when actual usage turns out higher than was
+    reserved; later callers then wait until the debt is repaid.
+    """
+
+    def __init__(self, per_minute: int, burst: int = None, clock=time.monotonic):
+        self.per_minute = per_minute
+        self.capacity = burst or per_minute
+        self.level = float(self.capacity)
+        self.clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (a request larger than the burst waits for a full bucket)"""
+        if not self.per_minute:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def take(self, amount: float):
+        if self.per_minute:
+            self._refill()
+            self.level -= amount
+
+
+class GeminiLimiter:
+    """Admission control and retries for every Gemini model call.
+
+    A call first waits for room in the requests-per-minute and
+    tokens-per-minute buckets, then for one of ``max_concurrency`` slots.
+    At most ``queue_size`` calls may wait at once and none waits longer than
+    ``admission_timeout``; beyond either limit the call fails fast with
+    RateLimited (HTTP 429 + Retry-After). Quota and transient server errors
+    are retried with full-jitter exponential backoff.
+
+    With ``shared`` the two buckets live in SharedState, so the worker
+    processes of one deployment spend a single quota; concurrency and the
+    admission queue stay per process.
+    """
+
+    def __init__(self, rpm: int = GEMINI_RPM, tpm: int = GEMINI_TPM, max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+                 queue_size: int = GEMINI_QUEUE_SIZE, admission_timeout: float = GEMINI_ADMISSION_TIMEOUT_SECONDS,
+                 max_retries: int = GEMINI_MAX_RETRIES, backoff_base: float = GEMINI_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = GEMINI_BACKOFF_MAX_SECONDS, shared: SharedState = None):
+        self.shared = shared
+        if shared is not None:
+            self.requests = SharedTokenBucket(shared, "gemini_requests", rpm)
+            self.tokens = SharedTokenBucket(shared, "gemini_tokens", tpm)
+        else:
+            self.requests = TokenBucket(rpm)
+            self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.admission_timeout = admission_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.retries = 0
+        self.quota_errors = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry))
+
+    def _reserve(self, tokens: int) -> float:
+        """Take a request and ``tokens`` from the buckets, or return how long to wait before there is room"""
+        # One transaction across both buckets, so two workers cannot both spend the last of the quota
+        with self.shared.transaction() if self.shared is not None else contextlib.nullcontext():
+            delay = max(self.requests.delay(1), self.tokens.delay(tokens))
+            if not delay:
+                self.requests.take(1)
+                self.tokens.take(tokens)
+        return delay
+
+    async def _shared_call(self, func, *args):
+        # A shared bucket may wait on another worker's SQLite lock; that wait happens on a thread, not the event loop
+        return await asyncio.to_thread(func, *args) if self.shared is not None else func(*args)
+
+    async def _admit(self, tokens: int):
+        if self.waiting >= self.queue_size:
+            self.rejected += 1
+            retry_after = max(await self._shared_call(self.requests.delay, self.waiting + 1), self.backoff_base)
+            raise RateLimited("Too many Gemini requests are queued; retry later", retry_after=retry_after)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.admission_timeout
+        self.waiting += 1
+        try:
+            while True:
+                delay = await self._shared_call(self._reserve, tokens)
+                if not delay:
+                    break
+                if loop.time() + delay > deadline:
+                    self.rejected += 1
+                    raise RateLimited("Gemini rate limit reached; retry later", retry_after=delay)
+                await asyncio.sleep(delay)
+
+            try:
+                if self._semaphore.locked():
+                    # Not wait_for, whose separate acquire task can be granted a slot that is then never released;
+                    # a cancelled acquire() hands back a slot it was granted at the deadline itself
+                    async with asyncio.timeout(max(0.0, deadline - loop.time())):
+                        await self._semaphore.acquire()
+                else:
+                    # A free slot is taken without yielding, so this call never counts as queued
+                    await self._semaphore.acquire()
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise RateLimited("Timed out waiting for a free Gemini slot", retry_after=self.admission_timeout)
+        finally:
+            self.waiting -= 1
+        self.admitted += 1
+
+    async def _reconcile(self, response, reserved: int):
+        # Charge the bucket for what the call really used (audio, output tokens) rather than the estimate
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None)
+        if isinstance(total, int) and total > 0:
+            await self._shared_call(self.tokens.take, total - reserved)
+
+    async def call(self, attempt, tokens: int = 0):
+        """Run ``attempt()`` (a fresh model call each time) under the limits, retrying retryable errors"""
+        for retry in range(self.max_retries + 1):
+            await self._admit(tokens)
+            self.in_flight += 1
+            try:
+                response = await attempt()
+                await self._reconcile(response, tokens)
+                return response
+            # Evaluated only once an error is raised, so the SDK's exceptions are imported on demand
+            except quota_errors() as e:
+                self.quota_errors += 1
+                if retry == self.max_retries:
+                    raise RateLimited(f"Gemini quota exhausted: {e}", retry_after=self.backoff_max) from e
+            except transient_errors() as e:
+                if retry == self.max_retries:
+                    raise GeminiError(f"Gemini unavailable: {e}") from e
+            finally:
+                self.in_flight -= 1
+                self._semaphore.release()
+            self.retries += 1
+            await asyncio.sleep(self.backoff(retry))
+
+    def stats(self) -> dict:
+        return {
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "quota_errors": self.quota_errors,
+            "rpm": self.requests.per_minute,
+            "tpm": self.tokens.per_minute,
+            "max_concurrency": self.max_concurrency,
+            "queue_size": self.queue_size,
+            "shared": self.shared is not None,
+        }
+
+
+def create_limiter() -> GeminiLimiter:
+    """Build the limiter, sharing its quota with the other worker processes when SHARED_STATE_PATH is set"""
+    return GeminiLimiter(shared=shared_state if shared_state.enabled else None)
@@ -0,0 +1,165 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+# Set by serve.py (or by hand, next to uvicorn --workers) so every worker process of a deployment shares it
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "")
+SHARED_LEASE_SECONDS = float(os.getenv("SHARED_LEASE_SECONDS", "150"))
+SHARED_POLL_SECONDS = float(os.getenv("SHARED_POLL_SECONDS", "0.05"))
+# uvicorn reads the same variable as its default --workers
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    level REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SharedState:
+    """SQLite file through which the worker processes of one deployment coordinate.
+
+    It holds the levels of the Gemini rate-limit buckets, so N workers share
+    one quota instead of each spending its own, and leases on response cache
+    keys, so a prompt already being answered by one worker is awaited by the
+    others rather than sent again. Every operation is a short ``BEGIN
+    IMMEDIATE`` transaction; nested ``transaction()`` blocks join the outer one.
+    Operations block while another worker holds the write lock, so async
+    callers run them with ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str = SHARED_STATE_PATH, lease_seconds: float = SHARED_LEASE_SECONDS,
+                 poll_interval: float = SHARED_POLL_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._conn = None
+        self._depth = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @property
+    def owner(self) -> int:
+        return os.getpid()
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use, after uvicorn has forked or spawned the worker
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode: transactions are begun explicitly so they can take the write lock up front
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self._lock:
+            db = self._db()
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield db
+                finally:
+                    self._depth -= 1
+                return
+            db.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            else:
+                db.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def bucket_level(self, name: str, per_minute: int, capacity: float, now: float) -> float:
+        """Current level of a bucket, refilled up to ``now`` and saved"""
+        with self.transaction() as db:
+            row = db.execute("SELECT level, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            level = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * per_minute / 60)
+            db.execute("INSERT OR REPLACE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)", (name, level, now))
+        return level
+
+    def bucket_take(self, name: str, per_minute: int, capacity: float, amount: float, now: float):
+        with self.transaction() as db:
+            level = self.bucket_level(name, per_minute, capacity, now)
+            db.execute("UPDATE buckets SET level = ? WHERE name = ?", (level - amount, name))
+
+    def claim(self, key: str) -> bool:
+        """Take the lease on ``key`` unless another process holds an unexpired one (a crashed owner's lease lapses)"""
+        now = time.time()
+        with self.transaction() as db:
+            cursor = db.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at < ?",
+                (key, self.owner, now + self.lease_seconds, now),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key: str):
+        with self.transaction() as db:
+            db.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def reset(self):
+        """Forget bucket levels and leases; the launcher calls this before starting the workers"""
+        with self.transaction() as db:
+            db.execute("DELETE FROM buckets")
+            db.execute("DELETE FROM leases")
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False, "workers": WEB_CONCURRENCY}
+        with self.transaction() as db:
+            buckets = {name: round(level, 2) for name, level in db.execute("SELECT name, level FROM buckets")}
+            leases = db.execute("SELECT COUNT(*) FROM leases WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+        return {"enabled": True, "path": self.path, "workers": WEB_CONCURRENCY, "pid": self.owner,
+                "buckets": buckets, "leases": leases}
+
+
+class SharedTokenBucket:
+    """TokenBucket whose level lives in SharedState, so every worker process draws on the same budget"""
+
+    def __init__(self, state: SharedState, name: str, per_minute: int, burst: int = None, clock=time.time):
+        self.state = state
+        self.name = name
+        self.per_minute = per_minute
+        self.capacity = burst or per_minute
+        # Wall-clock time, since the timestamp is compared across processes
+        self.clock = clock
+
+    @property
+    def level(self) -> float:
+        return self.state.bucket_level(self.name, self.per_minute, self.capacity, self.clock())
+
+    def delay(self, amount: float) -> float:
+        if not self.per_minute:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def take(self, amount: float):
+        if self.per_minute:
+            self.state.bucket_take(self.name, self.per_minute, self.capacity, amount, self.clock())
+
+
+# Singleton instance
+shared_state = SharedState()
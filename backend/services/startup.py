@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+from services.lazy_import import preload, import_times
+
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "false").lower() == "true"
+
+SKIPPED, RUNNING, DONE, FAILED = "skipped", "running", "done", "failed"
+
+
+class StartupState:
+    """How long the app took to come up, and whether it is ready to take traffic.
+
+    ``/health`` only says the process is alive; readiness additionally needs
+    the lifespan startup to have finished, an API key to be configured and,
+    when ``STARTUP_PREWARM`` is on, the pre-warm to have completed.
+    """
+
+    def __init__(self, prewarm: bool = STARTUP_PREWARM):
+        self.prewarm = prewarm
+        self.import_seconds = None
+        self.startup_seconds = None
+        self.prewarm_seconds = None
+        self.prewarm_status = SKIPPED
+        self.prewarm_error = None
+        self.started = False
+        self._task = None
+
+    def checks(self) -> dict:
+        return {
+            "started": self.started,
+            "gemini_api_key": bool(os.getenv("GEMINI_API_KEY")),
+            "prewarm": self.prewarm_status,
+        }
+
+    @property
+    def ready(self) -> bool:
+        checks = self.checks()
+        return checks["started"] and checks["gemini_api_key"] and checks["prewarm"] in (SKIPPED, DONE)
+
+    def start_prewarm(self, *warmups):
+        """Run the warm-up callables (sync or async) in the background; readiness waits for them"""
+        if self.prewarm:
+            self.prewarm_status = RUNNING
+            self._task = asyncio.create_task(self._run_prewarm(warmups))
+
+    async def _run_prewarm(self, warmups):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(preload)
+            for warmup in warmups:
+                result = warmup()
+                if asyncio.iscoroutine(result):
+                    await result
+        except Exception as e:
+            self.prewarm_status, self.prewarm_error = FAILED, str(e) or type(e).__name__
+        else:
+            self.prewarm_status = DONE
+        self.prewarm_seconds = round(time.perf_counter() - started, 4)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "checks": self.checks(),
+            "import_seconds": self.import_seconds,
+            "startup_seconds": self.startup_seconds,
+            "prewarm_seconds": self.prewarm_seconds,
+            "prewarm_error": self.prewarm_error,
+            "lazy_imports": import_times(),
+        }
+
+
+# Singleton instance
+startup_state = StartupState()
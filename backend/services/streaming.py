@@ -0,0 +1,16 @@
+import json
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def wants_sse(headers) -> bool:
+    """Clients opt into Server-Sent Events with Accept: text/event-stream; NDJSON otherwise"""
+    return SSE_MEDIA_TYPE in headers.get("accept", "")
+
+
+def encode_event(event: str, data: dict, sse: bool) -> str:
+    """Serialize one stream event as an SSE frame or an NDJSON line"""
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, **data}) + "\n"
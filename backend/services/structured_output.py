@@ -0,0 +1,54 @@
+import json
+from pydantic import TypeAdapter, ValidationError
+from services.errors import GeminiError
+from services.json_stream import JSONScanner
+from services.metrics import stage
+
+REPAIR_PROMPT = """Your previous response could not be used: {error}
+
+It must be valid JSON matching this JSON schema:
+{schema}
+
+Previous response:
+{response}
+
+Reply with only the corrected JSON and nothing else."""
+
+
+class StructuredOutputError(GeminiError):
+    """The model's response did not contain JSON matching the expected schema"""
+    status_code = 502
+
+
+def _adapter(schema, many: bool) -> TypeAdapter:
+    return TypeAdapter(list[schema] if many else schema)
+
+
+def parse_structured(text: str, schema, many: bool = False):
+    """Validate the first JSON value in ``text`` that fits ``schema`` (a list of it when ``many``).
+
+    Values are found with the bracket-balancing scanner, so prose and
+    markdown fences around the JSON are ignored. Raises StructuredOutputError
+    describing the last problem when no value fits.
+    """
+    adapter = _adapter(schema, many)
+    error = "no JSON value found in the response"
+    scanner = JSONScanner(openers="[" if many else "{")
+    for raw in scanner.feed(text):
+        try:
+            with stage("json_parse"):
+                value = json.loads(raw)
+            with stage("validation"):
+                return adapter.validate_python(value)
+        except json.JSONDecodeError as e:
+            error = f"invalid JSON: {e}"
+        except ValidationError as e:
+            error = f"JSON does not match the schema: {e.errors(include_url=False)}"
+    raise StructuredOutputError(error)
+
+
+def repair_prompt(text: str, schema, many: bool, error: StructuredOutputError) -> str:
+    """Prompt asking the model to turn its own unusable response into valid JSON"""
+    json_schema = _adapter(schema, many).json_schema()
+    return REPAIR_PROMPT.format(error=error, schema=json.dumps(json_schema), response=text)
+
@@ -0,0 +1,70 @@
+import os
+import pytest
+
+# The Gemini client is configured on first use; tests swap in stub models and never reach the real API
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from services.gemini_client import gemini_client  # noqa: E402
+from services.executor import GeminiExecutor  # noqa: E402
+from services.cache import ResponseCache, MemoryCacheBackend  # noqa: E402
+from services.rate_limit import GeminiLimiter  # noqa: E402
+from tests.stubs import CONCURRENT_REQUESTS  # noqa: E402
+
+
+@pytest.fixture
+async def stub_model():
+    """Swap the singleton's model, executor, limiter and cache for the duration of a test"""
+    original = gemini_client._model, gemini_client.executor, gemini_client.limiter, gemini_client.cache
+    gemini_client.executor = GeminiExecutor(max_workers=CONCURRENT_REQUESTS, timeout=5)
+    gemini_client.limiter = GeminiLimiter(max_concurrency=CONCURRENT_REQUESTS, backoff_base=0.01, backoff_max=0.05)
+    gemini_client.cache = ResponseCache(MemoryCacheBackend())
+
+    def install(model):
+        gemini_client.model = model
+        return model
+
+    yield install
+    # Recording deletions scheduled by the test would otherwise outlive its event loop
+    await gemini_client.remote_files.drain()
+    gemini_client.executor.shutdown()
+    gemini_client._model, gemini_client.executor, gemini_client.limiter, gemini_client.cache = original
+
+
+@pytest.fixture(autouse=True)
+def isolated_document_store(tmp_path, monkeypatch):
+    """Give every test its own empty document store"""
+    from services.document_store import DocumentStore
+    store = DocumentStore(str(tmp_path / "documents"))
+    monkeypatch.setattr("routers.cv_screener.document_store", store)
+    monkeypatch.setattr("routers.admin.document_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def isolated_question_bank(tmp_path, monkeypatch):
+    """Give every test its own empty question bank, with background refills off unless a test raises low_water"""
+    from services.question_bank import QuestionBank
+    bank = QuestionBank(str(tmp_path / "question_bank.sqlite3"), low_water=0)
+    monkeypatch.setattr("routers.tech_quiz.question_bank", bank)
+    monkeypatch.setattr("routers.admin.question_bank", bank)
+    return bank
+
+
+@pytest.fixture(autouse=True)
+def isolated_jd_profiles(tmp_path, monkeypatch):
+    """Give every test its own empty JD profile store"""
+    from services.jd_profiles import JDProfileStore
+    store = JDProfileStore(str(tmp_path / "jd_profiles.sqlite3"))
+    for module in ("routers.jd_generator", "routers.cv_screener", "routers.admin"):
+        monkeypatch.setattr(f"{module}.jd_profile_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def isolated_artifacts(tmp_path, monkeypatch):
+    """Give every test its own empty artifact store"""
+    from services.artifacts import ArtifactStore
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite3"))
+    for module in ("services.artifacts", "routers.cv_screener", "routers.artifacts", "routers.admin"):
+        monkeypatch.setattr(f"{module}.artifact_store", store)
+    return store
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import re
+import time
+from io import BytesIO
+from docx import Document
+from google.api_core import exceptions as google_exceptions
+
+MODEL_LATENCY = 0.3
+CONCURRENT_REQUESTS = 12
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubStreamResponse:
+    """Yields the response text in small chunks spread over the model latency"""
+
+    def __init__(self, text: str, latency: float, chunk_size: int = 16):
+        self.chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        self.delay = latency / max(len(self.chunks), 1)
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield StubResponse(chunk)
+
+
+class AsyncStubModel:
+    """Stands in for GenerativeModel with a fixed native-async latency"""
+
+    def __init__(self, latency: float = MODEL_LATENCY, text: str = "Backend Engineer\nGreat job"):
+        self.latency = latency
+        self.text = text
+        self.calls = 0
+        self.prompts = []
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        self.calls += 1
+        self.prompts.append(contents)
+        if stream:
+            return StubStreamResponse(self.respond(contents), self.latency)
+        await asyncio.sleep(self.latency)
+        return StubResponse(self.respond(contents))
+
+    def respond(self, contents) -> str:
+        return self.text
+
+
+class SyncStubModel:
+    """Stands in for a model that only exposes a blocking call"""
+
+    def __init__(self, latency: float = MODEL_LATENCY, text: str = "Backend Engineer\nGreat job"):
+        self.latency = latency
+        self.text = text
+
+    def generate_content(self, contents):
+        time.sleep(self.latency)
+        return StubResponse(self.text)
+
+
+class ScreeningStubModel(AsyncStubModel):
+    """Answers screening prompts with the score embedded in the CV as ``score:<n>``"""
+
+    def respond(self, contents) -> str:
+        match = re.search(r"score:(\d+)", contents)
+        return json.dumps({
+            "match_score": int(match.group(1)) if match else 50,
+            "strengths": ["Python"],
+            "gaps": ["Kubernetes"],
+            "confidence_level": "High",
+            "confidence_analysis": "Clear and direct",
+            "recommendation": "interview",
+        })
+
+
+class BatchScreeningStubModel(ScreeningStubModel):
+    """Also answers batched screening prompts, leaving out the CV numbers listed in ``drop``"""
+
+    def __init__(self, latency: float = MODEL_LATENCY, drop: tuple = ()):
+        super().__init__(latency=latency)
+        self.drop = drop
+
+    def respond(self, contents) -> str:
+        cvs = re.findall(r"Candidate CV #(\d+):\n(.*?)(?=\n\nCandidate CV #|\n\nProvide)", contents, re.DOTALL)
+        if not cvs:
+            return super().respond(contents)
+        return json.dumps([
+            {"index": int(number), **json.loads(ScreeningStubModel.respond(self, cv))} for number, cv in cvs if int(number) not in self.drop
+        ])
+
+
+class ScriptedStubModel(AsyncStubModel):
+    """Returns the given responses in order, repeating the last one"""
+
+    def __init__(self, *responses: str, latency: float = 0):
+        super().__init__(latency=latency)
+        self.responses = list(responses)
+
+    def respond(self, contents) -> str:
+        return self.responses[min(self.calls, len(self.responses)) - 1]
+
+
+class QuotaStubModel(AsyncStubModel):
+    """Fails the first ``failures`` calls the way Gemini reports an exhausted quota"""
+
+    def __init__(self, failures: int, latency: float = 0):
+        super().__init__(latency=latency)
+        self.failures = failures
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        if self.calls < self.failures:
+            self.calls += 1
+            raise google_exceptions.ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+        return await super().generate_content_async(contents, stream)
+
+
+AUDIO_JSON = json.dumps({
+    "confidence_score": 80, "confidence_level": "High", "tone": "Calm",
+    "summary": "Explained the design", "transcription": "I would start with the data model",
+})
+
+
+class AudioWindowStubModel(AsyncStubModel):
+    """Analyzes time-window prompts: one transcript word per second, scores set per window start.
+
+    ``failures`` maps a window start (seconds) to how many calls for it fail first.
+    """
+
+    def __init__(self, scores: dict, failures: dict = None, latency: float = 0.05):
+        super().__init__(latency=latency)
+        self.scores = scores
+        self.failures = dict(failures or {})
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().generate_content_async(contents, stream)
+        finally:
+            self.in_flight -= 1
+
+    def respond(self, contents) -> str:
+        # A whole-recording prompt has no window; treat it as the first ten seconds
+        start, end = [int(m) * 60 + int(s) for m, s in re.findall(r"(\d+):(\d\d)", contents[0])] or [0, 10]
+        if self.failures.get(start):
+            self.failures[start] -= 1
+            raise RuntimeError(f"segment at {start}s failed")
+        score = self.scores[start]
+        return json.dumps({
+            "confidence_score": score,
+            "confidence_level": "High" if score >= 70 else "Low",
+            "tone": "Calm" if score >= 70 else "Nervous",
+            "summary": f"Window at {start}s",
+            "transcription": " ".join(f"w{second}" for second in range(start, end)),
+        })
+
+
+class EchoAudioStubModel(AsyncStubModel):
+    """"Transcribes" an uploaded FakeFileStorage file as the text of its bytes"""
+
+    def respond(self, contents) -> str:
+        return json.dumps({
+            "confidence_score": 70, "confidence_level": "High", "tone": "Calm",
+            "summary": "Echo", "transcription": contents[1].data.decode(),
+        })
+
+
+class FakeFileStorage:
+    """Stands in for genai.upload_file/delete_file, recording what was uploaded and deleted"""
+
+    def __init__(self):
+        self.uploads = []
+        self.deleted = []
+
+    def upload_file(self, path, mime_type=None):
+        data = path.read()
+        self.uploads.append({"source": path, "data": data, "mime_type": mime_type})
+        return type("UploadedFile", (), {"name": f"files/{len(self.uploads)}", "data": data})()
+
+    def delete_file(self, name):
+        self.deleted.append(name)
+
+
+def timed_extract(kind: str, file_bytes: bytes, max_pages: int, time_budget: float):
+    """Stands in for extraction._extract in worker processes: ``sleep:<seconds>:<text>`` documents take that long
+
+    Importable by name, so spawned workers can unpickle it when tests patch it in.
+    """
+    from services.extraction import ExtractedDocument
+    _, seconds, text = file_bytes.decode().split(":", 2)
+    time.sleep(float(seconds))
+    return ExtractedDocument(text=text, pages=[text], kind=kind, page_count=1)
+
+
+def make_docx(*paragraphs: str) -> bytes:
+    """Build an in-memory DOCX fixture"""
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_pdf(*pages: str) -> bytes:
+    """Build a minimal single-font PDF with one line of text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in pages:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+QUIZ_JSON = json.dumps([
+    {"question": f"Question {i}?", "answer": f"Answer {i}", "difficulty": "easy", "topic": "Python"}
+    for i in range(3)
+])
+
+
+class QuizStubModel(AsyncStubModel):
+    """Answers quiz prompts with the requested number of new questions, numbered across calls"""
+
+    def __init__(self, latency: float = 0, topics: tuple = ("Python", "SQL", "HTTP")):
+        super().__init__(latency=latency)
+        self.topics = topics
+        self.generated = 0
+
+    def respond(self, contents) -> str:
+        count = int(re.search(r"Generate (\d+) technical", contents).group(1))
+        questions = []
+        for _ in range(count):
+            questions.append({"question": f"Question {self.generated}?", "answer": "Answer",
+                              "difficulty": "medium", "topic": self.topics[self.generated % len(self.topics)]})
+            self.generated += 1
+        return json.dumps(questions)
@@ -1,6 +1,14 @@
+import asyncio
+import io
+import json
+import zipfile
 import pytest
 from httpx import AsyncClient, ASGITransport
 from main import app
+from services.gemini_client import gemini_client
+from services.extraction import DocumentExtractor
+from tests.stubs import (ScreeningStubModel, ScriptedStubModel, FakeFileStorage, AUDIO_JSON, make_docx,
+                         timed_extract)
 
 
 @pytest.fixture
@@ -57,6 +65,118 @@ class TestCVScreenerEndpoints:
         response = await client.post("/api/cv/screen", data={"jd_text": "test"})
         assert response.status_code == 422  # Missing file
 
+    async def test_screen_cv_unsupported_file_type(self, client: AsyncClient):
+        """Test CV screening rejects files that are not PDF or DOCX"""
+        response = await client.post(
+            "/api/cv/screen", data={"jd_text": "test"}, files={"cv_file": ("cv.txt", b"hello", "text/plain")}
+        )
+        assert response.status_code == 400
+
+    async def test_resubmitted_cv_returns_stored_screen(self, client: AsyncClient, stub_model,
+                                                        isolated_document_store):
+        """Test a resubmitted CV skips parsing and the model and returns the stored screen"""
+        model = stub_model(ScreeningStubModel(latency=0))
+        files = {"cv_file": ("cv.docx", make_docx("Jane", "score:82"), "application/octet-stream")}
+
+        first = await client.post("/api/cv/screen", data={"jd_text": "Python developer"}, files=files)
+        second = await client.post("/api/cv/screen", data={"jd_text": "Python  developer"}, files=files)
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json() and first.json()["match_score"] == 82
+        assert model.calls == 1
+
+        stats = (await client.get("/api/admin/store")).json()
+        assert stats["documents"] == 1 and stats["screen_hits"] == 1
+
+    async def test_batch_screen_requires_files(self, client: AsyncClient):
+        """Test batch screening rejects a request with no CVs"""
+        response = await client.post("/api/cv/screen/batch", data={"jd_text": "test"})
+        assert response.status_code == 400
+
+    async def test_batch_screen_streams_ranked_results(self, client: AsyncClient, stub_model):
+        """Test batch screening streams one result per CV then a ranking, isolating bad files"""
+        stub_model(ScreeningStubModel(latency=0.01))
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("cvs/carol.docx", make_docx("Carol", "score:90"))
+            zf.writestr("cvs/notes.txt", "ignored")
+        files = [
+            ("cv_files", ("alice.docx", make_docx("Alice", "score:40"), "application/octet-stream")),
+            ("cv_files", ("bob.docx", make_docx("Bob", "score:75"), "application/octet-stream")),
+            ("cv_files", ("broken.pdf", b"not a pdf", "application/pdf")),
+            ("archive", ("batch.zip", archive.getvalue(), "application/zip")),
+        ]
+
+        response = await client.post("/api/cv/screen/batch", data={"jd_text": "Python developer"}, files=files)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        results = [e for e in events if e["event"] == "result"]
+        assert len(results) == 4
+        assert [e for e in results if e["filename"] == "broken.pdf"][0]["error"]
+
+        summary = events[-1]
+        assert summary["event"] == "summary"
+        assert summary["screened"] == 3 and summary["failed"] == 1
+        assert [r["filename"] for r in summary["ranking"]] == ["carol.docx", "bob.docx", "alice.docx"]
+
+    async def test_batch_screen_prefilter_skips_weak_matches(self, client: AsyncClient, stub_model):
+        """Test only the top_k pre-scored CVs reach the model"""
+        model = stub_model(ScreeningStubModel(latency=0))
+        files = [
+            ("cv_files", ("match.docx", make_docx("Python Django AWS", "score:90"), "application/octet-stream")),
+            ("cv_files", ("partial.docx", make_docx("Python", "score:60"), "application/octet-stream")),
+            ("cv_files", ("other.docx", make_docx("Java Spring", "score:30"), "application/octet-stream")),
+        ]
+
+        response = await client.post(
+            "/api/cv/screen/batch", data={"jd_text": "Python Django AWS", "top_k": "1"}, files=files
+        )
+        events = [json.loads(line) for line in response.text.splitlines()]
+        by_name = {e["filename"]: e for e in events if e["event"] == "result"}
+        assert model.calls == 1
+        assert by_name["match.docx"]["result"]["pre_score"] == by_name["match.docx"]["pre_score"]
+        assert by_name["match.docx"]["pre_score"] > by_name["partial.docx"]["pre_score"]
+        assert by_name["other.docx"]["skipped"] and by_name["other.docx"]["result"] is None
+        assert events[-1]["screened"] == 1 and events[-1]["skipped"] == 2
+
+    async def test_batch_screen_sse(self, client: AsyncClient, stub_model):
+        """Test batch screening emits Server-Sent Events when asked"""
+        stub_model(ScreeningStubModel(latency=0))
+        files = [("cv_files", ("alice.docx", make_docx("Alice", "score:40"), "application/octet-stream"))]
+
+        response = await client.post(
+            "/api/cv/screen/batch", data={"jd_text": "Python"}, files=files,
+            headers={"Accept": "text/event-stream"}
+        )
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith("event: result\ndata: ")
+        assert "event: summary" in response.text
+
+    async def test_batch_screen_hung_file_fails_alone(self, client: AsyncClient, stub_model, monkeypatch):
+        """Test a CV whose parse hangs fails on its own while the rest of a large batch parses normally"""
+        stub_model(ScreeningStubModel(latency=0))
+        monkeypatch.setattr("services.extraction._extract", timed_extract)
+        extractor = DocumentExtractor(workers=2, timeout=0.3)
+        monkeypatch.setattr("routers.cv_screener.document_extractor", extractor)
+        try:
+            # Workers import the stub on their first document; keep that out of the measured batch
+            await asyncio.gather(*[extractor.extract("warm.docx", b"sleep:0:warm") for _ in range(2)])
+            # More CVs than workers, together taking far longer than one budget
+            files = [("cv_files", ("hung.docx", b"sleep:60:hung", "application/octet-stream"))] + [
+                ("cv_files", (f"cv{n}.docx", f"sleep:0.1:Python score:{50 + n}".encode(), "application/octet-stream"))
+                for n in range(12)
+            ]
+            response = await client.post("/api/cv/screen/batch", data={"jd_text": "Python"}, files=files)
+        finally:
+            extractor.shutdown()
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        by_name = {e["filename"]: e for e in events if e["event"] == "result"}
+        assert "budget" in by_name["hung.docx"]["error"]
+        assert all(by_name[f"cv{n}.docx"]["result"]["match_score"] == 50 + n for n in range(12))
+        assert events[-1]["screened"] == 12 and events[-1]["failed"] == 1
+
 
 class TestTechQuizEndpoints:
     """Tests for Tech Quiz endpoints"""
@@ -79,3 +199,43 @@ class TestLiveInterviewEndpoints:
         """Test audio analysis fails without file"""
         response = await client.post("/api/interview/analyze-audio")
         assert response.status_code == 422  # Missing file
+
+    @pytest.fixture
+    def file_storage(self, monkeypatch):
+        storage = FakeFileStorage()
+        monkeypatch.setattr("services.gemini_client.genai.upload_file", storage.upload_file)
+        monkeypatch.setattr(gemini_client, "remote_files", type(gemini_client.remote_files)(storage.delete_file))
+        return storage
+
+    async def test_analyze_audio_streams_upload_and_deletes_remote_file(self, client: AsyncClient, stub_model,
+                                                                        file_storage):
+        """Test the spooled upload goes to Gemini as is and the remote copy is cleaned up"""
+        stub_model(ScriptedStubModel(AUDIO_JSON))
+        recording = b"\x1aE\xdf\xa3" + b"\x00" * 4096
+
+        response = await client.post("/api/interview/analyze-audio",
+                                     files={"file": ("recording.webm", recording, "audio/webm")})
+        assert response.status_code == 200
+        assert response.json()["tone"] == "Calm"
+
+        upload, = file_storage.uploads
+        assert upload["data"] == recording
+        assert upload["mime_type"] == "audio/webm"
+        assert not isinstance(upload["source"], str)  # no temp file path round trip
+
+        await gemini_client.remote_files.drain()
+        assert file_storage.deleted == ["files/1"]
+
+    async def test_analyze_audio_rejects_oversized_recording(self, client: AsyncClient, file_storage, monkeypatch):
+        """Test recordings over the byte limit are refused before any upload"""
+        monkeypatch.setattr("services.audio_ingest.AUDIO_MAX_BYTES", 1024)
+        response = await client.post("/api/interview/analyze-audio",
+                                     files={"file": ("answer.wav", b"\x00" * 2048, "audio/wav")})
+        assert response.status_code == 413
+        assert file_storage.uploads == []
+
+    async def test_analyze_audio_rejects_non_audio(self, client: AsyncClient, file_storage):
+        """Test non-audio uploads get 415"""
+        response = await client.post("/api/interview/analyze-audio",
+                                     files={"file": ("notes.txt", b"hello", "text/plain")})
+        assert response.status_code == 415
@@ -0,0 +1,130 @@
+import gzip
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import AsyncClient, ASGITransport
+from main import app
+from services.artifacts import ArtifactStore, matching_etag
+from services.compression import CompressionMiddleware, choose_encoding
+from tests.stubs import AsyncStubModel, ScreeningStubModel, make_docx
+
+LONG_JD = "Backend Engineer\n" + "\n".join(
+    f"- Own service {n}: design its APIs, review changes and keep it reliable on AWS" for n in range(40))
+REQUEST = {"role": "Backend Engineer", "skills": ["Python"], "experience_level": "senior"}
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+def plain_app(body: bytes, streamed: bool = False, **middleware) -> FastAPI:
+    inner = FastAPI()
+
+    @inner.get("/")
+    async def respond():
+        if streamed:
+            return StreamingResponse(iter([body, body]), media_type="text/plain")
+        return PlainTextResponse(body, headers={"ETag": '"abc"'})
+
+    inner.add_middleware(CompressionMiddleware, **middleware)
+    return inner
+
+
+class TestArtifacts:
+    async def test_generated_jd_is_served_with_an_etag_and_revalidated(self, client: AsyncClient, stub_model):
+        stub_model(AsyncStubModel(latency=0))
+        generated = (await client.post("/api/jd/generate", json=REQUEST)).json()
+
+        response = await client.get(f"/api/artifacts/{generated['artifact_id']}",
+                                    headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200 and "content-encoding" not in response.headers
+        assert response.json() == {key: generated[key] for key in ("job_description", "title")}
+        assert response.headers["etag"] == f'"{generated["artifact_id"]}"'
+        assert "immutable" in response.headers["cache-control"] and response.headers["x-artifact-kind"] == "jd"
+
+        revalidated = await client.get(f"/api/artifacts/{generated['artifact_id']}",
+                                       headers={"If-None-Match": f'W/"other", {response.headers["etag"]}'})
+        assert revalidated.status_code == 304 and revalidated.content == b""
+        assert revalidated.headers["etag"] == response.headers["etag"]
+        assert (await client.get("/api/artifacts/unknown")).status_code == 404
+
+    async def test_same_content_maps_to_one_artifact(self, client: AsyncClient, stub_model, isolated_artifacts):
+        stub_model(AsyncStubModel(latency=0))
+        first = (await client.post("/api/jd/generate", json=REQUEST)).json()
+        again = (await client.post("/api/jd/generate", json=REQUEST)).json()
+
+        assert first["artifact_id"] == again["artifact_id"]
+        assert isolated_artifacts.stats()["kinds"]["jd"]["artifacts"] == 1
+
+    async def test_large_artifact_is_gzipped_with_a_suffixed_etag(self, client: AsyncClient, stub_model):
+        stub_model(AsyncStubModel(latency=0, text=LONG_JD))
+        artifact_id = (await client.post("/api/jd/generate", json=REQUEST)).json()["artifact_id"]
+
+        response = await client.get(f"/api/artifacts/{artifact_id}", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip" and response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == response.num_bytes_downloaded < len(response.content)
+        assert response.headers["etag"] == f'"{artifact_id}-gzip"'
+        assert response.json()["job_description"] == LONG_JD
+
+        # The encoded copy's tag revalidates too, and is echoed back unchanged
+        revalidated = await client.get(f"/api/artifacts/{artifact_id}",
+                                       headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+        assert revalidated.status_code == 304 and revalidated.headers["etag"] == response.headers["etag"]
+
+    async def test_batch_report_is_stored(self, client: AsyncClient, stub_model):
+        stub_model(ScreeningStubModel(latency=0))
+        files = [("cv_files", (f"cv{n}.docx", make_docx(f"Python score:{70 + n}"), "application/octet-stream"))
+                 for n in range(3)]
+        response = await client.post("/api/cv/screen/batch", data={"jd_text": "Python"}, files=files)
+        summary = [event for event in map(json.loads, response.text.splitlines()) if event["event"] == "summary"][0]
+
+        report = (await client.get(f"/api/artifacts/{summary['artifact_id']}")).json()
+        assert [item["filename"] for item in report["items"]] == ["cv0.docx", "cv1.docx", "cv2.docx"]
+        assert report["summary"]["ranking"][0]["filename"] == "cv2.docx" and "artifact_id" not in report["summary"]
+
+    async def test_small_and_streamed_responses_are_not_compressed(self):
+        async with AsyncClient(transport=ASGITransport(app=plain_app(b"x" * 2000, minimum_size=4000)),
+                               base_url="http://test") as small:
+            response = await small.get("/", headers={"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in response.headers and response.headers["etag"] == '"abc"'
+        async with AsyncClient(transport=ASGITransport(app=plain_app(b"x" * 2000, streamed=True)),
+                               base_url="http://test") as streamed:
+            response = await streamed.get("/", headers={"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in response.headers and len(response.content) == 4000
+
+    async def test_gzip_output_is_deterministic(self):
+        async with AsyncClient(transport=ASGITransport(app=plain_app(b"hello " * 500)), base_url="http://test") as ac:
+            first, second = [(await ac.get("/", headers={"Accept-Encoding": "gzip"})) for _ in range(2)]
+        assert first.headers["etag"] == '"abc-gzip"'
+        expected = len(gzip.compress(b"hello " * 500, mtime=0))
+        assert first.num_bytes_downloaded == second.num_bytes_downloaded == expected
+
+    def test_choose_encoding(self):
+        assert choose_encoding("gzip, deflate", brotli_available=True) == "gzip"
+        assert choose_encoding("gzip, deflate, br", brotli_available=True) == "br"
+        assert choose_encoding("gzip, deflate, br", brotli_available=False) == "gzip"
+        assert choose_encoding("br;q=0.5, gzip", brotli_available=True) == "gzip"
+        assert choose_encoding("*", brotli_available=False) == "gzip"
+        assert choose_encoding("identity") is None and choose_encoding("gzip;q=0") is None
+
+    def test_matching_etag(self):
+        assert matching_etag('"a1"', '"a1"') == '"a1"'
+        assert matching_etag('W/"a1-br", "b2"', '"a1"') == 'W/"a1-br"'
+        assert matching_etag("*", '"a1"') == '"a1"'
+        assert matching_etag('"b2"', '"a1"') is None and matching_etag(None, '"a1"') is None
+
+    def test_brotli(self):
+        brotli = pytest.importorskip("brotli")
+        from services.compression import compress
+        assert brotli.decompress(compress(b"hello " * 500, "br")) == b"hello " * 500
+
+    def test_store_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "artifacts.sqlite3")
+        artifact_id = ArtifactStore(path).put("quiz", {"questions": []})
+
+        reopened = ArtifactStore(path)
+        assert reopened.get(artifact_id).body == b'{"questions":[]}'
+        assert reopened.stats()["hits"] == 1 and reopened.get("missing") is None
@@ -0,0 +1,215 @@
+import io
+import tempfile
+import wave
+import pytest
+from starlette.testclient import TestClient
+from main import app
+from services.gemini_client import gemini_client
+from services.audio_ingest import wav_duration
+from services.audio_segments import plan_windows, stitch_transcripts, merge_segments
+from models.schemas import AudioAnalysisResponse
+from services.live_session import AudioRingBuffer, LiveSession, live_sessions
+from benchmarks.fixtures import make_wav
+from tests.stubs import AudioWindowStubModel, EchoAudioStubModel, FakeFileStorage
+
+# Twenty minutes: windows start at 0, 290, 580, 870 and 1160 seconds
+LONG_RECORDING_SECONDS = 1200
+WINDOW_STARTS = [0, 290, 580, 870, 1160]
+
+
+@pytest.fixture
+def file_storage(monkeypatch):
+    storage = FakeFileStorage()
+    monkeypatch.setattr("services.gemini_client.genai.upload_file", storage.upload_file)
+    monkeypatch.setattr(gemini_client, "remote_files", type(gemini_client.remote_files)(storage.delete_file))
+    return storage
+
+
+def analysis(score: int, tone: str, transcription: str) -> AudioAnalysisResponse:
+    return AudioAnalysisResponse(confidence_score=score, confidence_level="High" if score >= 70 else "Low",
+                                 tone=tone, summary="s", transcription=transcription)
+
+
+class TestSegmentation:
+    def test_windows_overlap_and_cover_the_recording(self):
+        windows = plan_windows(LONG_RECORDING_SECONDS, window=300, overlap=10)
+        assert [start for start, _ in windows] == WINDOW_STARTS
+        assert windows[-1][1] == LONG_RECORDING_SECONDS
+        assert all(previous[1] - current[0] == 10 for previous, current in zip(windows, windows[1:]))
+        assert plan_windows(120, window=300, overlap=10) == [(0.0, 120.0)]
+
+    def test_stitching_drops_words_repeated_across_the_overlap(self):
+        assert stitch_transcripts(["so the plan was to", "plan was to shard the table"]) == \
+            "so the plan was to shard the table"
+        assert stitch_transcripts(["first part.", "Second part"]) == "first part. Second part"
+
+    def test_merge_weights_scores_by_owned_duration(self):
+        windows = [(0.0, 300.0), (290.0, 400.0)]
+        merged = merge_segments(windows, [(1, analysis(90, "Calm", "a b")), (1, analysis(30, "Nervous", "b c"))])
+        # The first window owns 295s and the second 105s
+        assert merged.confidence_score == round((90 * 295 + 30 * 105) / 400)
+        assert merged.tone == "Calm"
+        assert merged.transcription == "a b c"
+        assert [entry.confidence_score for entry in merged.timeline] == [90, 30]
+
+    def test_failed_windows_are_left_out_of_the_merge(self):
+        windows = [(0.0, 300.0), (290.0, 600.0)]
+        merged = merge_segments(windows, [(3, RuntimeError("boom")), (1, analysis(40, "Nervous", "x"))])
+        assert merged.confidence_score == 40
+        assert merged.timeline[0].error == "boom"
+        assert merged.timeline[0].attempts == 3
+
+    def test_wav_duration_is_read_from_the_header(self):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as writer:
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(8000)
+            writer.writeframes(b"\x00\x00" * 12000)
+        buffer.seek(0)
+        assert wav_duration(buffer) == 1.5
+        assert buffer.tell() == 0
+        # Uploads arrive spooled, and a spooled file's "w+b" mode must not stop wave reading it
+        spooled = tempfile.SpooledTemporaryFile()
+        spooled.write(buffer.getvalue())
+        spooled.seek(0)
+        assert wav_duration(spooled) == 1.5
+        assert wav_duration(io.BytesIO(b"\x1aE\xdf\xa3 webm")) is None
+
+
+class TestChunkedAnalysis:
+    async def test_long_recording_is_analyzed_in_parallel_windows(self, stub_model, file_storage):
+        scores = dict(zip(WINDOW_STARTS, [80, 80, 40, 80, 80]))
+        model = stub_model(AudioWindowStubModel(scores))
+
+        result = await gemini_client.analyze_audio(io.BytesIO(make_wav(LONG_RECORDING_SECONDS, 100)), "audio/wav",
+                                                   duration=LONG_RECORDING_SECONDS)
+        assert model.calls == len(WINDOW_STARTS)
+        assert 1 < model.peak_in_flight <= 4
+        # Each window uploads only its own slice of the recording, and each slice is deleted afterwards
+        windows = plan_windows(LONG_RECORDING_SECONDS, window=300, overlap=10)
+        assert [wav_duration(io.BytesIO(upload["data"])) for upload in file_storage.uploads] == \
+            [end - start for start, end in windows]
+        await gemini_client.remote_files.drain()
+        assert len(file_storage.deleted) == len(WINDOW_STARTS)
+        assert [entry.start_seconds for entry in result.timeline] == WINDOW_STARTS
+        assert 40 < result.confidence_score < 80
+        assert result.tone == "Calm"
+        # One word per second with every overlap removed
+        assert result.transcription.split() == [f"w{second}" for second in range(LONG_RECORDING_SECONDS)]
+
+    async def test_failed_window_is_retried_alone(self, stub_model, file_storage):
+        model = stub_model(AudioWindowStubModel(dict.fromkeys(WINDOW_STARTS, 75), failures={580: 1}))
+
+        result = await gemini_client.analyze_audio(io.BytesIO(make_wav(LONG_RECORDING_SECONDS, 100)), "audio/wav",
+                                                   duration=LONG_RECORDING_SECONDS)
+        assert model.calls == len(WINDOW_STARTS) + 1
+        assert len(file_storage.uploads) == len(WINDOW_STARTS)
+        assert [entry.attempts for entry in result.timeline] == [1, 1, 2, 1, 1]
+        assert all(entry.error is None for entry in result.timeline)
+
+    async def test_long_unsliceable_recording_is_one_call_unless_opted_in(self, stub_model, file_storage,
+                                                                          monkeypatch):
+        model = stub_model(AudioWindowStubModel(dict.fromkeys(WINDOW_STARTS + [0], 75)))
+        result = await gemini_client.analyze_audio(io.BytesIO(b"audio"), "audio/webm", duration=LONG_RECORDING_SECONDS)
+        assert model.calls == 1 and result.timeline is None
+
+        monkeypatch.setattr("services.gemini_client.AUDIO_WINDOW_WHOLE_FILE", True)
+        result = await gemini_client.analyze_audio(io.BytesIO(b"audio"), "audio/webm", duration=LONG_RECORDING_SECONDS)
+        # The whole file is uploaded once and sent with every window's prompt
+        assert model.calls == 1 + len(WINDOW_STARTS) and len(file_storage.uploads) == 2
+        assert [entry.start_seconds for entry in result.timeline] == WINDOW_STARTS
+
+    async def test_short_recording_is_a_single_call(self, stub_model, file_storage):
+        model = stub_model(AudioWindowStubModel({0: 65}))
+
+        result = await gemini_client.analyze_audio(io.BytesIO(b"audio"), "audio/webm", duration=None)
+        assert model.calls == 1
+        assert result.timeline is None
+
+
+class TestLiveInterview:
+    def test_ring_buffer_keeps_header_and_most_recent_frames(self):
+        buffer = AudioRingBuffer(capacity=6)
+        for frame in (b"HDR", b"aaa", b"bbb", b"ccc"):
+            buffer.append(frame)
+        assert buffer.snapshot() == b"HDRbbbccc"
+        assert buffer.dropped_bytes == 3
+
+    def test_window_updates_add_only_new_speech(self):
+        # One byte of audio per spoken word; the window keeps the last 150 words, so updates every 20 overlap by 130
+        spoken = [f"word{n}" for n in range(200)]
+        session = LiveSession(window_bytes=150)
+        session.feed(b"H")
+        for update in range(1, 11):
+            for _ in range(20):
+                session.feed(b"a")
+            session.snapshot()
+            heard = spoken[max(0, update * 20 - 150):update * 20]
+            if update % 2 == 0:
+                # Re-transcriptions of the same audio are rarely word for word identical
+                heard = [word.upper() if n % 7 == 0 else word for n, word in enumerate(heard)]
+                heard[len(heard) // 4] = "umm"
+            message = session.apply(analysis(80, "Calm", " ".join(heard)))
+            assert len(session.transcription.split()) == update * 20
+        assert session.transcription.lower().split() == spoken
+        assert message["new_text"].lower().split() == spoken[180:]
+        session.close()
+
+    def test_recording_duration_comes_from_the_audio_not_the_clock(self):
+        recording = make_wav(2, 8000)
+        session = LiveSession(mime_type="audio/wav")
+        # Ten minutes on the clock, with pauses and a reconnect, for two seconds of audio
+        session.started -= 600
+        for start in range(0, len(recording), 1000):
+            session.feed(recording[start:start + 1000])
+        assert session.recording_duration() == 2.0
+        assert session.recording_file().read() == recording
+        session.close()
+
+        webm = LiveSession(mime_type="audio/webm")
+        webm.feed(b"\x1aE\xdf\xa3 audio")
+        assert webm.recording_duration() is None
+        webm.close()
+
+    def test_session_refuses_audio_past_the_size_cap(self):
+        session = LiveSession(max_bytes=10)
+        assert session.feed(b"12345")
+        assert not session.feed(b"123456")
+        assert session.received_bytes == 5
+        session.close()
+
+    def test_stream_gets_updates_then_final_result(self, stub_model, file_storage, monkeypatch):
+        stub_model(EchoAudioStubModel(latency=0))
+        monkeypatch.setattr("routers.live_interview.LIVE_UPDATE_SECONDS", 0.05)
+
+        with TestClient(app).websocket_connect("/api/interview/live") as websocket:
+            assert websocket.receive_json()["type"] == "ready"
+            websocket.send_text('{"type": "start", "mime_type": "audio/webm"}')
+            websocket.send_bytes(b"so I would ")
+            websocket.send_bytes(b"start with ")
+            update = websocket.receive_json()
+            # An update may land between the two frames; the next one then carries both
+            while update["transcription"] != "so I would start with":
+                assert update["type"] == "update"
+                update = websocket.receive_json()
+            assert update["rolling_confidence_score"] == 70
+
+            websocket.send_bytes(b"the schema")
+            websocket.send_text('{"type": "stop"}')
+            message = websocket.receive_json()
+            while message["type"] == "update":
+                message = websocket.receive_json()
+            assert message["type"] == "final"
+            assert message["result"]["transcription"] == "so I would start with the schema"
+
+        assert live_sessions.stats()["active"] == 0
+        assert file_storage.uploads[-1]["data"] == b"so I would start with the schema"
+
+    def test_sessions_over_the_cap_are_turned_away(self, stub_model, monkeypatch):
+        monkeypatch.setattr(live_sessions, "max_sessions", 0)
+
+        with TestClient(app).websocket_connect("/api/interview/live") as websocket:
+            message = websocket.receive_json()
+            assert message["type"] == "error" and message["final"]
+            assert websocket.receive()["code"] == 1013
@@ -0,0 +1,32 @@
+from benchmarks import scaling
+from benchmarks.load_test import SCENARIOS, parse_args, run_load_test, compare, percentile
+
+
+class TestLoadTestHarness:
+    async def test_every_scenario_succeeds_against_the_fake_backend(self):
+        args = parse_args(["--requests", "3", "--warmup", "0", "--concurrency", "2", "--latency-median", "0",
+                           "--batch-size", "2", "--cv-fixtures", "4", "--audio-seconds", "1"])
+        report = await run_load_test(args)
+
+        assert set(report["scenarios"]) == set(SCENARIOS)
+        for name, row in report["scenarios"].items():
+            assert row["ok"] == 3, (name, row["statuses"])
+        assert report["scenarios"]["cv_batch"]["gemini_calls"] == 6
+
+    def test_baseline_comparison_flags_latency_and_throughput_regressions(self):
+        baseline = {"scenarios": {"cv_screen": {"p95_ms": 100.0, "rps": 50.0}}}
+        assert compare({"scenarios": {"cv_screen": {"p95_ms": 110.0, "rps": 46.0}}}, baseline, 0.15) == []
+        assert len(compare({"scenarios": {"cv_screen": {"p95_ms": 130.0, "rps": 30.0}}}, baseline, 0.15)) == 2
+
+    def test_percentile_interpolates(self):
+        assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+        assert percentile([5.0], 0.99) == 5.0
+
+
+class TestScalingHarness:
+    def test_worker_processes_screen_distinct_cvs_through_shared_state(self):
+        args = scaling.parse_args(["--workers", "1,2", "--requests", "3", "--warmup", "1", "--concurrency", "2"])
+        report = scaling.run_scaling(args)
+
+        assert [(run["workers"], run["ok"], run["requests"]) for run in report["runs"]] == [(1, 3, 3), (2, 6, 6)]
+        assert report["runs"][0]["speedup"] == 1.0
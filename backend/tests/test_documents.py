@@ -0,0 +1,256 @@
+import pytest
+from docx import Document
+from io import BytesIO
+import os
+import time
+import asyncio
+from services.extraction import DocumentExtractor, ExtractedDocument
+from services.document_store import DocumentStore, sha256_bytes, hash_text
+from services.prefilter import tokenize, pre_score, select_for_screening
+from services.errors import DocumentError, DocumentTooLarge, UnsupportedDocument
+from services.docx_parser import extract_text_from_docx
+from services.prompt_prep import PromptCompactor, normalize_text, strip_repeated_lines, prepare_cv
+from services.gemini_client import gemini_client
+from services.metrics import RequestTiming, _current
+from benchmarks import fixtures
+from tests.stubs import make_pdf, make_docx, timed_extract, ScreeningStubModel
+
+
+@pytest.fixture
+def extractor():
+    extractor = DocumentExtractor(workers=1, max_bytes=64 * 1024, max_pages=2, timeout=10)
+    yield extractor
+    extractor.shutdown()
+
+
+class TestDocumentExtraction:
+    """Tests for the process-pool document extraction service"""
+
+    async def test_pdf_pages_extracted_in_worker_process(self, extractor):
+        document = await extractor.extract("cv.pdf", make_pdf("Jane Doe", "Python developer"))
+        assert document.pages == ["Jane Doe", "Python developer"]
+        assert document.text == "Jane Doe\nPython developer"
+        assert not document.truncated
+        assert document.term_counts == {"jane": 1, "doe": 1, "python": 1, "developer": 1}
+
+    async def test_pdf_page_limit_truncates(self, extractor):
+        document = await extractor.extract("cv.pdf", make_pdf("one", "two", "three"))
+        assert document.pages == ["one", "two"]
+        assert document.page_count == 3 and document.truncated
+
+    async def test_byte_limit_rejects_before_parsing(self, extractor):
+        with pytest.raises(DocumentTooLarge):
+            await extractor.extract("cv.pdf", b"0" * (64 * 1024 + 1))
+
+    async def test_unsupported_extension(self, extractor):
+        with pytest.raises(UnsupportedDocument):
+            await extractor.extract("cv.txt", b"hello")
+
+    async def test_corrupt_document_raises_document_error(self, extractor):
+        with pytest.raises(DocumentError):
+            await extractor.extract("cv.pdf", b"not a pdf")
+
+    async def test_time_queued_for_a_worker_is_not_budget(self, monkeypatch):
+        monkeypatch.setattr("services.extraction._extract", timed_extract)
+        extractor = DocumentExtractor(workers=1, timeout=0.3)
+        try:
+            await extractor.extract("warm.docx", b"sleep:0:warm")
+            # Eight 0.2s parses queued at once take longer than any one budget, but each fits its own
+            documents = await asyncio.gather(*[extractor.extract(f"cv{n}.docx", f"sleep:0.2:cv {n}".encode())
+                                               for n in range(8)])
+            assert [document.text for document in documents] == [f"cv {n}" for n in range(8)]
+        finally:
+            extractor.shutdown()
+
+    async def test_hung_document_only_fails_itself(self, monkeypatch):
+        monkeypatch.setattr("services.extraction._extract", timed_extract)
+        extractor = DocumentExtractor(workers=2, timeout=0.3)
+        try:
+            await asyncio.gather(*[extractor.extract("warm.docx", b"sleep:0:warm") for _ in range(2)])
+            outcomes = await asyncio.gather(
+                extractor.extract("hung.docx", b"sleep:60:hung"),
+                *[extractor.extract(f"cv{n}.docx", f"sleep:0.1:cv {n}".encode()) for n in range(6)],
+                return_exceptions=True)
+
+            assert isinstance(outcomes[0], DocumentError) and "budget" in str(outcomes[0])
+            assert [outcome.text for outcome in outcomes[1:]] == [f"cv {n}" for n in range(6)]
+            # The hung worker was replaced; both slots take documents again
+            again = await asyncio.gather(*[extractor.extract("cv.docx", b"sleep:0:again") for _ in range(2)])
+            assert [document.text for document in again] == ["again", "again"]
+        finally:
+            extractor.shutdown()
+
+    async def test_thread_mode(self):
+        extractor = DocumentExtractor(workers=0)
+        assert await extractor.extract_text("cv.docx", make_docx("Inline")) == "Inline"
+
+    def test_docx_includes_tables_headers_and_footers(self):
+        document = Document()
+        document.sections[0].header.paragraphs[0].text = "Jane Doe | jane@example.com"
+        document.sections[0].footer.paragraphs[0].text = "References on request"
+        document.add_paragraph("Experience")
+        table = document.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "Python"
+        table.cell(0, 1).text = "6 years"
+        buffer = BytesIO()
+        document.save(buffer)
+
+        assert extract_text_from_docx(buffer.getvalue()).splitlines() == [
+            "Jane Doe | jane@example.com",
+            "Experience",
+            "Python | 6 years",
+            "References on request",
+        ]
+
+
+class TestDocumentStore:
+    """Tests for the hash-keyed extracted text and screen store"""
+
+    def test_round_trip_and_hit_ratio(self, tmp_path):
+        store = DocumentStore(str(tmp_path))
+        sha = sha256_bytes(b"cv bytes")
+        assert store.get_document(sha) is None
+
+        store.put_document(sha, "cv.pdf", 8, ExtractedDocument(text="Jane Doe", kind="pdf", page_count=1))
+        document = store.get_document(sha)
+        assert document.text == "Jane Doe" and document.kind == "pdf"
+        # Term counts are stored with the text, so a resubmitted CV is not tokenized again either
+        assert document.term_counts == {"jane": 1, "doe": 1}
+
+        jd_hash = hash_text("Python  developer\n")
+        assert jd_hash == hash_text("Python developer")
+        store.put_screen(sha, jd_hash, "model", {"match_score": 80})
+        assert store.get_screen(sha, jd_hash, "model") == {"match_score": 80}
+        assert store.get_screen(sha, jd_hash, "other-model") is None
+
+        stats = store.stats()
+        assert stats["documents"] == 1 and stats["screens"] == 1
+        assert stats["document_hit_ratio"] == 0.5 and stats["screen_hit_ratio"] == 0.5
+
+    def test_evicts_least_recently_used_past_max_bytes(self, tmp_path):
+        store = DocumentStore(str(tmp_path), max_bytes=10)
+        store.put_document("a" * 64, "a.pdf", 1, ExtractedDocument(text="123456", kind="pdf"))
+        store.put_document("b" * 64, "b.pdf", 1, ExtractedDocument(text="123456", kind="pdf"))
+
+        assert store.get_document("a" * 64) is None
+        assert store.get_document("b" * 64).text == "123456"
+        assert not os.path.exists(store._blob_path("a" * 64))
+
+    def test_puts_sweep_only_past_max_bytes_or_the_sweep_interval(self, tmp_path, monkeypatch):
+        store = DocumentStore(str(tmp_path), max_bytes=100, sweep_seconds=3600)
+        sweeps = []
+        sweep = store.enforce_retention
+        monkeypatch.setattr(store, "enforce_retention", lambda: sweeps.append(1) or sweep())
+
+        for n in range(9):
+            store.put_document(f"{n:064d}", "cv.pdf", 1, ExtractedDocument(text="0123456789", kind="pdf"))
+        assert len(sweeps) == 1
+        # The eleventh 10-byte text takes the store past max_bytes
+        store.put_document("a" * 64, "cv.pdf", 1, ExtractedDocument(text="0123456789", kind="pdf"))
+        store.put_document("b" * 64, "cv.pdf", 1, ExtractedDocument(text="0123456789", kind="pdf"))
+        assert len(sweeps) == 2 and store.stats()["documents"] == 10
+
+        store._swept_at -= 3601
+        store.put_document("c" * 64, "cv.pdf", 1, ExtractedDocument(text="0123456789", kind="pdf"))
+        assert len(sweeps) == 3
+
+    def test_drops_documents_past_retention(self, tmp_path):
+        store = DocumentStore(str(tmp_path), retention_days=1)
+        store.put_document("a" * 64, "a.pdf", 1, ExtractedDocument(text="old", kind="pdf"))
+        store.put_screen("a" * 64, "jd", "model", {"match_score": 1})
+        store._db().execute("UPDATE documents SET last_used_at = ?", (time.time() - 2 * 86400,))
+
+        assert store.enforce_retention() == 1
+        assert store.stats()["documents"] == 0 and store.stats()["screens"] == 0
+
+
+class TestPrefilter:
+    """Tests for the local BM25 pre-score stage"""
+
+    def test_tokenize_keeps_tech_terms_and_drops_stopwords(self):
+        assert tokenize("Strong C++, C# and Node.js skills with 5 years of AWS") == ["c++", "c#", "node.js", "aws"]
+
+    def test_pre_score_ranks_matching_cvs_first(self):
+        jd = "Python Django PostgreSQL AWS"
+        scores = pre_score(jd, [
+            "Java Spring Oracle developer",
+            "Python Django PostgreSQL AWS engineer",
+            "Python developer",
+        ])
+        assert scores[1] > 80
+        assert scores[1] > scores[2] > scores[0] == 0.0
+        assert pre_score(jd, ["Python Django PostgreSQL AWS"]) == [100.0]
+        # Stored term counts stand in for the text they were counted from
+        assert pre_score(jd, ["", "Java"], term_counts=[{"python": 1, "django": 1}, None])[0] > 0
+
+    def test_pre_score_does_not_depend_on_the_batch(self):
+        jd = "Senior Python engineer: Django, PostgreSQL, AWS, Docker and Kubernetes"
+        cv = "Python and Django developer, five years on AWS with PostgreSQL"
+        alone = pre_score(jd, [cv])[0]
+        for others in (["Python Django AWS"] * 9, ["Java Spring Oracle"] * 49, [cv] * 4):
+            assert pre_score(jd, [cv, *others])[0] == alone
+        # The same CV alone and in a batch clears a min_pre_score threshold alike
+        assert 0 < alone < 100
+
+    def test_select_for_screening(self):
+        scores = [10.0, 90.0, 50.0, 70.0]
+        assert select_for_screening(scores, top_k=2, min_score=0) == {1, 3}
+        assert select_for_screening(scores, top_k=0, min_score=50) == {1, 2, 3}
+        assert select_for_screening(scores, top_k=0, min_score=0) == {0, 1, 2, 3}
+
+
+LONG_CV = "\n".join([
+    "Jane Doe", "jane@example.com",
+    "SKILLS", "Python, FastAPI, PostgreSQL, Kubernetes",
+    "Experience",
+    *[f"- Built payment services in Python and PostgreSQL for client {i} of the platform team" for i in range(40)],
+    "Hobbies", *[f"Watercolour painting, choir and sailing around island number {i}" for i in range(40)],
+])
+
+
+class TestPromptCompaction:
+    """Tests for CV/JD normalization and token budgeting before screening prompts"""
+
+    def test_normalize_text_removes_layout_noise(self):
+        text = "ﬁnance\u00a0team \u00ad\n\n\n• Built   APIs\nfront-\nend work\nPage 2 of 3\n- 4 -\n"
+        assert normalize_text(text) == "finance team\n\n- Built APIs\nfrontend work"
+
+    def test_running_headers_and_footers_kept_once(self):
+        pages = ["Jane Doe - CV\nPython\nPage 1 of 3", "Jane Doe - CV\nDjango\nPage 2 of 3",
+                 "Jane Doe - CV\nAWS\nPage 3 of 3"]
+        assert strip_repeated_lines(pages) == ["Jane Doe - CV\nPython\nPage 1 of 3", "Django", "AWS"]
+        assert strip_repeated_lines(["Only page\nOnly page"]) == ["Only page\nOnly page"]
+
+    async def test_pdf_extraction_drops_repeated_headers(self):
+        pdf = fixtures.make_pdf([["Jane Doe - CV", "Python developer"], ["Jane Doe - CV", "Kubernetes operator"]])
+        document = await DocumentExtractor(workers=0).extract("cv.pdf", pdf)
+        assert document.pages[1].startswith("Jane Doe - CV")
+        assert document.text == "Jane Doe - CV\nPython developer\nKubernetes operator"
+
+    def test_over_budget_cv_keeps_relevant_sections_in_order(self):
+        prepared = prepare_cv(LONG_CV, "Senior Python engineer: FastAPI, PostgreSQL, Kubernetes", budget=400)
+
+        assert prepared.tokens <= 400 < prepared.raw_tokens
+        assert prepared.omitted == ["Hobbies"] and prepared.truncated
+        assert prepared.text.startswith("Jane Doe\njane@example.com\n\nSKILLS\nPython, FastAPI")
+        assert prepared.text.endswith("[...]\n\n[Omitted for length: Hobbies]")
+
+    def test_cv_within_budget_is_only_normalized(self):
+        prepared = prepare_cv("Jane   Doe\n\n\nPython", "Python", budget=100)
+        assert prepared.text == "Jane Doe\n\nPython" and not prepared.omitted
+
+    async def test_screen_prompt_uses_compacted_cv_and_reports_savings(self, stub_model, monkeypatch):
+        compactor = PromptCompactor(cv_budget=400, jd_budget=100)
+        monkeypatch.setattr("services.gemini_client.prompt_compactor", compactor)
+        model = stub_model(ScreeningStubModel(latency=0))
+        timing = RequestTiming("test")
+        token = _current.set(timing)
+        try:
+            await gemini_client.screen_cv(LONG_CV, "Python  engineer", use_cache=False)
+        finally:
+            _current.reset(token)
+
+        assert "Watercolour" not in model.prompts[0] and "Python engineer" in model.prompts[0]
+        stats = compactor.stats()
+        assert stats["cv"]["over_budget"] == 1 and stats["cv"]["tokens"] <= 400
+        assert timing.counts["prompt_tokens_saved"] == stats["cv"]["tokens_saved"] + stats["jd"]["tokens_saved"] > 0
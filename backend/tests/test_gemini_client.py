@@ -0,0 +1,539 @@
+import asyncio
+import json
+import sqlite3
+import time
+import pytest
+from httpx import AsyncClient, ASGITransport
+from main import app
+from services.gemini_client import gemini_client
+from tests.stubs import AsyncStubModel, SyncStubModel, ScriptedStubModel, BatchScreeningStubModel, QuotaStubModel, MODEL_LATENCY, CONCURRENT_REQUESTS, QUIZ_JSON
+from models.schemas import CVScreenResponse
+from services.structured_output import parse_structured, StructuredOutputError
+from services.json_stream import JSONArrayStreamParser
+from services.errors import GeminiTimeoutError, ClientDisconnected, RateLimited
+from services.executor import GeminiExecutor, cancel_on_disconnect
+from services.cache import ResponseCache, MemoryCacheBackend, SQLiteCacheBackend, make_cache_key
+from services.batching import MicroBatcher
+from services.rate_limit import GeminiLimiter, TokenBucket
+from services.gemini_client import GeminiClient
+from services.model_router import ModelRouter, Route, load_routes, load_prices, TASKS
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+JD_PAYLOAD = {"role": "Backend Engineer", "skills": ["Python"], "experience_level": "mid"}
+
+
+class TestConcurrentLoad:
+    """N concurrent requests should finish in about one model latency, not N"""
+
+    @pytest.mark.parametrize("model_cls", [AsyncStubModel, SyncStubModel])
+    async def test_concurrent_requests_overlap(self, client: AsyncClient, stub_model, model_cls):
+        stub_model(model_cls())
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/jd/generate", json={**JD_PAYLOAD, "role": f"Engineer {i}"})
+            for i in range(CONCURRENT_REQUESTS)
+        ])
+        elapsed = time.perf_counter() - start
+
+        assert all(r.status_code == 200 for r in responses)
+        assert elapsed < MODEL_LATENCY * 3, f"{CONCURRENT_REQUESTS} requests took {elapsed:.2f}s"
+
+    async def test_health_stays_responsive_during_model_call(self, client: AsyncClient, stub_model):
+        stub_model(SyncStubModel(latency=1.0))
+
+        pending = asyncio.create_task(client.post("/api/jd/generate", json=JD_PAYLOAD))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        health = await client.get("/health")
+        assert health.status_code == 200
+        assert time.perf_counter() - start < 0.5
+        assert (await pending).status_code == 200
+
+
+class TestTimeouts:
+    async def test_timeout_maps_to_504(self, client: AsyncClient, stub_model):
+        stub_model(AsyncStubModel(latency=1.0))
+        gemini_client.executor.timeout = 0.1
+
+        response = await client.post("/api/jd/generate", json=JD_PAYLOAD)
+        assert response.status_code == 504
+
+    async def test_run_sync_timeout_raises(self):
+        executor = GeminiExecutor(max_workers=1, timeout=0.05)
+        with pytest.raises(GeminiTimeoutError):
+            await executor.run_sync(time.sleep, 0.5)
+        executor.shutdown()
+
+    async def test_abandoned_result_is_handed_back_for_cleanup(self):
+        executor = GeminiExecutor(max_workers=1, timeout=0.05)
+        abandoned = asyncio.Event()
+
+        def slow_upload():
+            time.sleep(0.15)
+            return "files/late"
+
+        results = []
+        with pytest.raises(GeminiTimeoutError):
+            await executor.run_sync(slow_upload, on_abandoned=lambda r: (results.append(r), abandoned.set()))
+        await asyncio.wait_for(abandoned.wait(), 1)
+        assert results == ["files/late"]
+        executor.shutdown()
+
+    async def test_cancel_on_disconnect_cancels_work(self, monkeypatch):
+        monkeypatch.setattr("services.executor.DISCONNECT_POLL_SECONDS", 0.01)
+
+        class GoneRequest:
+            async def is_disconnected(self):
+                return True
+
+        cancelled = asyncio.Event()
+
+        async def slow_call():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(ClientDisconnected):
+            await cancel_on_disconnect(GoneRequest(), slow_call())
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+
+
+class TestResponseCache:
+    async def test_identical_concurrent_requests_make_one_upstream_call(self, client: AsyncClient, stub_model):
+        model = stub_model(AsyncStubModel())
+
+        responses = await asyncio.gather(*[
+            client.post("/api/jd/generate", json=JD_PAYLOAD) for _ in range(CONCURRENT_REQUESTS)
+        ])
+        assert all(r.status_code == 200 for r in responses)
+        assert model.calls == 1
+
+        await client.post("/api/jd/generate", json=JD_PAYLOAD)
+        assert model.calls == 1
+        stats = gemini_client.cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["coalesced"] == CONCURRENT_REQUESTS - 1
+
+    async def test_no_cache_header_bypasses_cache(self, client: AsyncClient, stub_model):
+        model = stub_model(AsyncStubModel(latency=0))
+
+        await client.post("/api/jd/generate", json=JD_PAYLOAD)
+        await client.post("/api/jd/generate", json=JD_PAYLOAD, headers={"Cache-Control": "no-cache"})
+        assert model.calls == 2
+
+    async def test_errors_are_not_cached(self):
+        cache = ResponseCache(MemoryCacheBackend())
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            raise RuntimeError("quota")
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.get_or_compute("k", failing)
+        assert len(calls) == 2
+
+    def test_key_normalizes_whitespace_and_includes_model(self):
+        assert make_cache_key("a  b\n c", "m1") == make_cache_key(" a b c ", "m1")
+        assert make_cache_key("a b c", "m1") != make_cache_key("a b c", "m2")
+
+    def test_memory_backend_evicts_least_recently_used(self):
+        backend = MemoryCacheBackend(max_entries=2, ttl=60)
+        backend.set("a", "1")
+        backend.set("b", "2")
+        backend.get("a")
+        backend.set("c", "3")
+        assert backend.get("b") is None
+        assert backend.get("a") == "1" and backend.get("c") == "3"
+
+    def test_memory_backend_expires_entries(self):
+        backend = MemoryCacheBackend(max_entries=2, ttl=-1)
+        backend.set("a", "1")
+        assert backend.get("a") is None
+
+    def test_sqlite_backend_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        SQLiteCacheBackend(path, max_entries=2, ttl=60).set("a", "1")
+
+        backend = SQLiteCacheBackend(path, max_entries=2, ttl=60)
+        assert backend.get("a") == "1"
+        backend.set("b", "2")
+        backend.set("c", "3")
+        assert len(backend) == 2
+
+    def test_sqlite_backend_hits_do_not_write(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        backend = SQLiteCacheBackend(path, max_entries=2, ttl=60)
+        backend.set("a", "1")
+        backend.set("b", "2")
+
+        # Another worker holding the write lock does not hold up a read
+        peer = sqlite3.connect(path)
+        peer.execute("BEGIN IMMEDIATE")
+        start = time.perf_counter()
+        assert backend.get("a") == "1"
+        assert time.perf_counter() - start < 1
+        peer.execute("COMMIT")
+
+        # The hit is still counted for eviction once the next write records it
+        backend.set("c", "3")
+        assert backend.get("b") is None and backend.get("a") == "1"
+
+
+def parse_sse(text: str) -> list:
+    events = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestStreaming:
+    async def test_jd_stream_sends_tokens_then_result(self, client: AsyncClient, stub_model):
+        stub_model(AsyncStubModel(latency=0.05, text="Backend Engineer\n" + "Build APIs. " * 10))
+
+        response = await client.post("/api/jd/generate/stream", json=JD_PAYLOAD)
+        events = parse_sse(response.text)
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert len([e for e in events if e[0] == "token"]) > 1
+        assert events[-1] == ("result", (await client.post("/api/jd/generate", json=JD_PAYLOAD)).json())
+
+    async def test_first_event_arrives_before_generation_finishes(self, stub_model):
+        # httpx's ASGI transport buffers whole responses, so time the client generator directly
+        stub_model(AsyncStubModel(latency=1.0, text="Backend Engineer\n" + "Build APIs. " * 20))
+
+        start = time.perf_counter()
+        events = gemini_client.stream_jd(**JD_PAYLOAD)
+        event, _ = await events.__anext__()
+        assert event == "token"
+        assert time.perf_counter() - start < 0.5
+        await events.aclose()
+
+    async def test_quiz_stream_emits_each_question(self, client: AsyncClient, stub_model):
+        stub_model(AsyncStubModel(latency=0.05, text="```json\n" + QUIZ_JSON + "\n```"))
+        payload = {"role": "Python Developer", "skill_level": "beginner", "num_questions": 3}
+
+        events = parse_sse((await client.post("/api/quiz/generate/stream", json=payload)).text)
+        assert [e[0] for e in events] == ["question", "question", "question", "result"]
+        assert [e[1]["index"] for e in events[:3]] == [0, 1, 2]
+        assert events[-1][1] == (await client.post("/api/quiz/generate", json=payload)).json()
+
+    def test_array_parser_handles_split_chunks_and_nested_brackets(self):
+        parser = JSONArrayStreamParser()
+        text = 'Here you go: [{"q": "a {b} [c]", "esc": "\\"}"}, {"q": "d", "n": [1, {"k": 2}]}] [{"x": 1}]'
+        objects = []
+        for i in range(0, len(text), 3):
+            objects.extend(parser.feed(text[i:i + 3]))
+        assert objects == [{"q": "a {b} [c]", "esc": '"}'}, {"q": "d", "n": [1, {"k": 2}]}]
+
+
+SCREEN_JSON = json.dumps({
+    "match_score": 72, "strengths": ["Python"], "gaps": ["Go"], "confidence_level": "High",
+    "confidence_analysis": "Direct", "recommendation": "interview",
+})
+
+
+class TestStructuredOutput:
+    def test_parses_fenced_json_after_prose_with_braces(self):
+        text = "Scoring {roughly} below:\n```json\n" + SCREEN_JSON + "\n```\nHope this helps {!}"
+        assert parse_structured(text, CVScreenResponse).match_score == 72
+
+    def test_schema_mismatch_raises(self):
+        with pytest.raises(StructuredOutputError):
+            parse_structured('{"match_score": "high"}', CVScreenResponse)
+
+    async def test_unparseable_response_is_repaired_once(self, stub_model):
+        model = stub_model(ScriptedStubModel("I think they are a strong fit, maybe 70/100.", SCREEN_JSON))
+
+        result = await gemini_client.screen_cv("cv", "jd")
+        assert result.match_score == 72
+        assert model.calls == 2
+        assert "could not be used" in model.prompts[1]
+
+        # The repaired answer replaced the unusable one in the cache
+        assert (await gemini_client.screen_cv("cv", "jd")).match_score == 72
+        assert model.calls == 2
+
+    async def test_failed_repair_surfaces_502_instead_of_placeholder(self, client: AsyncClient, stub_model):
+        stub_model(ScriptedStubModel("no json here"))
+
+        response = await client.post("/api/quiz/evaluate", json={"answers": [{"question": "q", "answer": "a"}]})
+        assert response.status_code == 502
+
+
+@pytest.fixture
+def batching():
+    """Turn micro-batching on with fresh batchers for the duration of a test"""
+    original = gemini_client.batching, gemini_client.screen_batcher, gemini_client.quiz_batcher
+    gemini_client.batching = True
+    gemini_client.screen_batcher = MicroBatcher(gemini_client._run_screen_batch, max_items=4, max_wait=0.05)
+    gemini_client.quiz_batcher = MicroBatcher(gemini_client._run_quiz_batch, max_items=4, max_wait=0.05)
+    yield gemini_client
+    gemini_client.batching, gemini_client.screen_batcher, gemini_client.quiz_batcher = original
+
+
+class TestMicroBatching:
+    async def test_concurrent_screens_share_one_call(self, stub_model, batching):
+        model = stub_model(BatchScreeningStubModel())
+
+        results = await asyncio.gather(*[batching.screen_cv(f"CV score:{60 + i}", "jd") for i in range(4)])
+        assert [r.match_score for r in results] == [60, 61, 62, 63]
+        assert model.calls == 1
+        stats = batching.screen_batcher.stats()
+        assert stats["batch_sizes"] == {"4": 1}
+        assert stats["flush_reasons"] == {"size": 1}
+
+        # Each CV's result is cached under its unbatched prompt
+        assert (await batching.screen_cv("CV score:62", "jd")).match_score == 62
+        assert model.calls == 1
+
+    async def test_identical_concurrent_requests_take_one_batch_entry(self, stub_model, batching):
+        model = stub_model(BatchScreeningStubModel())
+
+        results = await asyncio.gather(*[batching.screen_cv(cv, "jd") for cv in ["CV score:70"] * 3 + ["CV score:71"]])
+        assert [r.match_score for r in results] == [70, 70, 70, 71]
+        assert len({id(r) for r in results}) == 4
+        assert model.calls == 1
+        assert batching.screen_batcher.stats()["batch_sizes"] == {"2": 1}
+        assert batching.cache.stats()["coalesced"] == 2
+
+    async def test_batches_split_by_size_and_job_description(self, stub_model, batching):
+        model = stub_model(BatchScreeningStubModel())
+
+        calls = [batching.screen_cv(f"CV score:{i}", "jd one") for i in range(6)]
+        calls.append(batching.screen_cv("CV score:99", "jd two"))
+        results = await asyncio.gather(*calls)
+        assert [r.match_score for r in results] == [0, 1, 2, 3, 4, 5, 99]
+        assert model.calls == 3
+        assert batching.screen_batcher.stats()["batch_sizes"] == {"1": 1, "2": 1, "4": 1}
+
+    async def test_missing_entries_fall_back_to_single_calls(self, stub_model, batching):
+        model = stub_model(BatchScreeningStubModel(drop=(1,)))
+
+        results = await asyncio.gather(*[batching.screen_cv(f"CV score:{70 + i}", "jd") for i in range(3)])
+        assert [r.match_score for r in results] == [70, 71, 72]
+        assert model.calls == 2
+        assert "Candidate CV #" not in model.prompts[1]
+
+    async def test_quiz_generations_are_batched(self, stub_model, batching):
+        batch = json.dumps([{"index": i, "questions": json.loads(QUIZ_JSON)[:i + 1]} for i in range(2)])
+        model = stub_model(ScriptedStubModel(batch))
+
+        first, second = await asyncio.gather(
+            batching.generate_tech_questions("Backend Engineer", "advanced", 1),
+            batching.generate_tech_questions("Data Engineer", "beginner", 2),
+        )
+        assert (len(first), len(second)) == (1, 2)
+        assert model.calls == 1
+        assert "Request #1: 2 questions for a Data Engineer" in model.prompts[0]
+
+    async def test_batch_failure_reaches_every_caller(self):
+        async def failing(key, items):
+            raise RuntimeError("quota")
+
+        batcher = MicroBatcher(failing, max_items=10, max_wait=0.01)
+        results = await asyncio.gather(*[batcher.submit("k", i) for i in range(3)], return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert batcher.stats()["flush_reasons"] == {"wait": 1}
+
+    async def test_token_budget_closes_a_batch_early(self):
+        async def echo(key, items):
+            return items
+
+        batcher = MicroBatcher(echo, max_items=10, max_wait=0.01, max_tokens=100)
+        assert await asyncio.gather(*[batcher.submit("k", i, tokens=60) for i in range(3)]) == [0, 1, 2]
+        assert batcher.stats()["batch_sizes"] == {"1": 3}
+
+
+class TestRateLimiting:
+    async def test_quota_errors_are_retried_with_backoff(self, client: AsyncClient, stub_model):
+        model = stub_model(QuotaStubModel(failures=2))
+
+        response = await client.post("/api/jd/generate", json=JD_PAYLOAD)
+        assert response.status_code == 200
+        assert model.calls == 3
+        assert gemini_client.limiter.stats()["retries"] == 2
+
+    async def test_exhausted_quota_maps_to_429_with_retry_after(self, client: AsyncClient, stub_model):
+        stub_model(QuotaStubModel(failures=100))
+
+        response = await client.post("/api/jd/generate", json=JD_PAYLOAD)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert gemini_client.limiter.stats()["quota_errors"] == gemini_client.limiter.max_retries + 1
+
+    async def test_full_queue_rejects_immediately(self, client: AsyncClient, stub_model):
+        stub_model(AsyncStubModel(latency=0.3))
+        gemini_client.limiter = GeminiLimiter(max_concurrency=1, queue_size=1)
+
+        responses = await asyncio.gather(*[
+            client.post("/api/jd/generate", json={**JD_PAYLOAD, "role": f"Role {i}"}) for i in range(3)
+        ])
+        assert sorted(r.status_code for r in responses) == [200, 200, 429]
+        rejected = next(r for r in responses if r.status_code == 429)
+        assert "Retry-After" in rejected.headers
+
+    async def test_admission_deadline_bounds_queueing(self):
+        limiter = GeminiLimiter(max_concurrency=1, admission_timeout=0.05)
+
+        async def slow():
+            await asyncio.sleep(0.3)
+            return "done"
+
+        first = asyncio.create_task(limiter.call(slow))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimited):
+            await limiter.call(slow)
+        assert await first == "done"
+
+    async def test_slots_survive_admissions_timing_out_as_they_free_up(self):
+        limiter = GeminiLimiter(max_concurrency=1, admission_timeout=0.02)
+
+        async def hold(seconds: float):
+            await asyncio.sleep(seconds)
+            return "done"
+
+        # The holder releases its slot within a fraction of a millisecond of the waiter's deadline
+        for n in range(40):
+            holder = asyncio.create_task(limiter.call(lambda: hold(0.02 + (n % 8 - 4) * 0.0002)))
+            await asyncio.sleep(0)
+            await asyncio.gather(limiter.call(lambda: hold(0)), return_exceptions=True)
+            await holder
+        assert not limiter._semaphore.locked() and limiter.in_flight == 0
+        assert await asyncio.wait_for(limiter.call(lambda: hold(0)), 0.1) == "done"
+
+    async def test_concurrency_is_capped(self):
+        limiter = GeminiLimiter(max_concurrency=3)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.02)
+
+        await asyncio.gather(*[limiter.call(call) for _ in range(10)])
+        assert peak == 3
+
+    def test_token_bucket_delays_once_the_burst_is_spent(self):
+        now = [0.0]
+        bucket = TokenBucket(per_minute=60, burst=2, clock=lambda: now[0])
+
+        bucket.take(1)
+        bucket.take(1)
+        assert bucket.delay(1) == pytest.approx(1.0)
+        now[0] = 0.5
+        assert bucket.delay(1) == pytest.approx(0.5)
+        now[0] = 10
+        assert bucket.delay(2) == 0
+
+
+EVALUATION_JSON = json.dumps({"score": 70, "confidence_level": "Medium", "feedback": "Solid"})
+
+
+class FakeSDK:
+    """Stands in for google.generativeai, handing out a stub per model name and recording each config"""
+
+    def __init__(self, models: dict):
+        self.models = models
+        self.built = []
+
+    def configure(self, api_key):
+        pass
+
+    def GenerativeModel(self, name, generation_config=None):
+        self.built.append((name, generation_config))
+        return self.models[name]
+
+
+@pytest.fixture
+def routed_client(monkeypatch):
+    """A fresh client whose SDK is faked, so routes pick between stub models by name"""
+    clients = []
+
+    def build(models: dict, **route):
+        sdk = FakeSDK(models)
+        monkeypatch.setattr("services.gemini_client.genai", sdk)
+        client = GeminiClient()
+        client.limiter = GeminiLimiter(backoff_base=0.01, backoff_max=0.05)
+        defaults = {"model": "primary", "fallback": "secondary", "max_output_tokens": 256, "temperature": 0.1}
+        client.router = ModelRouter(routes={task: Route(task=task, **{**defaults, **route}) for task in TASKS},
+                                    prices={"primary": (1.0, 2.0)})
+        clients.append(client)
+        return client, sdk
+
+    yield build
+    for client in clients:
+        client.executor.shutdown()
+
+
+class TestModelRouting:
+    async def test_task_is_sent_to_its_model_with_its_generation_config(self, routed_client):
+        client, sdk = routed_client({"primary": AsyncStubModel(latency=0, text=EVALUATION_JSON)})
+
+        result = await client.evaluate_quiz([{"question": "What is a mutex?", "answer": "A lock"}])
+        assert result.score == 70
+        assert sdk.built == [("primary", {"max_output_tokens": 256, "temperature": 0.1})]
+        assert client.router.stats()["models"]["primary"]["quiz_eval"]["calls"] == 1
+
+    async def test_batched_prompt_gets_a_proportionally_larger_output_cap(self, routed_client):
+        client, sdk = routed_client({"primary": AsyncStubModel(latency=0)})
+        await client.generate_content("two requests in one prompt", "screen", scale=2)
+        assert sdk.built == [("primary", {"max_output_tokens": 512, "temperature": 0.1})]
+
+    async def test_timeout_falls_back_to_the_secondary_model(self, routed_client):
+        slow, fast = AsyncStubModel(latency=1.0), AsyncStubModel(latency=0, text=EVALUATION_JSON)
+        client, _ = routed_client({"primary": slow, "secondary": fast}, timeout=0.05)
+
+        result = await client.evaluate_quiz([{"question": "What is a mutex?", "answer": "A lock"}])
+        assert result.score == 70
+        stats = client.router.stats()["models"]
+        assert stats["primary"]["quiz_eval"]["timeouts"] == 1
+        assert stats["primary"]["quiz_eval"]["fell_back"] == 1
+        assert stats["secondary"]["quiz_eval"]["calls"] == 1
+
+    async def test_overloaded_primary_falls_back_without_waiting_out_retries(self, routed_client):
+        overloaded, fallback = QuotaStubModel(failures=100), AsyncStubModel(latency=0, text="Backend Engineer")
+        client, _ = routed_client({"primary": overloaded, "secondary": fallback})
+
+        result = await client.generate_jd("Backend Engineer", ["Python"], "mid")
+        assert result["title"] == "Backend Engineer"
+        assert overloaded.calls == 1 and fallback.calls == 1
+        assert client.limiter.stats()["retries"] == 0
+
+    async def test_pinned_model_answers_every_task_without_fallback(self, client: AsyncClient, stub_model):
+        model = stub_model(QuotaStubModel(failures=1))
+        response = await client.post("/api/jd/generate", json=JD_PAYLOAD)
+        assert response.status_code == 200
+        assert model.calls == 2 and gemini_client.limiter.stats()["retries"] == 1
+
+    def test_routes_and_prices_come_from_the_environment(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_ROUTE_SCREEN_MODEL", "gemini-1.5-pro")
+        monkeypatch.setenv("GEMINI_ROUTE_SCREEN_FALLBACK", "")
+        monkeypatch.setenv("GEMINI_ROUTE_SCREEN_MAX_OUTPUT_TOKENS", "600")
+        monkeypatch.setenv("GEMINI_ROUTE_SCREEN_TIMEOUT_SECONDS", "20")
+        screen = load_routes()["screen"]
+        assert (screen.model, screen.fallback, screen.max_output_tokens, screen.timeout) == (
+            "gemini-1.5-pro", "", 600, 20.0)
+        assert load_prices("custom-model=0.5/1.5")["custom-model"] == (0.5, 1.5)
+
+    def test_stats_estimate_cost_from_reported_tokens(self):
+        router = ModelRouter(prices={"primary": (1.0, 2.0)})
+
+        class Usage:
+            usage_metadata = type("Usage", (), {"prompt_token_count": 1000, "candidates_token_count": 500})
+
+        router.record("primary", "screen", 0.2, response=Usage())
+        router.record("primary", "screen", 0.4, error=TimeoutError(), timed_out=True)
+        stats = router.stats()["models"]["primary"]["screen"]
+        assert stats["calls"] == 2 and stats["errors"] == 1 and stats["timeouts"] == 1
+        assert stats["cost_usd"] == pytest.approx(0.002)
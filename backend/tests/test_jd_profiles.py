@@ -0,0 +1,127 @@
+import json
+import pytest
+from httpx import AsyncClient, ASGITransport
+from main import app
+from services.jd_profiles import JDProfileStore, build_profile
+from services.prefilter import pre_score
+from models.schemas import JDRequirements
+from tests.stubs import ScreeningStubModel, make_docx
+
+JD_TEXT = """Senior Backend Engineer
+
+We are hiring a senior backend engineer to own the reliability of our screening pipeline. You will design
+APIs, review code and mentor other engineers. You must have five years of Python, FastAPI and PostgreSQL,
+and have run services on AWS with Docker and Kubernetes. Kafka and Terraform are a plus. We offer a
+friendly team, flexible hours and a generous learning budget."""
+
+REQUIREMENTS = {
+    "title": "Senior Backend Engineer",
+    "seniority": "senior",
+    "min_years_experience": 5,
+    "must_haves": ["Python", "FastAPI", "PostgreSQL", "AWS"],
+    "skills": ["Docker", "Kubernetes"],
+    "nice_to_haves": ["Kafka", "Terraform"],
+    "responsibilities": ["Design APIs", "Mentor engineers"],
+}
+
+
+class ProfileStubModel(ScreeningStubModel):
+    """Answers requirement extraction prompts with REQUIREMENTS and screening prompts as ScreeningStubModel"""
+
+    def respond(self, contents) -> str:
+        if "Extract the hiring requirements" in contents:
+            return json.dumps(REQUIREMENTS)
+        return super().respond(contents)
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+async def create_profile(client: AsyncClient, **body) -> dict:
+    response = await client.post("/api/jd/profiles", json=body or {"jd_text": JD_TEXT})
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestJDProfiles:
+    async def test_profile_is_extracted_once_per_jd(self, client: AsyncClient, stub_model):
+        model = stub_model(ProfileStubModel(latency=0))
+        profile = await create_profile(client)
+
+        assert profile["requirements"]["must_haves"] == REQUIREMENTS["must_haves"]
+        assert profile["terms"][:2] == ["senior", "backend"] and profile["terms"].count("kafka") == 3
+        assert profile["compact_tokens"] < profile["jd_tokens"]
+        # Reformatted copies of the JD, or the body of a /generate response, map to the same profile
+        again = await create_profile(client, job_description=JD_TEXT.replace("\n", " "), title="ignored")
+        assert again == profile and model.calls == 1
+        assert (await client.get(f"/api/jd/profiles/{profile['id']}")).json() == profile
+        assert (await client.get("/api/jd/profiles/unknown")).status_code == 404
+
+    async def test_no_cache_extracts_the_profile_again(self, client: AsyncClient, stub_model):
+        model = stub_model(ProfileStubModel(latency=0))
+        profile = await create_profile(client)
+
+        response = await client.post("/api/jd/profiles", json={"jd_text": JD_TEXT, "title": "Staff Engineer"},
+                                     headers={"Cache-Control": "no-cache"})
+        assert response.status_code == 200 and model.calls == 2
+        refreshed = response.json()
+        assert refreshed["id"] == profile["id"] and refreshed["created_at"] > profile["created_at"]
+        assert (await client.get(f"/api/jd/profiles/{profile['id']}")).json() == refreshed
+        assert refreshed["requirements"]["title"] == "Staff Engineer"
+
+    async def test_screen_sends_compact_requirements_instead_of_the_jd(self, client: AsyncClient, stub_model):
+        model = stub_model(ProfileStubModel(latency=0))
+        profile = await create_profile(client)
+        response = await client.post("/api/cv/screen", data={"jd_profile_id": profile["id"]}, files={
+            "cv_file": ("cv.docx", make_docx("Python FastAPI PostgreSQL AWS engineer", "score:82"),
+                        "application/octet-stream")})
+
+        assert response.status_code == 200
+        assert response.json()["match_score"] == 82 and response.json()["pre_score"] > 0
+        prompt = model.prompts[-1]
+        assert profile["compact_text"] in prompt and "generous learning budget" not in prompt
+
+    async def test_screen_needs_exactly_one_jd(self, client: AsyncClient, stub_model):
+        stub_model(ProfileStubModel(latency=0))
+        files = {"cv_file": ("cv.docx", make_docx("Python"), "application/octet-stream")}
+        assert (await client.post("/api/cv/screen", files=files)).status_code == 400
+        assert (await client.post("/api/cv/screen", data={"jd_profile_id": "missing"}, files=files)).status_code == 404
+        both = await client.post("/api/cv/screen", data={"jd_text": "Python", "jd_profile_id": "x"}, files=files)
+        assert both.status_code == 400
+
+    async def test_batch_pre_scores_with_profile_terms(self, client: AsyncClient, stub_model):
+        model = stub_model(ProfileStubModel(latency=0))
+        profile = await create_profile(client)
+        files = [
+            ("cv_files", ("match.docx", make_docx("Python FastAPI PostgreSQL AWS Kubernetes"), "application/octet-stream")),
+            ("cv_files", ("other.docx", make_docx("Java Spring Oracle"), "application/octet-stream")),
+        ]
+        response = await client.post("/api/cv/screen/batch", data={"jd_profile_id": profile["id"], "top_k": "1"},
+                                     files=files)
+        by_name = {e["filename"]: e for e in map(json.loads, response.text.splitlines()) if e["event"] == "result"}
+
+        assert by_name["match.docx"]["pre_score"] > by_name["other.docx"]["pre_score"] == 0
+        assert by_name["other.docx"]["skipped"] and model.calls == 2
+
+    def test_profile_terms_rank_stated_requirements_over_jd_wording(self):
+        profile = build_profile(JD_TEXT, JDRequirements(**REQUIREMENTS))
+        cvs = ["Python engineer who wants a friendly team, flexible hours and a generous learning budget",
+               "Python FastAPI PostgreSQL AWS Kafka developer"]
+
+        # The raw JD rewards echoing its perks and boilerplate; the profile favours the stated stack
+        by_jd = pre_score(JD_TEXT, cvs)
+        by_profile = pre_score(JD_TEXT, cvs, terms=profile.terms)
+        assert by_jd[0] > by_jd[1] and by_profile[1] > by_profile[0]
+
+    def test_store_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "profiles.sqlite3")
+        profile = build_profile(JD_TEXT, JDRequirements(**REQUIREMENTS), title="Staff Engineer")
+        JDProfileStore(path).put(profile, JD_TEXT)
+
+        reopened = JDProfileStore(path)
+        assert reopened.get(profile.id) == profile
+        assert reopened.get(profile.id).compact_text.startswith("Title: Staff Engineer\nSeniority: senior")
+        assert reopened.stats()["profiles"] == 1 and reopened.stats()["uses"] == 2
@@ -0,0 +1,240 @@
+import asyncio
+import io
+import os
+import sqlite3
+import zipfile
+import pytest
+from httpx import AsyncClient, ASGITransport
+from main import app
+from routers.jobs import JOB_HANDLERS
+from services.extraction import document_extractor
+from services.jobs import JobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED
+from tests.stubs import ScreeningStubModel, ScriptedStubModel, FakeFileStorage, AUDIO_JSON, make_docx
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+@pytest.fixture
+async def queue(tmp_path, monkeypatch):
+    """A started job queue in a temporary directory, wired into the jobs router"""
+    queue = JobQueue(str(tmp_path / "jobs"), workers=2, poll_interval=0.05, handlers=JOB_HANDLERS)
+    monkeypatch.setattr("routers.jobs.job_queue", queue)
+    queue.start()
+    yield queue
+    await queue.stop()
+
+
+async def wait_for_job(client: AsyncClient, job_id: str, timeout: float = 5) -> dict:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = (await client.get(f"/api/jobs/{job_id}")).json()
+        if job["status"] in (SUCCEEDED, FAILED):
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job still {job['status']}"
+        await asyncio.sleep(0.05)
+
+
+def staged(queue: JobQueue, filename: str, data: bytes) -> tuple:
+    """A (filename, path) input for ``submit``, written where the router stages uploads"""
+    path = os.path.join(queue.make_staging_dir(), "upload")
+    with open(path, "wb") as f:
+        f.write(data)
+    return filename, path
+
+
+def batch_files(*scores: int) -> list:
+    return [("cv_files", (f"cv{score}.docx", make_docx(f"Python engineer score:{score}"), "application/octet-stream"))
+            for score in scores]
+
+
+class TestJobs:
+    async def test_batch_screen_job_reports_progress_and_result(self, client: AsyncClient, stub_model, queue):
+        stub_model(ScreeningStubModel(latency=0.05))
+
+        response = await client.post("/api/jobs/cv-screen-batch", data={"jd_text": "Python engineer"},
+                                     files=batch_files(40, 90, 65))
+        assert response.status_code == 202
+        submitted = response.json()
+        assert submitted["status"] == QUEUED
+        assert response.headers["Location"] == f"/api/jobs/{submitted['id']}"
+
+        job = await wait_for_job(client, submitted["id"])
+        assert job["status"] == SUCCEEDED
+        assert job["progress"] == 1.0
+        assert [entry["match_score"] for entry in job["result"]["summary"]["ranking"]] == [90, 65, 40]
+        assert [item["filename"] for item in job["result"]["items"]] == ["cv40.docx", "cv90.docx", "cv65.docx"]
+
+    async def test_idempotency_key_returns_the_original_job(self, client: AsyncClient, stub_model, queue):
+        model = stub_model(ScreeningStubModel(latency=0.05))
+        headers = {"Idempotency-Key": "drive-2024-batch-7"}
+
+        first = await client.post("/api/jobs/cv-screen-batch", data={"jd_text": "Python engineer"},
+                                  files=batch_files(70), headers=headers)
+        second = await client.post("/api/jobs/cv-screen-batch", data={"jd_text": "Python engineer"},
+                                   files=batch_files(70), headers=headers)
+        assert (first.status_code, second.status_code) == (202, 200)
+        assert first.json()["id"] == second.json()["id"]
+
+        await wait_for_job(client, first.json()["id"])
+        assert model.calls == 1
+        # The replayed request's uploads were staged and then dropped
+        assert os.listdir(queue.staging_dir) == []
+
+    async def test_archive_members_are_staged_without_oversized_ones(self, client: AsyncClient, stub_model, queue,
+                                                                     monkeypatch):
+        stub_model(ScreeningStubModel(latency=0))
+        monkeypatch.setattr(document_extractor, "max_bytes", 64 * 1024)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("cvs/cv80.docx", make_docx("Python engineer score:80"))
+            archive.writestr("cvs/huge.pdf", b"0" * (64 * 1024 + 1))
+            archive.writestr("cvs/notes.txt", b"skipped")
+
+        files = [*batch_files(60), ("archive", ("cvs.zip", buffer.getvalue(), "application/zip"))]
+        response = await client.post("/api/jobs/cv-screen-batch", data={"jd_text": "Python engineer"}, files=files)
+        stored = queue.get(response.json()["id"])
+        assert stored.params["filenames"] == ["cv60.docx", "cv80.docx", "huge.pdf"]
+        assert [os.path.basename(path) for path in stored.files] == ["0000-cv60.docx", "0001-cv80.docx"]
+
+        job = await wait_for_job(client, stored.id)
+        assert [entry["match_score"] for entry in job["result"]["summary"]["ranking"]] == [80, 60]
+        assert "limit" in job["result"]["items"][2]["error"]
+
+    async def test_no_cache_header_is_kept_for_the_job(self, client: AsyncClient, stub_model, queue):
+        model = stub_model(ScreeningStubModel(latency=0))
+        for _ in range(2):
+            response = await client.post("/api/jobs/cv-screen-batch", data={"jd_text": "Python engineer"},
+                                         files=batch_files(70), headers={"Cache-Control": "no-cache"})
+            await wait_for_job(client, response.json()["id"])
+
+        assert queue.get(response.json()["id"]).params["use_cache"] is False
+        assert model.calls == 2
+
+    async def test_racing_submits_with_one_idempotency_key_get_one_job(self, tmp_path):
+        directory = str(tmp_path / "jobs")
+        first = JobQueue(directory, handlers={"record": None})
+        second = JobQueue(directory, handlers={"record": None})
+        first._db()
+
+        # Both check for the key while a third process holds the write lock, so neither sees the other's job
+        peer = sqlite3.connect(os.path.join(directory, "jobs.sqlite3"))
+        peer.execute("BEGIN IMMEDIATE")
+        submits = [asyncio.create_task(asyncio.to_thread(queue.submit, "record", {}, [staged(queue, "a.txt", b"x")],
+                                                         "drive-2024-batch-7")) for queue in (first, second)]
+        await asyncio.sleep(0.2)
+        peer.execute("COMMIT")
+        (job_a, created_a), (job_b, created_b) = await asyncio.gather(*submits)
+
+        assert job_a.id == job_b.id and sorted([created_a, created_b]) == [False, True]
+        assert os.listdir(first.files_dir) == [job_a.id]
+
+    async def test_audio_job(self, client: AsyncClient, stub_model, queue, monkeypatch):
+        stub_model(ScriptedStubModel(AUDIO_JSON))
+        storage = FakeFileStorage()
+        monkeypatch.setattr("services.gemini_client.genai.upload_file", storage.upload_file)
+
+        response = await client.post("/api/jobs/audio-analysis",
+                                     files={"file": ("answer.webm", b"\x1aE\xdf\xa3 audio", "audio/webm")})
+        job = await wait_for_job(client, response.json()["id"])
+        assert job["result"]["tone"] == "Calm"
+        assert storage.uploads[0]["data"] == b"\x1aE\xdf\xa3 audio"
+
+    async def test_handler_failure_is_recorded(self, tmp_path):
+        async def broken(job, progress):
+            raise RuntimeError("model unavailable")
+
+        queue = JobQueue(str(tmp_path / "jobs"), workers=1, poll_interval=0.05, handlers={"broken": broken})
+        queue.start()
+        job, _ = queue.submit("broken", {})
+        for _ in range(100):
+            if queue.get(job.id).status == FAILED:
+                break
+            await asyncio.sleep(0.02)
+        await queue.stop()
+        assert queue.get(job.id).error == "model unavailable"
+
+    async def test_worker_outlives_a_locked_database(self, tmp_path, monkeypatch):
+        async def record(job, progress):
+            return {"ok": True}
+
+        queue = JobQueue(str(tmp_path / "jobs"), workers=1, poll_interval=0.01, handlers={"record": record})
+        claim, errors = queue._claim, [sqlite3.OperationalError("database is locked")] * 2
+
+        def locked_at_first():
+            if errors:
+                raise errors.pop()
+            return claim()
+
+        monkeypatch.setattr(queue, "_claim", locked_at_first)
+        job, _ = queue.submit("record", {})
+        queue.start()
+        for _ in range(100):
+            if queue.get(job.id).status == SUCCEEDED:
+                break
+            await asyncio.sleep(0.02)
+        assert queue.get(job.id).status == SUCCEEDED
+        assert queue.stats()["worker_errors"] == 2 and queue.stats()["workers"] == 1
+        await queue.stop()
+
+    async def test_jobs_survive_a_restart(self, tmp_path):
+        runs = []
+
+        async def record(job, progress):
+            with open(job.files[0], "rb") as f:
+                runs.append(f.read())
+            return {"ok": True}
+
+        directory = str(tmp_path / "jobs")
+        before = JobQueue(directory, handlers={"record": record})
+        pending, _ = before.submit("record", {}, [staged(before, "a.txt", b"payload")])
+        interrupted, _ = before.submit("record", {}, [staged(before, "b.txt", b"half done")])
+        before._update(interrupted.id, status=RUNNING)
+
+        after = JobQueue(directory, workers=1, poll_interval=0.05, handlers={"record": record})
+        after.start()
+        for _ in range(100):
+            if all(after.get(job.id).status == SUCCEEDED for job in (pending, interrupted)):
+                break
+            await asyncio.sleep(0.02)
+        await after.stop()
+
+        assert sorted(runs) == [b"half done", b"payload"]
+        assert after.get(pending.id).result == {"ok": True}
+
+    def test_sibling_worker_processes_share_the_queue(self, tmp_path):
+        directory = str(tmp_path / "jobs")
+        first = JobQueue(directory, handlers={"record": None})
+        second = JobQueue(directory, handlers={"record": None})
+        job, _ = first.submit("record", {})
+
+        # Both saw the job queued, but only one claim can move it to running
+        claims = [first._claim(), second._claim()]
+        assert [claim is not None for claim in claims] == [True, False]
+        assert second.get(job.id).status == RUNNING
+
+        # A worker starting later must leave its sibling's running job alone
+        third = JobQueue(directory, workers=0, handlers={"record": None})
+        third.start(recover=False)
+        assert third.get(job.id).status == RUNNING
+        assert third.requeue_interrupted() == 1
+
+    def test_job_that_keeps_killing_its_worker_is_failed(self, tmp_path):
+        queue = JobQueue(str(tmp_path / "jobs"), max_attempts=2, handlers={"record": None})
+        job, _ = queue.submit("record", {}, [staged(queue, "a.txt", b"payload")])
+
+        # Each claim is an attempt; the worker dies before finishing, and the next start requeues the job
+        queue._claim()
+        assert queue.requeue_interrupted() == 1 and queue.get(job.id).status == QUEUED
+        queue._claim()
+        assert queue.requeue_interrupted() == 0
+        failed = queue.get(job.id)
+        assert failed.status == FAILED and failed.error == "Interrupted on each of 2 attempts"
+        assert failed.finished_at and not os.path.exists(os.path.dirname(failed.files[0]))
+
+    async def test_unknown_job_is_404(self, client: AsyncClient, queue):
+        response = await client.get("/api/jobs/does-not-exist")
+        assert response.status_code == 404
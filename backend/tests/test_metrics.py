@@ -0,0 +1,105 @@
+import json
+import logging
+import pytest
+from types import SimpleNamespace
+from httpx import AsyncClient, ASGITransport
+from main import app
+from services.metrics import (MetricsRegistry, REQUEST_SECONDS, STAGE_SECONDS, GEMINI_TOKENS, GEMINI_PAYLOAD_BYTES,
+                              stage, timing_context)
+from tests.stubs import ScreeningStubModel, make_docx
+
+SCREEN_STAGES = ("upload_read", "extraction", "prompt_build", "gemini_call", "json_parse", "validation")
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+class UsageStubModel(ScreeningStubModel):
+    """Also reports token usage the way Gemini responses carry it"""
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        response = await super().generate_content_async(contents, stream)
+        response.usage_metadata = SimpleNamespace(prompt_token_count=120, candidates_token_count=30,
+                                                  total_token_count=150)
+        return response
+
+
+async def screen(client: AsyncClient, headers: dict = None):
+    return await client.post("/api/cv/screen", data={"jd_text": "Python engineer"}, headers=headers,
+                             files={"cv_file": ("cv.docx", make_docx("Python engineer score:80"), "application/octet-stream")})
+
+
+class TestMetricTypes:
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("endpoint",), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, endpoint='/a"b')
+
+        lines = registry.render().splitlines()
+        assert "# TYPE latency_seconds histogram" in lines
+        assert 'latency_seconds_bucket{endpoint="/a\\"b",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{endpoint="/a\\"b",le="1"} 3' in lines
+        assert 'latency_seconds_bucket{endpoint="/a\\"b",le="+Inf"} 4' in lines
+        assert 'latency_seconds_count{endpoint="/a\\"b"} 4' in lines
+
+    def test_counter_and_collected_gauges(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("calls_total", "Calls", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        registry.register_collector(lambda: {("queue_depth", "Depth"): 7})
+
+        lines = registry.render().splitlines()
+        assert 'calls_total{kind="a"} 3' in lines
+        assert "# TYPE queue_depth gauge" in lines and "queue_depth 7" in lines
+
+    def test_stage_records_errors_and_context_label(self):
+        before = STAGE_SECONDS.count(endpoint="job:test", stage="parse", outcome="error")
+        with timing_context("job:test"), pytest.raises(ValueError):
+            with stage("parse"):
+                raise ValueError("bad")
+        assert STAGE_SECONDS.count(endpoint="job:test", stage="parse", outcome="error") == before + 1
+
+
+class TestRequestInstrumentation:
+    async def test_cv_screen_times_every_stage_under_its_route(self, client: AsyncClient, stub_model):
+        stub_model(UsageStubModel(latency=0))
+        endpoint = "/api/cv/screen"
+        before = {name: STAGE_SECONDS.count(endpoint=endpoint, stage=name, outcome="ok") for name in SCREEN_STAGES}
+        requests = REQUEST_SECONDS.count(endpoint=endpoint, method="POST", status=200)
+        tokens = GEMINI_TOKENS.value(endpoint=endpoint, kind="total")
+        prompts = GEMINI_PAYLOAD_BYTES.count(endpoint=endpoint, direction="prompt")
+
+        assert (await screen(client)).status_code == 200
+        for name in SCREEN_STAGES:
+            assert STAGE_SECONDS.count(endpoint=endpoint, stage=name, outcome="ok") == before[name] + 1, name
+        assert REQUEST_SECONDS.count(endpoint=endpoint, method="POST", status=200) == requests + 1
+        assert GEMINI_TOKENS.value(endpoint=endpoint, kind="total") == tokens + 150
+        assert GEMINI_PAYLOAD_BYTES.count(endpoint=endpoint, direction="prompt") == prompts + 1
+
+    async def test_path_parameters_are_not_labels(self, client: AsyncClient):
+        await client.get("/api/jobs/abc")
+        await client.get("/api/jobs/def")
+        text = (await client.get("/metrics")).text
+        assert 'endpoint="/api/jobs/{job_id}",method="GET",status="404"' in text
+        assert "/api/jobs/abc" not in text
+
+    async def test_metrics_endpoint_serves_prometheus_text(self, client: AsyncClient):
+        response = await client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE hr_helper_stage_duration_seconds histogram" in response.text
+        assert "hr_helper_gemini_in_flight " in response.text
+
+    async def test_timing_log_lists_stage_durations(self, client: AsyncClient, stub_model, monkeypatch, caplog):
+        stub_model(UsageStubModel(latency=0))
+        monkeypatch.setattr("services.metrics.METRICS_TIMING_LOGS", True)
+
+        with caplog.at_level(logging.INFO, logger="hr_helper.timing"):
+            await screen(client, headers={"Cache-Control": "no-cache"})
+        line = json.loads(caplog.records[-1].getMessage())
+        assert line["endpoint"] == "/api/cv/screen" and line["status"] == 200
+        assert set(SCREEN_STAGES) <= set(line["stages_ms"])
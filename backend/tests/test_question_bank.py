@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from httpx import AsyncClient, ASGITransport
+from main import app
+from models.schemas import Question
+from services.gemini_client import gemini_client
+from services.question_bank import QuestionBank, normalize_question
+from tests.stubs import QuizStubModel
+
+QUIZ_PAYLOAD = {"role": "Backend Engineer", "skill_level": "intermediate", "num_questions": 3}
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+def question(text: str, topic: str = "Python", difficulty: str = "easy") -> Question:
+    return Question(question=text, answer="answer", difficulty=difficulty, topic=topic)
+
+
+class TestQuestionBank:
+    def test_questions_are_deduplicated_by_normalized_text(self, tmp_path):
+        bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+        added = bank.add("Backend Engineer", "Advanced", [
+            question("What is a GIL?"),
+            question("what is a  GIL"),
+            question("Explain MVCC.", topic="SQL"),
+        ])
+        assert added == 2
+        assert bank.add("backend engineer", "advanced", [question("WHAT IS A GIL?!")]) == 0
+        assert normalize_question("What is  a GIL?") == "what is a gil"
+
+    def test_sample_spreads_topics_and_honours_filters(self, tmp_path):
+        bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+        bank.add("Backend Engineer", "advanced",
+                 [question(f"Python {i}") for i in range(5)] +
+                 [question(f"SQL {i}", topic="SQL", difficulty="hard") for i in range(2)])
+
+        assert {q.topic for q in bank.sample("Backend Engineer", "advanced", 2)} == {"Python", "SQL"}
+        assert all(q.topic == "SQL" for q in bank.sample("Backend Engineer", "advanced", 2, difficulty="hard"))
+        assert bank.sample("Backend Engineer", "advanced", 3, topic="sql") is None
+        assert bank.sample("Frontend Engineer", "advanced", 1) is None
+
+    def test_bank_survives_a_restart(self, tmp_path):
+        path = str(tmp_path / "bank.sqlite3")
+        QuestionBank(path).add("Data Engineer", "beginner", [question("What is a join?")])
+        reopened = QuestionBank(path)
+        assert [q.question for q in reopened.sample("data engineer", "Beginner", 1)] == ["What is a join?"]
+        assert reopened.add("Data Engineer", "beginner", [question("What is a join?")]) == 0
+
+    async def test_refill_stops_when_generation_only_repeats(self, tmp_path):
+        bank = QuestionBank(str(tmp_path / "bank.sqlite3"), target=10)
+        calls = []
+
+        async def generate(**kwargs):
+            calls.append(kwargs)
+            return [question("Always the same")]
+
+        assert await bank.refill("Backend Engineer", "advanced", generate) == 1
+        assert len(calls) == 3
+        assert all(call["use_cache"] is False for call in calls)
+
+
+class TestQuizEndpoint:
+    async def test_miss_generates_then_background_refill_serves_the_next_quiz(
+            self, client: AsyncClient, stub_model, isolated_question_bank):
+        model = stub_model(QuizStubModel())
+        isolated_question_bank.low_water, isolated_question_bank.target = 6, 9
+
+        first = await client.post("/api/quiz/generate", json=QUIZ_PAYLOAD)
+        assert first.headers["X-Quiz-Source"] == "generated"
+        assert len(first.json()["questions"]) == 3
+
+        await asyncio.gather(*isolated_question_bank._refilling.values())
+        assert isolated_question_bank.size("Backend Engineer", "intermediate") >= 9
+        calls = model.calls
+
+        second = await client.post("/api/quiz/generate", json=QUIZ_PAYLOAD)
+        assert second.headers["X-Quiz-Source"] == "bank"
+        assert {q["topic"] for q in second.json()["questions"]} == {"Python", "SQL", "HTTP"}
+        assert model.calls == calls
+
+    async def test_no_cache_header_skips_the_bank(self, client: AsyncClient, stub_model, isolated_question_bank):
+        isolated_question_bank.add("Backend Engineer", "intermediate", [question(f"Banked {i}") for i in range(5)])
+        model = stub_model(QuizStubModel())
+
+        response = await client.post("/api/quiz/generate", json=QUIZ_PAYLOAD, headers={"Cache-Control": "no-cache"})
+        assert response.headers["X-Quiz-Source"] == "generated"
+        assert model.calls == 1
+
+    async def test_warm_up_fills_configured_roles(self, stub_model, isolated_question_bank):
+        stub_model(QuizStubModel())
+        isolated_question_bank.low_water, isolated_question_bank.target = 10, 10
+
+        tasks = isolated_question_bank.warm_up(gemini_client.generate_tech_questions,
+                                               roles=["Data Engineer"], levels=["beginner", "advanced"])
+        await asyncio.gather(*tasks)
+        assert isolated_question_bank.size("Data Engineer", "beginner") == 10
+        assert isolated_question_bank.size("Data Engineer", "advanced") == 10
+        assert isolated_question_bank.stats()["questions"] == 20
@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from services.cache import ResponseCache, SQLiteCacheBackend
+from services.errors import RateLimited
+from services.rate_limit import GeminiLimiter
+from services.shared_state import SharedState, SharedTokenBucket
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two SharedState handles on one file, standing in for two worker processes"""
+    path = str(tmp_path / "shared_state.sqlite3")
+    return SharedState(path, poll_interval=0.01), SharedState(path, poll_interval=0.01)
+
+
+class TestSharedState:
+    def test_leases_are_exclusive_until_released_or_expired(self, workers, tmp_path):
+        first, second = workers
+        assert first.claim("prompt")
+        assert not second.claim("prompt")
+        first.release("prompt")
+        assert second.claim("prompt")
+
+        lapsing = SharedState(first.path, lease_seconds=-1)
+        assert lapsing.claim("crashed")
+        assert first.claim("crashed")
+
+    def test_buckets_draw_on_one_budget(self, workers):
+        clock = lambda: 1000.0
+        first = SharedTokenBucket(workers[0], "requests", per_minute=60, clock=clock)
+        second = SharedTokenBucket(workers[1], "requests", per_minute=60, clock=clock)
+        first.take(45)
+        second.take(10)
+        assert first.level == second.level == 5
+        assert second.delay(20) == pytest.approx(15)
+
+    async def test_limiters_in_two_workers_share_the_request_quota(self, workers):
+        first = GeminiLimiter(rpm=2, tpm=0, admission_timeout=0.1, shared=workers[0])
+        second = GeminiLimiter(rpm=2, tpm=0, admission_timeout=0.1, shared=workers[1])
+
+        async def call():
+            return "ok"
+
+        assert await first.call(call) == "ok"
+        assert await second.call(call) == "ok"
+        with pytest.raises(RateLimited):
+            await first.call(call)
+        assert first.stats()["shared"] and workers[0].stats()["buckets"]["gemini_requests"] < 1
+
+    async def test_waiting_for_a_peers_lock_does_not_stall_the_event_loop(self, workers):
+        limiter = GeminiLimiter(rpm=10, tpm=0, shared=workers[0])
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def call():
+            return "ok"
+
+        # The other worker holds the write lock for 0.3s
+        peer = workers[1]._db()
+        peer.execute("BEGIN IMMEDIATE")
+        ticker = asyncio.create_task(tick())
+        admitted = asyncio.create_task(limiter.call(call))
+        await asyncio.sleep(0.3)
+        assert not admitted.done() and ticks >= 10
+        peer.execute("COMMIT")
+
+        assert await admitted == "ok"
+        ticker.cancel()
+
+    async def test_cache_waits_for_a_peer_computing_the_same_key(self, workers, tmp_path):
+        path = str(tmp_path / "responses.sqlite3")
+        first = ResponseCache(SQLiteCacheBackend(path), leases=workers[0])
+        second = ResponseCache(SQLiteCacheBackend(path), leases=workers[1])
+        calls = []
+
+        async def compute(value: str, delay: float):
+            calls.append(value)
+            await asyncio.sleep(delay)
+            return value
+
+        leader = asyncio.create_task(first.get_or_compute("key", lambda: compute("from first", 0.1)))
+        await asyncio.sleep(0.02)
+        follower = await second.get_or_compute("key", lambda: compute("from second", 0))
+
+        assert await leader == follower == "from first"
+        assert calls == ["from first"]
+        assert second.stats()["peer_coalesced"] == 1
+
+    async def test_cache_writes_waiting_on_a_peer_do_not_stall_the_event_loop(self, tmp_path):
+        path = str(tmp_path / "responses.sqlite3")
+        cache = ResponseCache(SQLiteCacheBackend(path))
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def compute():
+            return "fresh"
+
+        # Another worker holds the write lock for 0.3s, so storing the result has to wait for it
+        peer = SQLiteCacheBackend(path)._conn
+        peer.execute("BEGIN IMMEDIATE")
+        ticker = asyncio.create_task(tick())
+        stored = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.3)
+        assert not stored.done() and ticks >= 10
+        peer.execute("COMMIT")
+
+        assert await stored == "fresh"
+        assert await cache.lookup("key") == "fresh"
+        ticker.cancel()
+
+    async def test_bypass_ignores_peer_leases(self, workers, tmp_path):
+        cache = ResponseCache(SQLiteCacheBackend(str(tmp_path / "responses.sqlite3")), leases=workers[1])
+        assert workers[0].claim("key")
+
+        async def compute():
+            return "fresh"
+
+        assert await cache.get_or_compute("key", compute, bypass=True) == "fresh"
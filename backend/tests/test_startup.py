@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+import pytest
+from httpx import AsyncClient, ASGITransport
+from main import app
+from services import startup
+from services.errors import GeminiNotConfigured
+from services.gemini_client import GeminiClient
+from services.lazy_import import lazy_import
+from services.startup import StartupState
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+def test_importing_app_skips_heavy_sdks():
+    script = ("import sys, main; "
+              "print(','.join(m for m in ('google.generativeai', 'PyPDF2', 'docx', 'google.api_core.exceptions') "
+              "if m in sys.modules))")
+    env = {**os.environ, "GEMINI_API_KEY": ""}
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True,
+                            text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_module_imports_on_first_attribute():
+    module = lazy_import("json")
+    assert module.dumps({"a": 1}) == '{"a": 1}'
+    assert module.loaded and module.import_seconds is not None
+
+
+async def test_missing_api_key_fails_on_first_use(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    client = GeminiClient()
+    assert not client.configured
+    with pytest.raises(GeminiNotConfigured) as info:
+        client.model
+    assert info.value.status_code == 503
+
+
+async def test_ready_reports_checks(client, monkeypatch):
+    state = StartupState(prewarm=False)
+    monkeypatch.setattr("main.startup_state", state)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"] == {"started": False, "gemini_api_key": True, "prewarm": "skipped"}
+
+    state.started = True
+    response = await client.get("/ready")
+    assert response.status_code == 200 and response.json()["ready"] is True
+
+
+async def test_prewarm_runs_warmups_before_ready(monkeypatch):
+    monkeypatch.setattr(startup, "preload", lambda: {})
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    calls = []
+
+    async def async_warmup():
+        calls.append("async")
+
+    state = StartupState(prewarm=True)
+    state.started = True
+    state.start_prewarm(lambda: calls.append("sync"), async_warmup)
+    assert state.prewarm_status == startup.RUNNING and not state.ready
+    await state._task
+    assert calls == ["sync", "async"]
+    assert state.prewarm_status == startup.DONE and state.ready
+
+
+async def test_failed_prewarm_keeps_app_unready(monkeypatch):
+    monkeypatch.setattr(startup, "preload", lambda: {})
+
+    def broken():
+        raise RuntimeError("no network")
+
+    state = StartupState(prewarm=True)
+    state.started = True
+    state.start_prewarm(broken)
+    await state._task
+    assert state.prewarm_status == startup.FAILED and state.prewarm_error == "no network"
+    assert not state.ready